@@ -1,5 +1,4 @@
 from __future__ import annotations
-from django.db import models
 
 
 from datetime import timedelta, datetime
@@ -19,6 +18,7 @@ from users.models.tests import (
 )
 from users.models.core import User
 from users.models.questions import Question
+from users.proctoring.activity import recompute_analyses
 
 # ---------------------------------------------------------------------------
 # helper utilities -----------------------------------------------------------
@@ -95,41 +95,11 @@ def _add_keyboard_sequence(assignment: TestAssignment, n_chars: int) -> None:
 
 def _aggregate_analysis(assignment: TestAssignment) -> None:
     """Create/update the StudentActivityAnalysis row from raw logs."""
-    logs = StudentActivityLog.objects.filter(
+    recompute_analyses([assignment])
+    # synthetic samples keep is_suspicious unset; the label comes from the scenario, not the rules
+    StudentActivityAnalysis.objects.filter(
         assignment=assignment, attempt_no=assignment.attempt_no
-    )
-
-    esc = logs.filter(event_type="esc_pressed").count()
-    second_screen = logs.filter(event_type="second_screen").count()
-    tab_switches = logs.filter(event_type="tab_hidden").count()
-    window_blurs = logs.filter(event_type="window_blur").count()
-    copy_paste = (
-        logs.filter(event_type__in=["copy_event", "paste_event", "cut_event"]).count() // 2
-    )
-    key_presses = logs.filter(event_type="key_press").count()
-    total_chars = logs.aggregate(total=models.Sum("chars_written"))[
-        "total"
-    ] or 0
-    delays = list(logs.filter(event_type="key_press").values_list("key_delay", flat=True))
-    delays = [d for d in delays if d is not None]
-    avg_delay = sum(delays) / len(delays) if delays else None
-
-    StudentActivityAnalysis.objects.update_or_create(
-        assignment=assignment,
-        attempt_no=assignment.attempt_no,
-        defaults=dict(
-            esc_pressed=esc,
-            second_screen_events=second_screen,
-            tab_switches=tab_switches,
-            window_blurs=window_blurs,
-            copy_paste_events=copy_paste,
-            total_key_presses=key_presses,
-            average_key_delay=avg_delay,
-            total_focus_lost=second_screen + window_blurs + tab_switches,
-            is_suspicious=False,  # let the model decide later
-            total_chars=total_chars,
-        ),
-    )
+    ).update(is_suspicious=False)
 
 
 def _add_answers(assignment: TestAssignment, short: bool) -> None:
@@ -4,7 +4,6 @@ import json
 import tempfile
 from pathlib import Path
 from typing import Dict, Any, List
-import shap
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
@@ -13,18 +12,14 @@ from django.db import transaction
 from django.utils import timezone
 
 from ai_models.features import extract_features_for_assignment
-from ai_models.predictor import MODEL_PATH, load_model
+from ai_models.predictor import MODEL_PATH, get_bundle
 from ai_models.trainer import train_and_save_model
-from ai_models.verdict_engine import get_verdict_for_assignment
+from ai_models.verdict_engine import get_verdict_for_assignment, get_verdicts_for_assignments
 from users.models.tests import TestAssignment
+from users.jobs import PRIORITY_LOW, enqueue, final_attempt, on_failure
+from users.proctoring.evidence import latest_evidence_paths
 from contextlib import contextmanager
 
-try:
-    from .tasks import build_pdf_report_async, retrain_model_async  # type: ignore
-    HAVE_CELERY = True
-except ImportError:
-    HAVE_CELERY = False
-
 @contextmanager
 def bold(canvas):
     old_font = canvas._fontname
@@ -34,11 +29,7 @@ def bold(canvas):
     canvas.setFont(old_font, old_size)
 
 def _gather_evidence_images(assignment: TestAssignment) -> List[Path]:
-    frame_dir = Path(settings.BASE_DIR) / "frame_logs"
-    if not frame_dir.exists():
-        return []
-    prefix = f"{assignment.id}_"
-    return sorted([p for p in frame_dir.glob("*.jpg") if prefix in p.name], key=lambda p: p.stat().st_mtime, reverse=True)[:4]
+    return latest_evidence_paths(assignment, limit=4)
 
 def _contextual_filter(features: Dict[str, Any], assignment: TestAssignment) -> Dict[str, Any]:
     f = dict(features)
@@ -62,24 +53,58 @@ def _json_safe(o):
         return [_json_safe(v) for v in o]
     return o
 
+# retraining walks every labelled assignment; give it far longer than the default job lease
+RETRAIN_LEASE_SECONDS = 2 * 60 * 60
+
+VERDICT_FIELDS = ["ai_cheating", "ai_probability", "rule_triggered", "ai_details_json", "ai_evaluated_at", "ai_status"]
+
+def _apply_verdict(assignment: TestAssignment, verdict: Dict[str, Any], evaluated_at) -> None:
+    assignment.ai_cheating = verdict["cheating"]
+    assignment.ai_probability = 1.0 if verdict.get("rule_triggered") else verdict.get("probability")
+    assignment.rule_triggered = verdict.get("rule_triggered", False)
+    assignment.ai_details_json = json.dumps(_json_safe(verdict))
+    assignment.ai_evaluated_at = evaluated_at
+
 def evaluate_assignment(assignment: TestAssignment) -> Dict[str, Any]:
     if not assignment.test.has_ai_assistent:
         return {"skipped": True, "reason": "AI assistant not enabled for this test."}
     raw = extract_features_for_assignment(assignment)
     ctx = _contextual_filter(raw, assignment)
     verdict = get_verdict_for_assignment(assignment, features=ctx)
-    assignment.ai_cheating = verdict["cheating"]
-    assignment.ai_probability = 1.0 if verdict.get("rule_triggered") else verdict.get("probability")
-    assignment.rule_triggered = verdict.get("rule_triggered", False)
-    assignment.ai_details_json = json.dumps(_json_safe(verdict))
-    assignment.ai_evaluated_at = timezone.now()
-    assignment.save(update_fields=["ai_cheating", "ai_probability", "rule_triggered", "ai_details_json", "ai_evaluated_at"])
-    if HAVE_CELERY:
-        build_pdf_report_async.delay(assignment.id)
-    else:
-        build_pdf_report(assignment)
+    _apply_verdict(assignment, verdict, timezone.now())
+    assignment.ai_status = "report"
+    assignment.save(update_fields=VERDICT_FIELDS)
+    enqueue(build_pdf_report_job, dedup_key=f"pdf_report:{assignment.id}", assignment_id=assignment.id)
     return verdict
 
+def evaluate_assignments(assignments, *, build_reports: bool = True) -> int:
+    """Batch version of ``evaluate_assignment`` for a queryset or list.
+
+    Features are extracted per assignment, but every assignment that reaches
+    the model is scored in one ``predict_proba`` / SHAP call and the verdicts
+    are written with a single ``bulk_update``. Assignments of tests without
+    the AI assistant are skipped. Returns the number of assignments scored.
+    """
+    assignments = [a for a in assignments if a.test.has_ai_assistent]
+    if not assignments:
+        return 0
+    features_by_id = {
+        a.id: _contextual_filter(extract_features_for_assignment(a), a) for a in assignments
+    }
+    verdicts = get_verdicts_for_assignments(assignments, features_by_id)
+
+    now = timezone.now()
+    for assignment in assignments:
+        _apply_verdict(assignment, verdicts[assignment.id], now)
+        # without a rebuild the previous PDF stays in place
+        assignment.ai_status = "report" if build_reports else "ready"
+    TestAssignment.objects.bulk_update(assignments, VERDICT_FIELDS)
+
+    if build_reports:
+        for assignment in assignments:
+            enqueue(build_pdf_report_job, dedup_key=f"pdf_report:{assignment.id}", assignment_id=assignment.id)
+    return len(assignments)
+
 def apply_professor_verdict(assignment: TestAssignment, professor_verdict: bool, professor_user, override_comment: str | None = None) -> None:
     with transaction.atomic():
         original_ai = assignment.ai_cheating
@@ -91,17 +116,15 @@ def apply_professor_verdict(assignment: TestAssignment, professor_verdict: bool,
         if original_ai != professor_verdict and not assignment.rule_triggered:
             assignment.label = not professor_verdict
             assignment.save(update_fields=["label"])
-            if HAVE_CELERY:
-                retrain_model_async.delay()
-            else:
-                train_and_save_model()
+            # one queued retrain picks up every label changed before it starts
+            enqueue(train_and_save_model, priority=PRIORITY_LOW, dedup_key="retrain_model", lease_seconds=RETRAIN_LEASE_SECONDS)
 
 def build_pdf_report(assignment: TestAssignment) -> Path:
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.units import mm
     from reportlab.pdfgen import canvas as rl_canvas
 
-    model = load_model(MODEL_PATH)
+    bundle = get_bundle(MODEL_PATH)
     verdict = json.loads(assignment.ai_details_json or "{}")
     evidence = _gather_evidence_images(assignment)
     features = _contextual_filter(extract_features_for_assignment(assignment), assignment)
@@ -138,14 +161,13 @@ def build_pdf_report(assignment: TestAssignment) -> Path:
         if "switched tabs" in reason:
             features["tab_switches_count"] = 2
 
-    expected_features = model.get_booster().feature_names
+    expected_features = bundle.feature_names
     cleaned_features = {k: features.get(k, 0) for k in expected_features}
     X = pd.DataFrame([cleaned_features], columns=expected_features)
 
     X = X.apply(pd.to_numeric, errors="coerce").fillna(0).infer_objects(copy=False)
 
-    shap_explainer = shap.TreeExplainer(model)
-    shap_vals = shap_explainer.shap_values(X)
+    shap_vals = bundle.explainer.shap_values(X)
     if isinstance(shap_vals, list):
         shap_vals = shap_vals[1]
 
@@ -275,8 +297,34 @@ def build_pdf_report(assignment: TestAssignment) -> Path:
     return pdf_path
 
 
-if not HAVE_CELERY:
-    def build_pdf_report_async(assignment_id: int):  # type: ignore
-        build_pdf_report(TestAssignment.objects.get(id=assignment_id))
-    def retrain_model_async():  # type: ignore
-        train_and_save_model()
\ No newline at end of file
+def _mark_failed(assignment_id: int) -> None:
+    # also called by the job queue when the worker of the last attempt died
+    TestAssignment.objects.filter(id=assignment_id).update(ai_status="failed")
+
+
+def _mark_retrying(assignment_id: int, status: str) -> None:
+    # while a retry is pending the marks page should keep polling; the last failure goes through _mark_failed
+    if not final_attempt():
+        TestAssignment.objects.filter(id=assignment_id).update(ai_status=status)
+
+
+@on_failure(_mark_failed)
+def evaluate_assignment_job(assignment_id: int) -> None:
+    assignment = TestAssignment.objects.select_related("test", "student").get(id=assignment_id)
+    TestAssignment.objects.filter(id=assignment_id).update(ai_status="evaluating")
+    try:
+        if evaluate_assignment(assignment).get("skipped"):
+            TestAssignment.objects.filter(id=assignment_id).update(ai_status="none")
+    except Exception:
+        _mark_retrying(assignment_id, "queued")
+        raise
+
+
+@on_failure(_mark_failed)
+def build_pdf_report_job(assignment_id: int) -> None:
+    try:
+        build_pdf_report(TestAssignment.objects.select_related("test", "student").get(id=assignment_id))
+    except Exception:
+        _mark_retrying(assignment_id, "report")
+        raise
+    TestAssignment.objects.filter(id=assignment_id).update(ai_status="ready")
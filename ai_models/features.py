@@ -90,8 +90,12 @@ def extract_features_for_assignment(assignment: TestAssignment) -> Dict[str, Any
             attempt_no=assignment.attempt_no,
         ).first()
         if audio:
+            # cumulative over the whole attempt (users.proctoring.audio_session)
             voiced_seconds = audio.voiced_seconds or 0.0
-            voiced_ratio = audio.voiced_ratio or 0.0
+            if audio.total_seconds:
+                voiced_ratio = voiced_seconds / audio.total_seconds
+            else:
+                voiced_ratio = audio.voiced_ratio or 0.0
             speaking_too_much = int(duration_s >= 90 and voiced_ratio >= 0.5)
 
     total_events = camera_logs.count() + (analysis.total_focus_lost if analysis else 0)
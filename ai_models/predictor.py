@@ -1,13 +1,30 @@
 from __future__ import annotations
 import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+
 import joblib
+import numpy as np
 import pandas as pd
 import shap
 
 from ai_models.features import extract_features_for_assignment
 
 MODEL_PATH = "ai_models/model.pkl"
-_model_cache: dict[str, object] = {}
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Everything derived from one model.pkl, built once per file version."""
+    model: Any
+    feature_names: list[str]
+    explainer: shap.TreeExplainer
+    stamp: tuple[int, int]  # (mtime_ns, size) of the file it was loaded from; the version key
+
+
+_bundles: dict[str, ModelBundle] = {}
+_bundle_lock = threading.Lock()
 
 
 # --------------------------------------------------------------------- utils
@@ -20,31 +37,54 @@ def _flatten(fdict: dict) -> dict:
     return fdict
 
 
-def load_model(path: str | None = None):
+def _stamp(path: str) -> tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Model not found at {path}. "
+            "Train one via ai_models.trainer.train_and_save_model()."
+        ) from None
+    return st.st_mtime_ns, st.st_size
+
+
+def get_bundle(path: str | None = None) -> ModelBundle:
+    """Model, feature list and TreeExplainer for ``path``; reloaded when the file changes.
+
+    A ``stat`` per call is all a warm lookup costs. The explainer (which walks
+    every tree) is only rebuilt when the trainer has replaced the file since
+    the last load.
+    """
     path = path or MODEL_PATH
-    if path not in _model_cache:
-        if not os.path.exists(path):
-            raise FileNotFoundError(
-                f"Model not found at {path}. "
-                "Train one via ai_models.trainer.train_and_save_model()."
-            )
-        _model_cache[path] = joblib.load(path)
-    return _model_cache[path]
+    stamp = _stamp(path)
+    bundle = _bundles.get(path)
+    if bundle is not None and bundle.stamp == stamp:
+        return bundle
 
+    with _bundle_lock:
+        stamp = _stamp(path)
+        bundle = _bundles.get(path)
+        if bundle is not None and bundle.stamp == stamp:
+            return bundle
+        # stat before reading: if the file is replaced meanwhile, the next call sees a new stamp
+        model = joblib.load(path)
+        bundle = ModelBundle(
+            model=model,
+            feature_names=list(model.get_booster().feature_names),
+            explainer=shap.TreeExplainer(model),
+            stamp=stamp,
+        )
+        _bundles[path] = bundle
+    return bundle
 
-# ---------------------------------------------------------------- predictor
-def predict_assignment(
-    assignment,
-    *,
-    model_path: str | None = None,
-    features: dict | None = None,
-):
-    model = load_model(model_path)
 
-    # -------- feature extraction & flatten --------------
-    features_dict = _flatten(features or extract_features_for_assignment(assignment))
+def load_model(path: str | None = None):
+    return get_bundle(path).model
+
 
-    # -------- lightweight derived helpers --------------
+# ---------------------------------------------------------------- predictor
+def _add_helpers(features_dict: dict) -> dict:
+    """Lightweight derived helpers the model was trained with (in place)."""
     duration = features_dict.get("duration_seconds", 60.0)
 
     features_dict["mobile_detected_flag"] = int(
@@ -63,27 +103,73 @@ def predict_assignment(
         + features_dict.get("gaze_right_count", 0)
         + features_dict.get("gaze_down_count", 0)
     )
+    return features_dict
+
+
+def predict_features(feature_dicts: list[dict], *, model_path: str | None = None) -> list[dict]:
+    """Score many feature dicts at once: one matrix, one ``predict_proba``, one SHAP pass."""
+    if not feature_dicts:
+        return []
+    bundle = get_bundle(model_path)
 
     # -------- align with model input --------------------
-    expected = model.get_booster().feature_names
-    cleaned = {k: features_dict.get(k, 0) for k in expected}
-    X = pd.DataFrame([cleaned], columns=expected).fillna(0)
+    rows = [_add_helpers(_flatten(f)) for f in feature_dicts]
+    expected = bundle.feature_names
+    X = pd.DataFrame(
+        [[row.get(k, 0) for k in expected] for row in rows], columns=expected
+    ).fillna(0)
+
+    # -------- prediction --------------------------------
+    # positive class wins above 0.5, exactly what model.predict() would say
+    proba = bundle.model.predict_proba(X)[:, 1]
 
     # -------- SHAP explainability -----------------------
-    explainer = shap.TreeExplainer(model)
-    shap_vals = explainer.shap_values(X)[0]
-    top_factors = sorted(
-        zip(X.columns, shap_vals), key=lambda x: abs(x[1]), reverse=True
-    )[:5]
+    shap_vals = bundle.explainer.shap_values(X)
+    if isinstance(shap_vals, list):  # one matrix per class
+        shap_vals = shap_vals[1]
+    shap_vals = np.asarray(shap_vals)
+    top_idx = np.argsort(-np.abs(shap_vals), axis=1, kind="stable")[:, :5]
 
-    # -------- prediction --------------------------------
-    pred = model.predict(X)[0]
-    proba = model.predict_proba(X)[0][1]
-
-    return {
-        "cheating": bool(pred),
-        "probability": round(float(proba), 3),
-        "top_factors": [
-            {"feature": f, "shap_value": round(v, 4)} for f, v in top_factors
-        ],
-    }
+    return [
+        {
+            "cheating": bool(p > 0.5),
+            "probability": round(float(p), 3),
+            "top_factors": [
+                {"feature": expected[j], "shap_value": round(float(shap_vals[i, j]), 4)}
+                for j in top_idx[i]
+            ],
+        }
+        for i, p in enumerate(proba)
+    ]
+
+
+def predict_assignment(
+    assignment,
+    *,
+    model_path: str | None = None,
+    features: dict | None = None,
+):
+    features_dict = features or extract_features_for_assignment(assignment)
+    return predict_features([features_dict], model_path=model_path)[0]
+
+
+def predict_assignments(
+    assignments,
+    *,
+    model_path: str | None = None,
+    features_by_id: dict[int, dict] | None = None,
+) -> dict[int, dict]:
+    """``{assignment_id: prediction}`` for a queryset or list, scored in one batch.
+
+    Features are extracted for assignments missing from ``features_by_id``.
+    Nothing is written; ``evaluation_engine.evaluate_assignments`` applies the
+    rules on top and saves the verdicts.
+    """
+    features_by_id = dict(features_by_id or {})
+    ids = []
+    for assignment in assignments:
+        if assignment.id not in features_by_id:
+            features_by_id[assignment.id] = extract_features_for_assignment(assignment)
+        ids.append(assignment.id)
+    predictions = predict_features([features_by_id[i] for i in ids], model_path=model_path)
+    return dict(zip(ids, predictions))
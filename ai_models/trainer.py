@@ -148,8 +148,11 @@ def train_and_save_model() -> None:
     model.fit(X_tr, y_tr, eval_set=[(X_te, y_te)], verbose=False)
 
     # persist
+    # write next to it and swap in atomically; predictor.get_bundle() picks up the new mtime
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    tmp_path = f"{MODEL_PATH}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
 
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     bench_path = f"ai_models/model_versions/model_{ts}.pkl"
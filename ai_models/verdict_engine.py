@@ -1,4 +1,6 @@
-from ai_models.predictor import predict_assignment
+from collections import defaultdict
+
+from ai_models.predictor import predict_assignment, predict_assignments
 from ai_models.features import extract_features_for_assignment
 from users.models.tests import StudentActivityLog
 
@@ -56,23 +58,26 @@ def apply_rules(features, *, proctoring: bool = False) -> tuple[bool, str | None
     return False, None
 
 
-def get_verdict_for_assignment(assignment, features=None):
-    test = assignment.test
+UNSUPPORTED_VERDICT = {
+    "cheating": False,
+    "certainty": "unknown",
+    "reason": "Test does not support AI evaluation"
+}
 
-    if not (test.use_proctoring or test.has_ai_assistent or test.allow_sound_analysis):
-        return {
-            "cheating": False,
-            "certainty": "unknown",
-            "reason": "Test does not support AI evaluation"
-        }
 
-    features = features or extract_features_for_assignment(assignment)
-    features = _flatten(features)
+def _supports_ai(test) -> bool:
+    return test.use_proctoring or test.has_ai_assistent or test.allow_sound_analysis
 
+
+def _prepare(features):
+    features = _flatten(features)
     duration = features.get("duration_seconds", 600)
     if features.get("voiced_seconds", 0) < 0.5 * duration:
         features["voiced_seconds"] = 0
+    return features
 
+
+def _rule_verdict(test, features):
     cheating, reason = apply_rules(features, proctoring=test.use_proctoring)
     if cheating:
         return {
@@ -83,14 +88,10 @@ def get_verdict_for_assignment(assignment, features=None):
             "rule_reason": reason,
             "top_factors": []
         }
-    
-    logs = StudentActivityLog.objects.filter(
-    assignment=assignment,
-    attempt_no=assignment.attempt_no
-    ).values_list("event_type", flat=True)
+    return None
 
-    log_types = list(logs)
 
+def _clean_logs_verdict(log_types):
     only_face_match_or_no_logs = (
         len(log_types) == 0 or all(event == "face_match" for event in log_types)
     )
@@ -103,8 +104,10 @@ def get_verdict_for_assignment(assignment, features=None):
         "rule_triggered": False,
         "top_factors": [],
         }
+    return None
 
-    prediction = predict_assignment(assignment, features=features)
+
+def _model_verdict(prediction, features):
     proba = prediction["probability"]
 
     if prediction["cheating"] and features.get("voiced_seconds", 0) > 10:
@@ -149,4 +152,79 @@ def get_verdict_for_assignment(assignment, features=None):
         "probability": proba,
         "top_factors": prediction["top_factors"],
         "reason": "AI-based classification"
-    }
\ No newline at end of file
+    }
+
+
+def get_verdict_for_assignment(assignment, features=None):
+    test = assignment.test
+
+    if not _supports_ai(test):
+        return dict(UNSUPPORTED_VERDICT)
+
+    features = _prepare(features or extract_features_for_assignment(assignment))
+
+    verdict = _rule_verdict(test, features)
+    if verdict:
+        return verdict
+
+    logs = StudentActivityLog.objects.filter(
+    assignment=assignment,
+    attempt_no=assignment.attempt_no
+    ).values_list("event_type", flat=True)
+
+    verdict = _clean_logs_verdict(list(logs))
+    if verdict:
+        return verdict
+
+    prediction = predict_assignment(assignment, features=features)
+    return _model_verdict(prediction, features)
+
+
+def get_verdicts_for_assignments(assignments, features_by_id=None):
+    """``{assignment_id: verdict}``, same rules as ``get_verdict_for_assignment``.
+
+    Activity logs are read with one query and every assignment that reaches
+    the model is scored in a single ``predict_assignments`` batch.
+    """
+    features_by_id = features_by_id or {}
+    verdicts, pending = {}, {}
+    for assignment in assignments:
+        if not _supports_ai(assignment.test):
+            verdicts[assignment.id] = dict(UNSUPPORTED_VERDICT)
+            continue
+        features = _prepare(
+            features_by_id.get(assignment.id) or extract_features_for_assignment(assignment)
+        )
+        verdict = _rule_verdict(assignment.test, features)
+        if verdict:
+            verdicts[assignment.id] = verdict
+        else:
+            pending[assignment.id] = (assignment, features)
+
+    if pending:
+        log_types = defaultdict(list)
+        rows = (
+            StudentActivityLog.objects
+            .filter(assignment_id__in=pending.keys())
+            .values_list("assignment_id", "attempt_no", "event_type")
+        )
+        for assignment_id, attempt_no, event_type in rows.iterator():
+            if attempt_no == pending[assignment_id][0].attempt_no:
+                log_types[assignment_id].append(event_type)
+
+        to_score = {}
+        for assignment_id, (assignment, features) in pending.items():
+            verdict = _clean_logs_verdict(log_types[assignment_id])
+            if verdict:
+                verdicts[assignment_id] = verdict
+            else:
+                to_score[assignment_id] = (assignment, features)
+
+        predictions = predict_assignments(
+            [assignment for assignment, _ in to_score.values()],
+            features_by_id={i: features for i, (_, features) in to_score.items()},
+        )
+        for assignment_id, (_, features) in to_score.items():
+            verdicts[assignment_id] = _model_verdict(predictions[assignment_id], features)
+
+    return verdicts
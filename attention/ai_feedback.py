@@ -1,20 +1,76 @@
-import json, requests
-from decouple import config
-from .utils.rate_limit import rate_limited
+"""LLM feedback for lecture attention (Hugging Face text-generation API).
 
-HF_API_TOKEN = config("HF_API_TOKEN")
+Live tips never block a request: ``realtime_tip`` answers from a cache of tips
+keyed by the attention level rounded down to ``ATTENTION_TIP_BUCKET`` percent
+(shared between workers through the ``"attention"`` cache alias) and, when that
+bucket has fewer than ``ATTENTION_TIPS_PER_BUCKET`` tips, asks a small thread
+pool to generate another one in the background. Each lecture session may
+trigger at most one generation per ``ATTENTION_TIP_MIN_INTERVAL`` seconds;
+other sessions are not held back.
+
+All calls share one pooled ``requests.Session``. ``ATTENTION_LLM_BASE_URL``
+can point at a local fake server (``scripts/fake_llm_server.py``).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 HF_MODEL_REALTIME = "HuggingFaceH4/zephyr-7b-beta"
 HF_MODEL_REPORT   = "HuggingFaceH4/zephyr-7b-beta"
 
-HF_URL_REALTIME = f"https://api-inference.huggingface.co/models/{HF_MODEL_REALTIME}"
-HF_URL_REPORT   = f"https://api-inference.huggingface.co/models/{HF_MODEL_REPORT}"
-
 SYSTEM_PROMPT = (
     "You are an expert AI assistant that analyses student-attention timelines "
     "and returns 3–15 short, actionable tips as a JSON list of strings only."
 )
 
+# served while the first generated tip of a bucket is on its way
+FALLBACK_TIPS = (
+    (30, "Pause and ask the class a direct question to re-engage them."),
+    (60, "Switch to a short example or quick poll to lift engagement."),
+    (101, "Engagement is good – keep the current pace and interaction."),
+)
+
+_http: requests.Session | None = None
+_http_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=settings.ATTENTION_LLM_WORKERS, thread_name_prefix="attention-llm")
+
+
+def _session() -> requests.Session:
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.ATTENTION_LLM_WORKERS + 2,
+                    max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=None),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["Authorization"] = f"Bearer {settings.HF_API_TOKEN}"
+                _http = session
+    return _http
+
+
+def _generate(model: str, inputs: str, parameters: dict, read_timeout: float) -> str:
+    res = _session().post(
+        f"{settings.ATTENTION_LLM_BASE_URL.rstrip('/')}/{model}",
+        json={"inputs": inputs, "parameters": parameters},
+        timeout=(settings.ATTENTION_LLM_CONNECT_TIMEOUT, read_timeout),
+    )
+    res.raise_for_status()
+    return res.json()[0].get("generated_text", "").strip()
+
 
 def _timeline_lines(tl):
     return "\n".join(f"{i*5}s: {p['attention_pct']:.1f}%" for i, p in enumerate(tl))
@@ -59,21 +115,15 @@ def generate_ai_feedback(timeline, avg):
     )
 
     try:
-        res = requests.post(
-            HF_URL_REPORT,
-            headers={"Authorization": f"Bearer {HF_API_TOKEN}"},
-            json={"inputs": prompt, "parameters": {"max_new_tokens": 300}},
-            timeout=60,
-        )
-        res.raise_for_status()
-        raw = res.json()[0].get("generated_text", "").strip()
+        raw = _generate(HF_MODEL_REPORT, prompt, {"max_new_tokens": 300}, settings.ATTENTION_LLM_REPORT_TIMEOUT)
         tips = _extract_json(raw)
         return tips if tips else [f" Could not parse AI output:\n{raw}"]
     except Exception as e:
         return [f" AI feedback error: {e}"]
 
-@rate_limited(1.5)
+
 def generate_realtime_feedback(avg: float) -> str:
+    """One live tip for attention level ``avg``; raises on HTTP errors, returns "" if nothing usable came back."""
     prompt = (
         "You are helping a college professor monitor student engagement during a live lecture.\n"
         f"Current average student attention level: {avg:.1f}%.\n"
@@ -82,32 +132,73 @@ def generate_realtime_feedback(avg: float) -> str:
         "Avoid explanations. Output ONLY the tip, starting with 'TIP:'.\n"
         "TIP:"
     )
+    raw = _generate(
+        HF_MODEL_REALTIME,
+        prompt,
+        {
+            "max_new_tokens": 60,
+            "temperature": 0.75,
+            "do_sample": True,
+            "top_p": 0.9,
+            "stop": ["\n", "<end>"]
+        },
+        settings.ATTENTION_LLM_TIP_TIMEOUT,
+    )
+
+    if "TIP:" in raw:
+        tip = raw.split("TIP:", 1)[1].strip(" -•💡\"'\n")
+    else:
+        tip = next((l.strip(" -•💡\"'") for l in raw.splitlines() if l.strip()), "")
+    return " ".join(tip.split()[:25])
+
+
+def attention_bucket(avg: float) -> int:
+    step = settings.ATTENTION_TIP_BUCKET
+    return min(int(avg // step * step), 100)
+
+
+def _tips_key(bucket: int) -> str:
+    return f"attention:tips:{bucket}"
+
 
+def _fill_bucket(bucket: int) -> None:
+    cache = caches["attention"]
     try:
-        res = requests.post(
-            HF_URL_REALTIME,
-            headers={"Authorization": f"Bearer {HF_API_TOKEN}"},
-            json={
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": 60,
-                    "temperature": 0.75,
-                    "do_sample": True,
-                    "top_p": 0.9,
-                    "stop": ["\n", "<end>"]
-                },
-            },
-            timeout=30,
-        )
-        res.raise_for_status()
-        raw = res.json()[0].get("generated_text", "").strip()
-
-        if "TIP:" in raw:
-            tip = raw.split("TIP:", 1)[1].strip(" -•💡\"'\n")
+        # prompt with the middle of the bucket, so the tip fits every level that maps to it
+        tip = generate_realtime_feedback(min(bucket + settings.ATTENTION_TIP_BUCKET / 2, 100))
+        if tip:
+            tips = cache.get(_tips_key(bucket)) or []
+            if tip not in tips:
+                cache.set(_tips_key(bucket), (tips + [tip])[-settings.ATTENTION_TIPS_PER_BUCKET:], settings.ATTENTION_TIP_TTL)
+    except Exception as e:
+        print(f"[WARN] Live attention tip generation failed: {e}")
+    finally:
+        cache.delete(f"attention:tips-pending:{bucket}")
+
+
+def realtime_tip(session_id: str, avg: float) -> str:
+    """A tip for ``avg`` right away; tops up the bucket's cache in the background if needed."""
+    cache = caches["attention"]
+    bucket = attention_bucket(avg)
+    tips = cache.get(_tips_key(bucket)) or []
+
+    # add() is atomic: one generation per bucket at a time, and at most one per session per interval.
+    # The bucket lock comes first so a session only spends its slot on a generation that actually starts.
+    pending_key = f"attention:tips-pending:{bucket}"
+    if len(tips) < settings.ATTENTION_TIPS_PER_BUCKET and cache.add(pending_key, 1, settings.ATTENTION_LLM_TIP_TIMEOUT * 3):
+        if cache.add(f"attention:tips-rate:{session_id}", 1, settings.ATTENTION_TIP_MIN_INTERVAL):
+            _executor.submit(_fill_bucket, bucket)
         else:
-            tip = next((l.strip(" -•💡\"'") for l in raw.splitlines() if l.strip()), "")
+            cache.delete(pending_key)
 
-        tip = " ".join(tip.split()[:25])
-        return tip if tip else "( No usable tip extracted)"
-    except Exception as e:
-        return f"( AI error: {e})"
+    if not tips:
+        return next(tip for upper, tip in FALLBACK_TIPS if avg < upper)
+
+    # rotate through the bucket's tips so a session does not see the same one every poll
+    seen_key = f"attention:tips-seen:{session_id}"
+    cache.add(seen_key, 0, settings.ATTENTION_SESSION_TTL)
+    try:
+        seen = cache.incr(seen_key)
+    except ValueError:
+        seen = 0
+    return tips[seen % len(tips)]
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from attention.session_tracker import purge_expired
+
+class Command(BaseCommand):
+    help = "Drop live attention counters of sessions idle for longer than ATTENTION_SESSION_TTL"
+
+    def handle(self, *args, **options):
+        purged = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"✅ Purged {purged} stale attention entries."))
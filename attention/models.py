@@ -17,3 +17,19 @@ class AttentionReport(models.Model):
     pdf_file     = models.FileField(upload_to="attention_reports/", null=True, blank=True)
     def __str__(self):
         return f"Report {self.session_id} – {self.professor.user.full_name}"
+
+
+class AttentionBucket(models.Model):
+    """Attentive / total face counts of one 5 s slot of a live session (see session_tracker)."""
+    session_id= models.CharField(max_length=64)
+    bucket_ts= models.BigIntegerField()
+    attentive= models.PositiveIntegerField(default=0)
+    total= models.PositiveIntegerField(default=0)
+    updated_at= models.DateTimeField()
+
+    class Meta:
+        unique_together = ("session_id", "bucket_ts")
+        indexes = [models.Index(fields=["updated_at"])]
+
+    def __str__(self):
+        return f"{self.session_id} @ {self.bucket_ts}: {self.attentive}/{self.total}"
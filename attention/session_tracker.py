@@ -1,19 +1,222 @@
-from collections import defaultdict
+"""Per-lecture attention counters, bucketed into 5 s slots.
+
+Frames of one lecture land in whichever worker picks them up, so the counters
+live in a shared backend chosen by ``ATTENTION_STATS_BACKEND``:
+
+* ``"memory"`` – a dict in this process; only for tests and single-process dev;
+* ``"redis"``  – one hash per session, ``HINCRBY`` per bucket, expiring after
+  ``ATTENTION_SESSION_TTL`` seconds without frames;
+* ``"postgres"`` – ``AttentionBucket`` rows incremented with
+  ``INSERT ... ON CONFLICT DO UPDATE``.
+
+Every increment is atomic in the backend, so concurrent workers never lose
+counts. Sessions that never reach ``attention_end`` are dropped once they have
+been idle for the TTL (key expiry on Redis, a periodic sweep otherwise, or
+``manage.py purge_attention_stats``).
+
+``get_session_stats`` returns ``{bucket_ts: (attentive, total)}``.
+"""
+
+from __future__ import annotations
+
+import threading
 import time
+from datetime import timedelta
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+BUCKET_SECONDS = 5
+SWEEP_INTERVAL_SECONDS = 60
+
+Stats = Dict[int, Tuple[int, int]]
+
+
+def _bucket(now: float | None = None) -> int:
+    now = time.time() if now is None else now
+    return int(now // BUCKET_SECONDS * BUCKET_SECONDS)
+
+
+def _count(face_data_list: Iterable[dict]) -> Tuple[int, int]:
+    faces = list(face_data_list)
+    return sum(1 for face in faces if face.get("attentive")), len(faces)
+
+
+class MemoryStatsBackend:
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[int, list]] = {}
+        self._touched: Dict[str, float] = {}
+        self._swept_at = 0.0
+
+    def incr(self, session_id: str, bucket_ts: int, attentive: int, total: int) -> None:
+        now = time.time()
+        with self._lock:
+            counts = self._sessions.setdefault(session_id, {}).setdefault(bucket_ts, [0, 0])
+            counts[0] += attentive
+            counts[1] += total
+            self._touched[session_id] = now
+            if now - self._swept_at >= SWEEP_INTERVAL_SECONDS:
+                self._sweep(now)
+
+    def get(self, session_id: str) -> Stats:
+        with self._lock:
+            return {ts: tuple(counts) for ts, counts in self._sessions.get(session_id, {}).items()}
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._touched.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._sweep(time.time())
+
+    def _sweep(self, now: float) -> int:
+        self._swept_at = now
+        expired = [sid for sid, touched in self._touched.items() if now - touched > self.ttl]
+        for sid in expired:
+            self._sessions.pop(sid, None)
+            self._touched.pop(sid, None)
+        return len(expired)
+
+
+class RedisStatsBackend:
+    """Hash ``attention:stats:<session_id>`` with ``<ts>:a`` / ``<ts>:t`` fields."""
+
+    def __init__(self, ttl: int, url: str):
+        import redis
+
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"attention:stats:{session_id}"
+
+    def incr(self, session_id: str, bucket_ts: int, attentive: int, total: int) -> None:
+        key = self._key(session_id)
+        pipe = self.client.pipeline(transaction=True)
+        if attentive:
+            pipe.hincrby(key, f"{bucket_ts}:a", attentive)
+        pipe.hincrby(key, f"{bucket_ts}:t", total)
+        # every frame pushes the expiry out; idle sessions vanish on their own
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def get(self, session_id: str) -> Stats:
+        stats: Dict[int, list] = {}
+        for field, value in self.client.hgetall(self._key(session_id)).items():
+            ts, kind = field.decode().split(":")
+            stats.setdefault(int(ts), [0, 0])[0 if kind == "a" else 1] = int(value)
+        return {ts: tuple(counts) for ts, counts in stats.items()}
+
+    def clear(self, session_id: str) -> None:
+        self.client.delete(self._key(session_id))
+
+    def purge_expired(self) -> int:
+        return 0  # handled by key expiry
+
+
+class PostgresStatsBackend:
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+    @staticmethod
+    def _model():
+        from .models import AttentionBucket
+
+        return AttentionBucket
+
+    def incr(self, session_id: str, bucket_ts: int, attentive: int, total: int) -> None:
+        table = connection.ops.quote_name(self._model()._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (session_id, bucket_ts, attentive, total, updated_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (session_id, bucket_ts) DO UPDATE
+                SET attentive = {table}.attentive + EXCLUDED.attentive,
+                    total = {table}.total + EXCLUDED.total,
+                    updated_at = EXCLUDED.updated_at
+                """,
+                [session_id, bucket_ts, attentive, total, timezone.now()],
+            )
+        self._maybe_sweep()
+
+    def get(self, session_id: str) -> Stats:
+        rows = self._model().objects.filter(session_id=session_id).values_list("bucket_ts", "attentive", "total")
+        return {ts: (att, total) for ts, att, total in rows}
+
+    def clear(self, session_id: str) -> None:
+        self._model().objects.filter(session_id=session_id).delete()
+
+    def purge_expired(self) -> int:
+        from django.db.models import Max
+
+        AttentionBucket = self._model()
+        cutoff = timezone.now() - timedelta(seconds=self.ttl)
+        idle = (
+            AttentionBucket.objects.values("session_id")
+            .annotate(last_seen=Max("updated_at"))
+            .filter(last_seen__lt=cutoff)
+            .values("session_id")
+        )
+        deleted, _ = AttentionBucket.objects.filter(session_id__in=idle).delete()
+        return deleted
+
+    def _maybe_sweep(self) -> None:
+        # one sweep per process per interval is plenty; purge_attention_stats covers idle deployments
+        now = time.time()
+        with self._lock:
+            if now - self._swept_at < SWEEP_INTERVAL_SECONDS:
+                return
+            self._swept_at = now
+        self.purge_expired()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(settings.ATTENTION_STATS_BACKEND)
+    return _backend
+
+
+def _create_backend(name: str):
+    ttl = settings.ATTENTION_SESSION_TTL
+    if name == "memory":
+        return MemoryStatsBackend(ttl)
+    if name == "redis":
+        return RedisStatsBackend(ttl, settings.ATTENTION_STATS_REDIS_URL)
+    if name == "postgres":
+        return PostgresStatsBackend(ttl)
+    raise ValueError(f"Unknown ATTENTION_STATS_BACKEND {name!r}")
 
-SESSION_STATS = defaultdict(lambda: defaultdict(lambda: [0, 0]))
 
 def log_attention(session_id, face_data_list):
-    ts = int(time.time() // 5 * 5)
-    stats = SESSION_STATS[session_id][ts]
+    # frames without faces still open their bucket, so the timeline shows the gap as 0 %
+    attentive, total = _count(face_data_list)
+    get_backend().incr(session_id, _bucket(), attentive, total)
 
-    for face in face_data_list:
-        stats[1] += 1
-        if face.get("attentive"):
-            stats[0] += 1
 
-def get_session_stats(session_id):
-    return SESSION_STATS.get(session_id, {})
+def get_session_stats(session_id) -> Stats:
+    return get_backend().get(session_id)
+
 
 def clear_session(session_id):
-    SESSION_STATS.pop(session_id, None)
+    get_backend().clear(session_id)
+
+
+def purge_expired() -> int:
+    return get_backend().purge_expired()
@@ -0,0 +1,215 @@
+import threading
+import time
+
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from attention import ai_feedback
+from attention.views import NMS_IOU_THRESH, _nms
+from scripts.fake_llm_server import make_server
+
+LOCMEM = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": LOCMEM},
+        "attention": {"BACKEND": LOCMEM, "LOCATION": "attention-tests"},
+    },
+    ATTENTION_LLM_TIP_TIMEOUT=2,
+    ATTENTION_TIP_BUCKET=10,
+    ATTENTION_TIPS_PER_BUCKET=3,
+    ATTENTION_TIP_MIN_INTERVAL=60,
+)
+class RealtimeTipTests(SimpleTestCase):
+    """``realtime_tip`` against scripts/fake_llm_server.py running in-process."""
+
+    server_delay = 0.0
+    server_fail_every = 0
+
+    def setUp(self):
+        self.server = make_server(delay=self.server_delay, fail_every=self.server_fail_every, verbose=False)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        base_url = self.settings(ATTENTION_LLM_BASE_URL=self.server.url)
+        base_url.enable()
+        self.addCleanup(base_url.disable)
+        caches["attention"].clear()
+
+    def fallback(self, avg):
+        return next(tip for upper, tip in ai_feedback.FALLBACK_TIPS if avg < upper)
+
+    def cached_tips(self, bucket):
+        return caches["attention"].get(ai_feedback._tips_key(bucket)) or []
+
+    def wait_idle(self, bucket):
+        self.assertTrue(_wait_for(lambda: caches["attention"].get(f"attention:tips-pending:{bucket}") is None))
+
+
+class CachedTipTests(RealtimeTipTests):
+    def test_fallback_until_the_generated_tip_is_cached(self):
+        self.assertEqual(ai_feedback.realtime_tip("s1", 45.0), self.fallback(45.0))
+        self.wait_idle(40)
+
+        self.assertEqual(self.server.calls, 1)
+        tip = ai_feedback.realtime_tip("s1", 41.0)
+        self.assertTrue(tip.startswith("Fake live tip number 1"))
+        self.assertEqual(self.cached_tips(40), [tip])
+
+    def test_levels_in_one_bucket_share_the_cache(self):
+        ai_feedback.realtime_tip("s1", 45.0)
+        self.wait_idle(40)
+
+        ai_feedback.realtime_tip("s1", 49.9)
+        ai_feedback.realtime_tip("s1", 40.0)
+        self.assertEqual(self.server.calls, 1)
+
+    @override_settings(ATTENTION_TIPS_PER_BUCKET=1)
+    def test_full_bucket_is_not_topped_up(self):
+        ai_feedback.realtime_tip("s1", 75.0)
+        self.wait_idle(70)
+        ai_feedback.realtime_tip("s2", 75.0)
+        self.wait_idle(70)
+
+        self.assertEqual(self.server.calls, 1)
+
+
+class TipRateLimitTests(RealtimeTipTests):
+    def test_rate_limit_is_per_session(self):
+        ai_feedback.realtime_tip("s1", 45.0)
+        self.wait_idle(40)
+        ai_feedback.realtime_tip("s1", 45.0)
+        self.wait_idle(40)
+        self.assertEqual(self.server.calls, 1)
+
+        ai_feedback.realtime_tip("s2", 45.0)
+        self.wait_idle(40)
+        self.assertEqual(self.server.calls, 2)
+        self.assertEqual(len(self.cached_tips(40)), 2)
+
+
+class BusyBucketTests(RealtimeTipTests):
+    server_delay = 0.5
+
+    def test_busy_bucket_does_not_use_up_the_session_slot(self):
+        ai_feedback.realtime_tip("s1", 45.0)
+        ai_feedback.realtime_tip("s2", 45.0)  # s1's tip is still being generated
+        self.wait_idle(40)
+        self.assertEqual(self.server.calls, 1)
+
+        ai_feedback.realtime_tip("s2", 45.0)
+        self.wait_idle(40)
+        self.assertEqual(self.server.calls, 2)
+
+
+@override_settings(ATTENTION_LLM_TIP_TIMEOUT=0.2)
+class TipTimeoutTests(RealtimeTipTests):
+    server_delay = 1.0
+
+    def test_timeout_falls_back_and_releases_the_bucket(self):
+        started = time.monotonic()
+        self.assertEqual(ai_feedback.realtime_tip("s1", 20.0), self.fallback(20.0))
+        self.assertLess(time.monotonic() - started, 0.5)  # never waits for the model
+
+        self.wait_idle(20)
+        self.assertEqual(self.cached_tips(20), [])
+        self.assertEqual(ai_feedback.realtime_tip("s1", 20.0), self.fallback(20.0))
+
+
+class TipServerErrorTests(RealtimeTipTests):
+    server_fail_every = 1
+
+    def test_server_errors_fall_back(self):
+        self.assertEqual(ai_feedback.realtime_tip("s1", 95.0), self.fallback(95.0))
+        self.wait_idle(90)
+
+        self.assertGreaterEqual(self.server.calls, 1)
+        self.assertEqual(self.cached_tips(90), [])
+        self.assertEqual(ai_feedback.realtime_tip("s2", 95.0), self.fallback(95.0))
+
+
+# the pure-Python NMS attention_check used before, plus the majority vote the vectorized one adds
+def _iou_reference(boxA, boxB):
+    xA = max(boxA[0], boxB[0]); yA = max(boxA[1], boxB[1])
+    xB = min(boxA[2], boxB[2]); yB = min(boxA[3], boxB[3])
+    interW = max(0, xB - xA)
+    interH = max(0, yB - yA)
+    inter = interW * interH
+    if inter == 0:
+        return 0.0
+    areaA = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
+    areaB = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
+    return inter / (areaA + areaB - inter)
+
+
+def _nms_reference(boxes, atts, thr=NMS_IOU_THRESH):
+    if not boxes:
+        return [], []
+    idxs = sorted(range(len(boxes)), key=lambda i: (boxes[i][2]-boxes[i][0])*(boxes[i][3]-boxes[i][1]), reverse=True)
+    kept_boxes, kept_atts = [], []
+    while idxs:
+        cur = idxs.pop(0)
+        group = [cur] + [i for i in idxs if _iou_reference(boxes[cur], boxes[i]) >= thr]
+        idxs = [i for i in idxs if _iou_reference(boxes[cur], boxes[i]) < thr]
+        yes = sum(1 for i in group if atts[i])
+        kept_boxes.append(list(boxes[cur]))
+        kept_atts.append(atts[cur] if yes * 2 == len(group) else yes * 2 > len(group))
+    return kept_boxes, kept_atts
+
+
+class NmsTests(SimpleTestCase):
+    def assertSameAsReference(self, boxes, atts):
+        self.assertEqual(_nms(boxes, atts), _nms_reference(boxes, atts))
+
+    def test_empty_input(self):
+        self.assertEqual(_nms([], []), ([], []))
+
+    def test_single_box(self):
+        self.assertEqual(_nms([[10, 20, 50, 80]], [True]), ([[10, 20, 50, 80]], [True]))
+
+    def test_random_clusters(self):
+        rng = np.random.default_rng(19)
+        for _ in range(200):
+            n_faces = int(rng.integers(1, 10))
+            n_boxes = int(rng.integers(1, 80))
+            centers = rng.uniform(60, 600, size=(n_faces, 2))
+            sizes = rng.uniform(20, 110, size=n_faces)
+            face = rng.integers(0, n_faces, size=n_boxes)
+            cx, cy = (centers[face] + rng.normal(0, 8, size=(n_boxes, 2))).T
+            half = sizes[face] * rng.uniform(0.8, 1.2, size=n_boxes) / 2
+            boxes = np.stack([cx - half, cy - half, cx + half, cy + half], axis=1).round().astype(int)
+            atts = (rng.random(n_boxes) > 0.5).tolist()
+            self.assertSameAsReference(boxes.tolist(), atts)
+
+    def test_equal_areas_keep_input_order(self):
+        boxes = [[0, 0, 10, 10], [5, 0, 15, 10], [100, 100, 110, 110], [0, 5, 10, 15]]
+        self.assertSameAsReference(boxes, [False, True, True, False])
+
+    def test_duplicates_and_vote_ties(self):
+        boxes = [[0, 0, 40, 40]] * 4 + [[200, 200, 230, 230]] * 3
+        self.assertSameAsReference(boxes, [True, False, True, False, False, True, True])
+        self.assertSameAsReference(boxes, [False, True, False, True, True, False, False])
+
+    def test_iou_exactly_at_threshold_is_suppressed(self):
+        # inter 40 / union 100 = 0.4
+        boxes = [[0, 0, 10, 10], [0, 0, 10, 4]]
+        self.assertEqual(_iou_reference(*boxes), NMS_IOU_THRESH)
+        self.assertSameAsReference(boxes, [True, False])
+        self.assertEqual(len(_nms(boxes, [True, False])[0]), 1)
+
+    def test_non_overlapping_boxes_are_all_kept(self):
+        boxes = [[i * 50, 0, i * 50 + 40, 40] for i in range(6)]
+        atts = [bool(i % 2) for i in range(6)]
+        self.assertEqual(_nms(boxes, atts), (boxes, atts))
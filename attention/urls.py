@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from .views import attention_check, attention_end, attention_feedback
+from .views import attention_check, attention_check_async, attention_end, attention_feedback
 
 urlpatterns = [
-    path("check/", attention_check),
+    path("check/", attention_check_async if settings.PROCTORING_ASYNC_VIEWS else attention_check),
     path("end/", attention_end), 
     path("feedback/", attention_feedback),
 ]
@@ -4,35 +4,31 @@ from django.http import JsonResponse
 import cv2
 import numpy as np
 import base64
-import mediapipe as mp
+import json
+from asgiref.sync import sync_to_async
 from .utils.pdf_report import render_attention_pdf
 from .session_tracker import log_attention, get_session_stats, clear_session
-from .ai_feedback import generate_ai_feedback, generate_realtime_feedback
+from .ai_feedback import generate_ai_feedback, realtime_tip
 from .models import AttentionReport
+from users.proctoring import process_pool
+from users.proctoring.async_auth import async_jwt_post
+from users.proctoring.frames import Frame
+from users.proctoring.model_registry import get_pool
 from django.conf import settings
 from django.core.files import File
 from pathlib import Path
-from threading import Thread
-import contextlib, os, sys
+from users.jobs import PRIORITY_HIGH, enqueue
+from django.contrib.auth import get_user_model
 
-
-mp_face = mp.solutions.face_detection
-MODEL_SELECTION = 1        
-MIN_CONF        = 0.2
-SCALES          = (1.0, 2.0, 3.0)
-NMS_IOU_THRESH  = 0.4       #If two boxes overlap >= 40 %, keep the biggest, drop the rest
+User = get_user_model()
 
 
-@contextlib.contextmanager
-def _suppress_mediapipe_logs():
-    devnull = open(os.devnull, 'w')
-    old = os.dup(2)
-    os.dup2(devnull.fileno(), 2)
-    try:
-        yield
-    finally:
-        os.dup2(old, 2)
-        devnull.close()
+# model selection / min confidence: ATTENTION_FACE_* settings
+TILE_GRIDS      = (1, 2)     #whole frame, then 2x2 overlapping tiles for small / distant faces
+TILE_OVERLAP    = 0.2        #so a face on a tile border is whole in at least one tile
+SMALL_FACE_FRAC = 0.1        #the tiled pass only runs if the full frame found no face or one narrower than this
+TILE_EDGE_PX    = 2          #tile detections this close to an inner tile edge are fragments of a cut face
+NMS_IOU_THRESH  = 0.4       #If two boxes overlap >= 40 %, keep the biggest, drop the rest
 
 
 def _apply_clahe(rgb):
@@ -53,65 +49,112 @@ def _adjust_gamma(rgb, gamma):
     return cv2.LUT(rgb, lut.astype("uint8"))
 
 
-def _enhance_if_dark(rgb):
-    if np.mean(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)) < 80:
-        rgb = _apply_clahe(rgb)
-        rgb = _adjust_gamma(rgb, 1.5)
-    return rgb
+def _enhance_if_dark(frame):
+    """Detector-resolution RGB of ``frame``, brightened when the scene is dark."""
+    def enhance():
+        rgb, _ = frame.for_detector("face_detection")
+        gray, _ = frame.for_detector("face_detection", "gray")
+        if np.mean(gray) < 80:
+            rgb = _apply_clahe(rgb)
+            rgb = _adjust_gamma(rgb, 1.5)
+        return rgb
+    return frame.memo("attention_enhanced", enhance)
 
 
-def _is_looking_forward(det):
+def _is_looking_forward(det, tile_w, img_w):
     try:
         kps = det.location_data.relative_keypoints
         right_eye, left_eye, nose = kps[0], kps[1], kps[2]
         eye_cx = (right_eye.x + left_eye.x) / 2.0
-        return abs(nose.x - eye_cx) < 0.02  #2 percent -- can be improved
+        # keypoints are relative to the tile; the threshold is relative to the whole frame
+        return abs(nose.x - eye_cx) * tile_w / img_w < 0.02  #2 percent -- can be improved
     except Exception:
         return False
 
 
-def _iou(boxA, boxB):
-    xA = max(boxA[0], boxB[0]); yA = max(boxA[1], boxB[1])
-    xB = min(boxA[2], boxB[2]); yB = min(boxA[3], boxB[3])
-    interW = max(0, xB - xA)
-    interH = max(0, yB - yA)
-    inter = interW * interH
-    if inter == 0:
-        return 0.0
-    areaA = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
-    areaB = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
-    return inter / (areaA + areaB - inter)
+def _tiles(img_h, img_w, grid):
+    """``grid`` x ``grid`` overlapping (x0, y0, x1, y1) tiles covering the image."""
+    if grid == 1:
+        return [(0, 0, img_w, img_h)]
+    tw = min(img_w, int(img_w / grid * (1 + TILE_OVERLAP)))
+    th = min(img_h, int(img_h / grid * (1 + TILE_OVERLAP)))
+    xs = np.linspace(0, img_w - tw, grid).astype(int)
+    ys = np.linspace(0, img_h - th, grid).astype(int)
+    return [(x, y, x + tw, y + th) for y in ys for x in xs]
 
 
 def _nms(boxes, atts, thr=NMS_IOU_THRESH):
-    if not boxes:
+    """Greedy NMS, biggest box first; each kept face takes the majority ``attentive`` vote of the boxes it absorbed.
+
+    One (N, N) IoU matrix up front, then one vectorized step per kept box.
+    """
+    if len(boxes) == 0:
         return [], []
-    idxs = sorted(range(len(boxes)), key=lambda i: (boxes[i][2]-boxes[i][0])*(boxes[i][3]-boxes[i][1]), reverse=True)
-    keep = []
-    while idxs:
-        cur = idxs.pop(0)
-        keep.append(cur)
-        idxs = [i for i in idxs if _iou(boxes[cur], boxes[i]) < thr]
-    return [boxes[i] for i in keep], [atts[i] for i in keep]
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    a = np.asarray(atts, dtype=bool)
+    areas = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    order = np.argsort(-areas, kind="stable")  # same tie order as sorted(..., reverse=True)
+    b, a, areas = b[order], a[order], areas[order]
 
+    iw = np.clip(np.minimum(b[:, None, 2], b[None, :, 2]) - np.maximum(b[:, None, 0], b[None, :, 0]), 0, None)
+    ih = np.clip(np.minimum(b[:, None, 3], b[None, :, 3]) - np.maximum(b[:, None, 1], b[None, :, 1]), 0, None)
+    inter = iw * ih
+    union = areas[:, None] + areas[None, :] - inter
+    iou = np.divide(inter, union, out=np.zeros_like(inter), where=inter > 0)
 
-def _detect_faces(rgb, h, w):
-    boxes, atts = [], []
-    for scale in SCALES:
-        img = rgb if scale == 1.0 else cv2.resize(rgb, None, fx=scale, fy=scale)
-        with _suppress_mediapipe_logs():
-            det_obj = mp_face.FaceDetection(model_selection=MODEL_SELECTION, min_detection_confidence=MIN_CONF)
-            res = det_obj.process(img)
-            det_obj.close()
-        if not res.detections:
+    alive = np.ones(len(b), dtype=bool)
+    kept_boxes, kept_atts = [], []
+    for i in range(len(b)):
+        if not alive[i]:
+            continue
+        group = alive & (iou[i] >= thr)
+        group[i] = True
+        alive &= ~group
+        votes = a[group].mean()
+        kept_boxes.append([int(v) for v in b[i]])
+        kept_atts.append(bool(a[i]) if votes == 0.5 else bool(votes > 0.5))
+    return kept_boxes, kept_atts
+
+
+def _tile_detections(detector, rgb, tile):
+    """(x1, y1, x2, y2, attentive) in ``rgb`` pixels for one tile, without faces cut by an inner tile edge."""
+    x0, y0, x1, y1 = tile
+    img_h, img_w = rgb.shape[:2]
+    whole = tile == (0, 0, img_w, img_h)
+    res = detector.process(rgb if whole else np.ascontiguousarray(rgb[y0:y1, x0:x1]))
+    tw, th = x1 - x0, y1 - y0
+    found = []
+    for det in res.detections or ():
+        bbox = det.location_data.relative_bounding_box
+        bx1 = x0 + bbox.xmin * tw; by1 = y0 + bbox.ymin * th
+        bx2 = x0 + (bbox.xmin + bbox.width) * tw; by2 = y0 + (bbox.ymin + bbox.height) * th
+        # the rest of that face is in the neighbouring tile, which (thanks to the overlap) sees it whole
+        if ((x0 > 0 and bx1 <= x0 + TILE_EDGE_PX) or (x1 < img_w and bx2 >= x1 - TILE_EDGE_PX)
+                or (y0 > 0 and by1 <= y0 + TILE_EDGE_PX) or (y1 < img_h and by2 >= y1 - TILE_EDGE_PX)):
             continue
-        for det in res.detections:
-            bbox = det.location_data.relative_bounding_box
-            x1 = int(bbox.xmin * w); y1 = int(bbox.ymin * h)
-            x2 = int((bbox.xmin + bbox.width) * w)
-            y2 = int((bbox.ymin + bbox.height) * h)
-            boxes.append([max(x1,0), max(y1,0), min(x2,w-1), min(y2,h-1)])
-            atts.append(_is_looking_forward(det))
+        found.append((bx1, by1, bx2, by2, _is_looking_forward(det, tw, img_w)))
+    return found
+
+
+def _detect_faces(frame):
+    # relative boxes are resolution independent: map them onto the original frame
+    h, w = frame.shape[:2]
+    rgb = _enhance_if_dark(frame)
+    img_h, img_w = rgb.shape[:2]
+    sx, sy = w / img_w, h / img_h
+    # MediaPipe resizes every input to its fixed model size, so upsampling the whole
+    # frame finds nothing new; smaller tiles give small faces more model pixels.
+    with get_pool("face_detection").checkout() as detector:
+        found = _tile_detections(detector, rgb, (0, 0, img_w, img_h))
+        if not found or any(x2 - x1 < SMALL_FACE_FRAC * img_w for x1, _, x2, _, _ in found):
+            for grid in TILE_GRIDS[1:]:
+                for tile in _tiles(img_h, img_w, grid):
+                    found += _tile_detections(detector, rgb, tile)
+
+    boxes, atts = [], []
+    for bx1, by1, bx2, by2, att in found:
+        boxes.append([max(int(bx1 * sx), 0), max(int(by1 * sy), 0), min(int(bx2 * sx), w - 1), min(int(by2 * sy), h - 1)])
+        atts.append(att)
 
     boxes, atts = _nms(boxes, atts)
 
@@ -127,6 +170,19 @@ def _detect_faces(rgb, h, w):
     return faces
 
 
+def _decode_frame_b64(frame_b64):
+    _, enc = frame_b64.split(";base64,")
+    return base64.b64decode(enc)
+
+
+def analyze_attention_frame(image_bytes):
+    """Decode + detect faces; ``None`` for an undecodable image. Runs on the process pool in the async view."""
+    frame = Frame.decode(image_bytes)
+    if frame is None:
+        return None
+    return _detect_faces(frame)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def attention_check(request):
@@ -134,24 +190,53 @@ def attention_check(request):
     if not frame_b64 or not session_id:
         return JsonResponse({"error": "Missing data"}, status=400)
     try:
-        _, enc = frame_b64.split(";base64,")
-        img = cv2.imdecode(np.frombuffer(base64.b64decode(enc), np.uint8), cv2.IMREAD_COLOR)
+        image_bytes = _decode_frame_b64(frame_b64)
     except Exception:
         return JsonResponse({"error": "Bad image data"}, status=400)
-    if img is None:
+
+    faces = analyze_attention_frame(image_bytes)
+    if faces is None:
         return JsonResponse({"error": "Invalid image"}, status=400)
+    log_attention(session_id, faces)
+    return JsonResponse({"faces": faces})
 
-    h, w = img.shape[:2]
-    rgb = _enhance_if_dark(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
 
-    faces = _detect_faces(rgb, h, w)
-    log_attention(session_id, faces)
+@async_jwt_post
+async def attention_check_async(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    frame_b64 = data.get("frame"); session_id = data.get("session_id")
+    if not frame_b64 or not session_id:
+        return JsonResponse({"error": "Missing data"}, status=400)
+    try:
+        image_bytes = _decode_frame_b64(frame_b64)
+    except Exception:
+        return JsonResponse({"error": "Bad image data"}, status=400)
+
+    try:
+        faces = await check_attention_frame(session_id, image_bytes)
+    except Exception as e:
+        print(f"[ERROR] Failed to analyze attention frame: {e}")
+        return JsonResponse({"error": "Attention analysis failed"}, status=200)
+    if faces is None:
+        return JsonResponse({"error": "Invalid image"}, status=400)
     return JsonResponse({"faces": faces})
 
 
-def _bg_generate_report(session_id, user):
+async def check_attention_frame(session_id, image_bytes):
+    """Detect faces on the process pool and log them; shared with the lecture WebSocket."""
+    faces = await process_pool.run(analyze_attention_frame, image_bytes)
+    if faces is not None:
+        await sync_to_async(log_attention)(session_id, faces)
+    return faces
+
+
+def _bg_generate_report(session_id, user_id):
+    user = User.objects.select_related("professor_profile").get(id=user_id)
     professor = user.professor_profile
-    raw = get_session_stats(session_id); clear_session(session_id)
+    raw = get_session_stats(session_id)
     timeline, ratios = [], []
     att_sum = 0
     total_sum = 0
@@ -173,6 +258,8 @@ def _bg_generate_report(session_id, user):
     rep,_ = AttentionReport.objects.get_or_create(session_id=session_id, defaults={"professor": professor,"created_by": user,"avg_attention": avg,"raw_timeline": timeline,"advice": advice})
     if not rep.pdf_file:
         with open(pdf_abs,"rb") as fh: rep.pdf_file.save(pdf_rel.name, File(fh), save=True)
+    # only once the report exists, so a retried job still sees the counters
+    clear_session(session_id)
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -180,7 +267,7 @@ def attention_end(request):
     sid = request.data.get("session_id"); user = request.user
     if AttentionReport.objects.filter(session_id=sid).exists():
         return JsonResponse({"detail": "Report already generated."})
-    Thread(target=_bg_generate_report, args=(sid, user), daemon=True).start()
+    enqueue(_bg_generate_report, priority=PRIORITY_HIGH, dedup_key=f"attention_report:{sid}", session_id=sid, user_id=user.id)
     return JsonResponse({"detail": "Session received, report is processing."})
 
 @api_view(["POST"])
@@ -194,5 +281,5 @@ def attention_feedback(request):
         return JsonResponse({"tip": "Not enough data yet."})
     ratios = [att/total for att,total in stats.values() if total]
     avg = round(np.mean(ratios)*100,1) if ratios else 0.0
-    tip = generate_realtime_feedback(avg)
+    tip = realtime_tip(sid, avg)
     return JsonResponse({"attention_avg": avg, "tip": tip})
@@ -0,0 +1,12 @@
+from users.proctoring.websocket import FrameSocket
+from .views import check_attention_frame
+
+
+class LectureFrameSocket(FrameSocket):
+    """``/ws/attention/<session_id>/`` – attention check for one lecture session."""
+
+    async def on_frame(self, frame):
+        faces = await check_attention_frame(self.route_kwargs["session_id"], frame)
+        if faces is None:
+            return {"error": "Invalid image"}
+        return {"faces": faces}
@@ -2,15 +2,42 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections are dispatched to the frame
+streaming handlers in ``WEBSOCKET_ROUTES``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
 import os
+import re
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after Django is set up
+from attention.websocket import LectureFrameSocket  # noqa: E402
+from users.proctoring.websocket import ExamFrameSocket  # noqa: E402
+
+WEBSOCKET_ROUTES = [
+    (re.compile(r"^/ws/proctoring/exam/(?P<assignment_id>\d+)/$"), ExamFrameSocket),
+    (re.compile(r"^/ws/attention/(?P<session_id>[\w-]+)/$"), LectureFrameSocket),
+]
+
+
+async def websocket_application(scope, receive, send):
+    for pattern, handler in WEBSOCKET_ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            return await handler(scope, receive, send, **match.groupdict())()
+    await receive()  # websocket.connect
+    await send({"type": "websocket.close", "code": 4404})
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -236,4 +236,115 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173"
 ]
 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# Proctoring models
+# PROCTORING_INFERENCE_SOCKET empty -> every worker loads its own pool in-process;
+# set it to a unix socket path (see `manage.py run_inference_server`) to share one copy.
+PROCTORING_YOLO_WEIGHTS = config("PROCTORING_YOLO_WEIGHTS", default="yolov8m.pt")
+PROCTORING_MODEL_POOL_SIZE = config("PROCTORING_MODEL_POOL_SIZE", default=2, cast=int)
+PROCTORING_INFERENCE_SOCKET = config("PROCTORING_INFERENCE_SOCKET", default="")
+PROCTORING_INFERENCE_AUTHKEY = config("PROCTORING_INFERENCE_AUTHKEY", default=SECRET_KEY)
+# YOLO micro-batching across concurrent live_face_check requests (size 1 disables it)
+PROCTORING_BATCH_MAX_SIZE = config("PROCTORING_BATCH_MAX_SIZE", default=8, cast=int)
+PROCTORING_BATCH_MAX_WAIT_MS = config("PROCTORING_BATCH_MAX_WAIT_MS", default=10, cast=float)
+
+# Proctoring debounce / mouth state (users.proctoring.state_store).
+# Local LRU per process by default, which is only correct with one web worker; point
+# PROCTORING_REDIS_URL at Redis to share it between workers. WEB_CONCURRENCY is the
+# gunicorn worker count, used to warn about LocMem with several workers (users.checks).
+PROCTORING_REDIS_URL = config("PROCTORING_REDIS_URL", default="")
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=1, cast=int)
+# Live attention tips (attention.ai_feedback) get their own alias so they never evict proctoring state
+ATTENTION_CACHE_REDIS_URL = config("ATTENTION_CACHE_REDIS_URL", default=PROCTORING_REDIS_URL)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "proctoring": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": PROCTORING_REDIS_URL,
+    } if PROCTORING_REDIS_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "proctoring-state",
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+    "attention": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": ATTENTION_CACHE_REDIS_URL,
+        "KEY_PREFIX": "attention",
+    } if ATTENTION_CACHE_REDIS_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "attention-tips",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Evidence frames saved for flagged proctoring events (users.proctoring.evidence)
+PROCTORING_EVIDENCE_DIR = config("PROCTORING_EVIDENCE_DIR", default=str(BASE_DIR / "frame_logs"))
+PROCTORING_EVIDENCE_JPEG_QUALITY = config("PROCTORING_EVIDENCE_JPEG_QUALITY", default=80, cast=int)
+PROCTORING_EVIDENCE_QUEUE_SIZE = config("PROCTORING_EVIDENCE_QUEUE_SIZE", default=256, cast=int)
+
+# Audio proctoring: WebM chunks are decoded in-process with PyAV when it is installed,
+# otherwise through an ffmpeg pipe (AUDIO_DECODER="ffmpeg" forces the pipe).
+FFMPEG_PATH = config("FFMPEG_PATH", default="ffmpeg")
+AUDIO_DECODER = config("AUDIO_DECODER", default="auto")
+AUDIO_DEBUG_DUMP = config("AUDIO_DEBUG_DUMP", default=False, cast=bool)
+# Cumulative per-attempt audio stats are flushed to AudioAnalysis at most this often (seconds);
+# without PROCTORING_REDIS_URL every chunk is flushed, since other workers cannot see the counters
+AUDIO_PERSIST_INTERVAL = config("AUDIO_PERSIST_INTERVAL", default=5, cast=float)
+
+# Async proctoring views (live face / audio / attention checks). Inference runs on a
+# spawned process pool with warm models. Only enable when serving backend.asgi: under
+# WSGI every web worker would start its own pool with its own copy of every model.
+PROCTORING_ASYNC_VIEWS = config("PROCTORING_ASYNC_VIEWS", default=False, cast=bool)
+PROCTORING_PROCESS_WORKERS = config("PROCTORING_PROCESS_WORKERS", default=2, cast=int)
+PROCTORING_PROCESS_MAX_PENDING = config("PROCTORING_PROCESS_MAX_PENDING", default=32, cast=int)
+
+# Live face check sampling profiles (users.proctoring.cascade). Without motion the face/gaze
+# result is reused for up to full_every frames and YOLO runs every phone_every frames.
+PROCTORING_SAMPLING = {
+    "strict": {"phone_every": 2, "full_every": 2, "motion_threshold": 4.0},
+    "standard": {"phone_every": 3, "full_every": 4, "motion_threshold": 6.0},
+    "light": {"phone_every": 6, "full_every": 8, "motion_threshold": 8.0},
+}
+
+# Longest side (px) each vision detector runs at (users.proctoring.frames); larger frames are downscaled
+PROCTORING_DETECTOR_MAX_SIDE = {
+    "yolo": 640,
+    "face_mesh": 640,
+    "hog": 640,
+    "face_detection": 1280,
+}
+
+# MediaPipe face detector for lecture attention checks (pooled in users.proctoring.model_registry)
+ATTENTION_FACE_MODEL_SELECTION = config("ATTENTION_FACE_MODEL_SELECTION", default=1, cast=int)
+ATTENTION_FACE_MIN_CONF = config("ATTENTION_FACE_MIN_CONF", default=0.2, cast=float)
+
+# Live attention counters (attention.session_tracker): "memory" (tests / single process),
+# "redis" or "postgres". Sessions idle for ATTENTION_SESSION_TTL seconds are discarded.
+ATTENTION_STATS_BACKEND = config("ATTENTION_STATS_BACKEND", default="redis" if PROCTORING_REDIS_URL else "postgres")
+ATTENTION_STATS_REDIS_URL = config("ATTENTION_STATS_REDIS_URL", default=PROCTORING_REDIS_URL)
+ATTENTION_SESSION_TTL = config("ATTENTION_SESSION_TTL", default=6 * 60 * 60, cast=int)
+
+# LLM tips for lectures (attention.ai_feedback). Point ATTENTION_LLM_BASE_URL at
+# scripts/fake_llm_server.py to run without the Hugging Face API.
+HF_API_TOKEN = config("HF_API_TOKEN", default="")
+ATTENTION_LLM_BASE_URL = config("ATTENTION_LLM_BASE_URL", default="https://api-inference.huggingface.co/models")
+ATTENTION_LLM_WORKERS = config("ATTENTION_LLM_WORKERS", default=2, cast=int)
+ATTENTION_LLM_CONNECT_TIMEOUT = config("ATTENTION_LLM_CONNECT_TIMEOUT", default=3.05, cast=float)
+ATTENTION_LLM_TIP_TIMEOUT = config("ATTENTION_LLM_TIP_TIMEOUT", default=30, cast=float)
+ATTENTION_LLM_REPORT_TIMEOUT = config("ATTENTION_LLM_REPORT_TIMEOUT", default=60, cast=float)
+# Live tips are cached per ATTENTION_TIP_BUCKET-percent attention band; one generation per session per interval
+ATTENTION_TIP_BUCKET = config("ATTENTION_TIP_BUCKET", default=10, cast=int)
+ATTENTION_TIPS_PER_BUCKET = config("ATTENTION_TIPS_PER_BUCKET", default=3, cast=int)
+ATTENTION_TIP_TTL = config("ATTENTION_TIP_TTL", default=30 * 60, cast=int)
+ATTENTION_TIP_MIN_INTERVAL = config("ATTENTION_TIP_MIN_INTERVAL", default=30, cast=int)
+
+# Background jobs (users.jobs, run with `manage.py run_jobs`). JOB_LEASE_SECONDS is the default
+# time a job may run before it is presumed dead and re-queued; long jobs (model retraining) set
+# their own lease_seconds. Failed jobs are retried after JOB_RETRY_DELAY * 2**n seconds.
+JOB_POLL_INTERVAL = config("JOB_POLL_INTERVAL", default=1.0, cast=float)
+JOB_RETRY_DELAY = config("JOB_RETRY_DELAY", default=30, cast=int)
+JOB_LEASE_SECONDS = config("JOB_LEASE_SECONDS", default=10 * 60, cast=int)
+JOB_KEEP_FINISHED_DAYS = config("JOB_KEEP_FINISHED_DAYS", default=7, cast=int)
@@ -0,0 +1,78 @@
+// Persistent binary WebSocket for webcam frames (see users/proctoring/websocket.py).
+// Authenticates once on open, then sends raw JPEG blobs; verdicts come back as JSON.
+
+const RECONNECT_MIN_MS = 1000;
+const RECONNECT_MAX_MS = 15000;
+
+export function socketUrl(path) {
+  const apiUrl = import.meta.env.VITE_API_URL || "https://localhost:8000/api/";
+  const base = apiUrl.replace(/\/+api\/?$/, "").replace(/^http/, "ws");
+  return `${base}${path.startsWith("/") ? path : `/${path}`}`;
+}
+
+export function openFrameSocket(path, { onVerdict, authExtra = {} } = {}) {
+  let ws = null;
+  let ready = false;
+  let closed = false;
+  let retryMs = RECONNECT_MIN_MS;
+  let retryTimer = null;
+
+  const connect = () => {
+    ws = new WebSocket(socketUrl(path));
+    ws.binaryType = "arraybuffer";
+
+    ws.onopen = () => {
+      ws.send(JSON.stringify({
+        type: "auth",
+        token: localStorage.getItem("accessToken"),
+        ...authExtra,
+      }));
+    };
+
+    ws.onmessage = (event) => {
+      let msg;
+      try {
+        msg = JSON.parse(event.data);
+      } catch {
+        return;
+      }
+      if (msg.type === "ready") {
+        ready = true;
+        retryMs = RECONNECT_MIN_MS;
+      } else if (msg.type === "verdict" && onVerdict) {
+        onVerdict(msg);
+      }
+    };
+
+    ws.onclose = (event) => {
+      ready = false;
+      // 4401/4403: bad token or not our assignment – retrying will not help
+      if (closed || event.code === 4401 || event.code === 4403) return;
+      retryTimer = setTimeout(connect, retryMs);
+      retryMs = Math.min(retryMs * 2, RECONNECT_MAX_MS);
+    };
+  };
+
+  connect();
+
+  return {
+    isReady: () => ready,
+    sendFrame: (blob) => {
+      if (!ready) return false;
+      ws.send(blob);
+      return true;
+    },
+    sendMessage: (payload) => {
+      if (ready) ws.send(JSON.stringify(payload));
+    },
+    close: () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (ws) ws.close();
+    },
+  };
+}
+
+export function canvasToJpeg(canvas, quality = 0.8) {
+  return new Promise((resolve) => canvas.toBlob(resolve, "image/jpeg", quality));
+}
@@ -1,5 +1,6 @@
 import { useEffect, useRef, useState } from "react";
 import axios from "../../../api/axios";
+import { canvasToJpeg, openFrameSocket } from "../../../api/frameSocket";
 import { useNavigate, useSearchParams } from "react-router-dom";
 import "./AttentionLiveView.css";
 
@@ -8,6 +9,7 @@ export default function AttentionLiveView() {
   const canvasRef = useRef(null);
   const intervalRef = useRef(null);
   const feedbackIntervalRef = useRef(null); // 🆕 ref for feedback polling
+  const socketRef = useRef(null);
   const [searchParams] = useSearchParams();
   const sessionId = searchParams.get("session");
   const navigate = useNavigate();
@@ -25,6 +27,13 @@ export default function AttentionLiveView() {
       })
       .catch(err => alert("Camera error: " + err.message));
 
+    // frames go over one binary socket for the whole session; boxes come back on it
+    socketRef.current = openFrameSocket(`/ws/attention/${sessionId}/`, {
+      onVerdict: (verdict) => {
+        if (verdict.faces) drawFaces(verdict.faces);
+      },
+    });
+
     // frame capture every 5 s (existing behaviour)
     intervalRef.current = setInterval(() => captureAndSendFrame(), 5000);
     // feedback polling every 30 s (new)
@@ -33,6 +42,7 @@ export default function AttentionLiveView() {
     return () => {
       clearInterval(intervalRef.current);
       clearInterval(feedbackIntervalRef.current);
+      socketRef.current?.close();
       if (streamRef) {
         streamRef.getTracks().forEach(track => track.stop());
       }
@@ -48,18 +58,30 @@ export default function AttentionLiveView() {
     canvas.height = video.videoHeight;
     canvas.getContext("2d").drawImage(video, 0, 0);
 
+    if (socketRef.current?.isReady()) {
+      const blob = await canvasToJpeg(canvas);
+      if (blob && socketRef.current.sendFrame(blob)) return;
+    }
+
+    // socket not connected (yet) – fall back to the HTTP endpoint
     const frame = canvas.toDataURL("image/jpeg");
     const { data } = await axios.post("attention/check/", {
       frame,
       session_id: sessionId,
     });
+    drawFaces(data.faces);
+  };
+
+  const drawFaces = (faces) => {
+    const video = videoRef.current;
+    if (!video || !canvasRef.current) return;
 
     const ctx = canvasRef.current.getContext("2d");
     canvasRef.current.width = video.videoWidth;
     canvasRef.current.height = video.videoHeight;
     ctx.clearRect(0, 0, canvasRef.current.width, canvasRef.current.height);
 
-    data.faces.forEach(({ x, y, w, h, attentive }) => {
+    faces.forEach(({ x, y, w, h, attentive }) => {
       ctx.strokeStyle = attentive ? "lime" : "red";
       ctx.lineWidth = 2;
       ctx.strokeRect(x, y, w, h);
@@ -100,6 +122,7 @@ const fetchFeedbackTips = async () => {
 
     clearInterval(intervalRef.current);
     clearInterval(feedbackIntervalRef.current);
+    socketRef.current?.close();
     const stream = videoRef.current?.srcObject;
     if (stream) {
       stream.getTracks().forEach(track => track.stop());
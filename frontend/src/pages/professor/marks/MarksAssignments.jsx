@@ -3,6 +3,25 @@ import { useParams, useNavigate } from "react-router-dom";
 import axiosInstance from "../../../api/axios";
 import "../../../styles/Questions.css";
 
+// AI evaluation runs in the background after submission; poll until it settles
+const AI_PENDING = ["queued", "evaluating", "report"];
+const AI_POLL_MS = 5000;
+
+const aiLabel = (a) => {
+  switch (a.ai_status) {
+    // "none" also covers assignments evaluated before ai_status existed; show their verdict
+    case "none": if (a.ai_cheating == null) return "-"; break;
+    case "queued": return "⏳ queued";
+    case "evaluating": return "⏳ evaluating";
+    case "report": return a.ai_cheating ? "⚠️ flagged (report…)" : "✅ clean (report…)";
+    case "failed": return "❌ failed";
+    default:
+      if (a.ai_cheating == null) return "-";
+  }
+  const pct = a.ai_probability != null ? ` ${Math.round(a.ai_probability * 100)}%` : "";
+  return a.ai_cheating ? `⚠️ flagged${pct}` : `✅ clean${pct}`;
+};
+
 export default function MarksAssignments() {
   const { testId } = useParams();
   const navigate = useNavigate();
@@ -28,6 +47,22 @@ export default function MarksAssignments() {
     loadAssignments();
   }, [testId]);
 
+  const aiPending = assignments.some(a => AI_PENDING.includes(a.ai_status));
+
+  useEffect(() => {
+    if (!aiPending) return;
+    const timer = setInterval(async () => {
+      try {
+        const { data } = await axiosInstance.get(`/marks/${testId}/ai-status/`);
+        const byId = Object.fromEntries(data.map(row => [row.id, row]));
+        setAssignments(prev => prev.map(a => (byId[a.id] ? { ...a, ...byId[a.id] } : a)));
+      } catch (err) {
+        console.warn("AI status poll failed:", err);
+      }
+    }, AI_POLL_MS);
+    return () => clearInterval(timer);
+  }, [testId, aiPending]);
+
   if (loading) return <p>Loading assignments...</p>;
 
   return (
@@ -45,6 +80,7 @@ export default function MarksAssignments() {
             <th>Finished</th>
             <th>Status</th>
             <th>Score</th>
+            <th>AI</th>
             <th></th>
           </tr>
         </thead>
@@ -60,6 +96,7 @@ export default function MarksAssignments() {
               <td>{a.finished_at?.slice(11, 16) || "-"}</td>
               <td>{a.status}</td>
               <td>{a.auto_score ?? "-"}</td>
+              <td>{aiLabel(a)}</td>
               <td>
                 <button
                   disabled={a.status !== "finalized"}
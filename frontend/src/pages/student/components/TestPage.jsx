@@ -32,7 +32,7 @@ export default function TestPage() {
   const [isSubmitted, setIsSubmitted] = useState(false);
 
   const shouldMonitor = verified && test?.has_ai_assistent;
-  useUserActivityMonitor(shouldMonitor ? assignmentId : null);
+  const flushActivity = useUserActivityMonitor(shouldMonitor ? assignmentId : null);
 
   const finished = sessionStorage.getItem(`assignment_${assignmentId}_submitted`) === "true";
   const isTraining = sessionStorage.getItem(`assignment_${assignmentId}_is_training`) === "true";
@@ -171,6 +171,8 @@ export default function TestPage() {
   };
 
   try {
+    // the analysis is finalized on submit; the last buffered events have to be in by then
+    await flushActivity();
     const res = await axiosInstance.post("/submit-answers/", payload);
     if (test?.use_proctoring){
       if(document.fullscreenElement){
@@ -1,15 +1,32 @@
 import React, { useEffect, useRef } from "react";
 import axiosInstance from "../../../api/axios";
+import { canvasToJpeg, openFrameSocket } from "../../../api/frameSocket";
 
 export default function WebcamMonitor({ assignmentId , currentQuestionId }) {
   const videoRef = useRef(null);
+  const socketRef = useRef(null);
+  const questionRef = useRef(currentQuestionId);
 
   useEffect(() => {
   console.log("[WebcamMonitor] Live camera monitor is active");
 }, []);
+
+  // question context lives in the socket connection state
+  useEffect(() => {
+    questionRef.current = currentQuestionId;
+    socketRef.current?.sendMessage({ type: "question", question_id: currentQuestionId || null });
+  }, [currentQuestionId]);
+
   useEffect(() => {
     let stream;
 
+    socketRef.current = openFrameSocket(`/ws/proctoring/exam/${assignmentId}/`, {
+      authExtra: { question_id: questionRef.current || null },
+      onVerdict: (verdict) => {
+        if (verdict.error) console.warn("Live face check:", verdict.error);
+      },
+    });
+
     const startCamera = async () => {
       try {
         stream = await navigator.mediaDevices.getUserMedia({ video: true });
@@ -28,13 +45,18 @@ export default function WebcamMonitor({ assignmentId , currentQuestionId }) {
       canvas.width = video.videoWidth;
       canvas.height = video.videoHeight;
       canvas.getContext("2d").drawImage(video, 0, 0);
-      const dataUrl = canvas.toDataURL("image/jpeg");
 
+      if (socketRef.current?.isReady()) {
+        const blob = await canvasToJpeg(canvas);
+        if (blob && socketRef.current.sendFrame(blob)) return;
+      }
+
+      // socket not connected (yet) – fall back to the HTTP endpoint
       try {
         await axiosInstance.post("/proctoring/live-face-check/", {
-          face_image: dataUrl,
+          face_image: canvas.toDataURL("image/jpeg"),
           assignment_id: assignmentId,
-          question_id:currentQuestionId || null,
+          question_id: questionRef.current || null,
         });
       } catch (err) {
         console.warn("Live face check failed:", err?.response?.data || err.message);
@@ -46,11 +68,13 @@ export default function WebcamMonitor({ assignmentId , currentQuestionId }) {
 
     return () => {
       clearInterval(interval);
+      socketRef.current?.close();
+      socketRef.current = null;
       if (stream) {
         stream.getTracks().forEach(track => track.stop());
       }
     };
-  }, [assignmentId, currentQuestionId]);
+  }, [assignmentId]);
 
   return <video ref={videoRef} style={{ display: "none" }} />;
 }
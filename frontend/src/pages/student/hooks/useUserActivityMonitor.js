@@ -1,26 +1,80 @@
-import { useEffect } from "react";
+import { useCallback, useEffect, useRef } from "react";
 import axiosInstance from "../../../api/axios";
 
+// Events are buffered and sent in one request every FLUSH_INTERVAL_MS
+// or as soon as FLUSH_MAX_EVENTS are waiting.
+const FLUSH_INTERVAL_MS = 2000;
+const FLUSH_MAX_EVENTS = 50;
+const BATCH_URL = "proctoring/mouse_keyboard_batch/";
+const API_URL = import.meta.env.VITE_API_URL || "https://localhost:8000/api/";
+
+// Returns flushActivity(): sends whatever is buffered and resolves once every
+// batch sent so far has been answered. Await it before submitting the attempt,
+// so the server sees the last events before it computes the analysis.
 export default function useUserActivityMonitor(assignmentId) {
+  const flushRef = useRef(() => Promise.resolve());
+
   useEffect(() => {
     if (!assignmentId) return;
 
     let lastKeyTime = null;
+    let buffer = [];
+    let inFlight = Promise.resolve();
 
-    const sendLog = async (eventType, message, score = 0.1) => {
-      console.log("Sending event:", eventType, message);
+    const post = async (events) => {
       try {
-        await axiosInstance.post("proctoring/mouse_keyboard_check/", {
+        await axiosInstance.post(BATCH_URL, {
           assignment_id: assignmentId,
-          event_type: eventType,
-          event_message: JSON.stringify(message),
-          anomaly_score: score,
+          events,
         });
       } catch (err) {
         console.log("Activity log on mouse and keyboard failed:", err?.response?.data || err.message);
       }
     };
 
+    const flush = () => {
+      if (buffer.length > 0) {
+        const events = buffer;
+        buffer = [];
+        inFlight = inFlight.then(() => post(events));
+      }
+      return inFlight;
+    };
+    flushRef.current = flush;
+
+    // The tab is closing or being navigated away: a keepalive request outlives the page.
+    // (navigator.sendBeacon cannot carry the JWT Authorization header.)
+    const handlePageHide = () => {
+      if (buffer.length === 0) return;
+      const events = buffer;
+      buffer = [];
+      const accessToken = localStorage.getItem("accessToken");
+      fetch(`${API_URL}${BATCH_URL}`, {
+        method: "POST",
+        keepalive: true,
+        credentials: "include",
+        headers: {
+          "Content-Type": "application/json",
+          ...(accessToken ? { Authorization: `Bearer ${accessToken}` } : {}),
+        },
+        body: JSON.stringify({ assignment_id: assignmentId, events }),
+      }).catch(() => {});
+    };
+
+    const sendLog = (eventType, message, score = 0.1) => {
+      buffer.push({
+        event_type: eventType,
+        event_message: JSON.stringify(message),
+        anomaly_score: score,
+        client_ts: Date.now(),
+      });
+      if (buffer.length >= FLUSH_MAX_EVENTS) {
+        flush();
+      }
+    };
+
+    const flushTimer = setInterval(flush, FLUSH_INTERVAL_MS);
+
     const handleKeyDown = (e) => {
       const now = Date.now();
       const delta = lastKeyTime ? now - lastKeyTime : null;
@@ -46,8 +100,6 @@ export default function useUserActivityMonitor(assignmentId) {
       } else if ((e.ctrlKey || e.metaKey) && e.key.toLowerCase() === "x") {
         sendLog("cut_event", { method: "keyboard" }, 0.6);
       }
-
-      console.log("KEY:", e.key, "CTRL:", e.ctrlKey, "META:", e.metaKey);
     };
 
     const handlePaste = (e) => {
@@ -104,8 +156,13 @@ export default function useUserActivityMonitor(assignmentId) {
     window.addEventListener("blur", handleBlur);
     window.addEventListener("focus", handleFocus);
     document.addEventListener("visibilitychange", handleVisibilityChange);
+    window.addEventListener("pagehide", handlePageHide);
 
     return () => {
+      clearInterval(flushTimer);
+      flush();
+      flushRef.current = () => Promise.resolve();
+      window.removeEventListener("pagehide", handlePageHide);
       window.removeEventListener("keydown", handleKeyDown);
       document.removeEventListener("paste", handlePaste);
       document.removeEventListener("copy", handleCopy);
@@ -116,4 +173,6 @@ export default function useUserActivityMonitor(assignmentId) {
       document.removeEventListener("visibilitychange", handleVisibilityChange);
     };
   }, [assignmentId]);
+
+  return useCallback(() => flushRef.current(), []);
 }
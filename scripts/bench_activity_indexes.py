@@ -0,0 +1,106 @@
+"""Query plans for the hot StudentActivityLog queries, before and after the composite indexes.
+
+Seeds a scratch copy of the activity table (no FKs, so no real assignments are
+needed), runs EXPLAIN ANALYZE with only the FK index that Django creates by
+default, then adds the indexes declared in StudentActivityLog.Meta and runs
+the same queries again. Nothing touches the real table.
+
+No results from it are recorded yet: the indexes match the filters and sort
+order of these queries, but whether they pay for their write cost on a real
+table has not been measured. Run this on Postgres before relying on them.
+
+    python manage.py shell -c "exec(open('scripts/bench_activity_indexes.py').read())"
+
+BENCH_ROWS / BENCH_ASSIGNMENTS can be overridden through the environment.
+"""
+
+import os
+import time
+from django.db import connection
+
+ROWS = int(os.environ.get("BENCH_ROWS", 10_000_000))
+ASSIGNMENTS = int(os.environ.get("BENCH_ASSIGNMENTS", 20_000))
+TABLE = "bench_activity_log"
+TARGET_ASSIGNMENT, TARGET_ATTEMPT = 4242, 1
+
+QUERIES = {
+    "event counts (features / verdict engine)": f"""
+        SELECT event_type, count(*) FROM {TABLE}
+        WHERE assignment_id = %s AND attempt_no = %s
+        GROUP BY event_type
+    """,
+    "offscreen gaze timeline": f"""
+        SELECT "timestamp" FROM {TABLE}
+        WHERE assignment_id = %s AND attempt_no = %s
+          AND event_type IN ('gaze_offscreen', 'head_pose_suspicious')
+        ORDER BY "timestamp"
+    """,
+    "single-pass recompute": f"""
+        SELECT count(*) FILTER (WHERE event_type = 'esc_pressed'),
+               count(*) FILTER (WHERE event_type = 'tab_hidden'),
+               count(*) FILTER (WHERE event_type = 'key_press'),
+               sum(chars_written),
+               avg(key_delay) FILTER (WHERE event_type = 'key_press')
+        FROM {TABLE}
+        WHERE assignment_id = %s AND attempt_no = %s
+    """,
+}
+
+# mirrors StudentActivityLog.Meta.indexes
+NEW_INDEXES = [
+    f"CREATE INDEX bench_attempt_event_ts ON {TABLE} (assignment_id, attempt_no, event_type, \"timestamp\")",
+    f"""CREATE INDEX bench_attempt_gaze_ts ON {TABLE} (assignment_id, attempt_no, "timestamp")
+        WHERE event_type IN ('gaze_offscreen', 'head_pose_suspicious')""",
+]
+
+
+def _explain_all(cursor, label):
+    print(f"\n==================== {label} ====================")
+    for name, sql in QUERIES.items():
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, [TARGET_ASSIGNMENT, TARGET_ATTEMPT])
+        print(f"\n--- {name}")
+        for (line,) in cursor.fetchall():
+            print(line)
+
+
+with connection.cursor() as cursor:
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"CREATE TABLE {TABLE} (LIKE users_studentactivitylog INCLUDING DEFAULTS INCLUDING IDENTITY)")
+
+    print(f"Seeding {ROWS:,} rows over {ASSIGNMENTS:,} assignments...")
+    started = time.time()
+    cursor.execute(f"""
+        INSERT INTO {TABLE} (assignment_id, attempt_no, "timestamp", focus_lost_count, anomaly_score,
+                             event_type, chars_written, key_delay)
+        SELECT 1 + floor(random() * %s)::int,
+               1 + floor(random() * 2)::int,
+               now() - random() * interval '30 days',
+               0,
+               0.1,
+               e.event_type,
+               CASE WHEN e.event_type = 'key_press' THEN 1 ELSE 0 END,
+               CASE WHEN e.event_type = 'key_press' THEN 90 + random() * 160 END
+        FROM generate_series(1, %s) g
+        -- the (g * 0) term correlates the subquery so it is re-evaluated per row
+        CROSS JOIN LATERAL (
+            SELECT (ARRAY['key_press', 'key_press', 'key_press', 'key_press', 'key_press', 'key_press',
+                          'key_press', 'face_match', 'face_match', 'gaze_offscreen', 'head_pose_suspicious',
+                          'window_blur', 'tab_hidden', 'esc_pressed', 'copy_event', 'paste_event'])
+                   [1 + floor(random() * 16)::int + (g * 0)] AS event_type
+        ) e
+    """, [ASSIGNMENTS, ROWS])
+    print(f"Seeded in {time.time() - started:.1f}s")
+
+    # what the tree had before: only the FK index Django adds on assignment_id
+    cursor.execute(f"CREATE INDEX bench_assignment_fk ON {TABLE} (assignment_id)")
+    cursor.execute(f"ANALYZE {TABLE}")
+    _explain_all(cursor, "BEFORE (FK index only)")
+
+    started = time.time()
+    for sql in NEW_INDEXES:
+        cursor.execute(sql)
+    cursor.execute(f"ANALYZE {TABLE}")
+    print(f"\nBuilt composite/partial indexes in {time.time() - started:.1f}s")
+    _explain_all(cursor, "AFTER (composite + partial)")
+
+    cursor.execute(f"DROP TABLE {TABLE}")
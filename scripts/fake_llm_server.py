@@ -0,0 +1,88 @@
+"""Stand-in for the Hugging Face inference API, for exercising attention feedback locally.
+
+    python scripts/fake_llm_server.py --port 8765 --delay 2
+    ATTENTION_LLM_BASE_URL=http://127.0.0.1:8765 python manage.py runserver
+
+Answers every ``POST /<model>`` like the text-generation endpoint does: a TIP
+for short prompts (live tips), a JSON list for report prompts. ``--delay``
+simulates a slow model, ``--fail-every N`` returns a 503 for every Nth call.
+Each request is logged, so rate limiting and caching can be checked from the
+output. ``make_server`` is used by attention.tests to run it in-process.
+"""
+
+import argparse
+import itertools
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, delay=0.0, fail_every=0, verbose=True):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.delay = delay
+        self.fail_every = fail_every
+        self.verbose = verbose
+        self.calls = 0
+        self._counter = itertools.count(1)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_call(self):
+        self.calls = next(self._counter)
+        return self.calls
+
+
+def make_server(port=0, delay=0.0, fail_every=0, verbose=True):
+    """A FakeLLMServer bound to ``port`` (0 = any free one); call ``serve_forever`` to run it."""
+    return FakeLLMServer(port, delay, fail_every, verbose)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        n = self.server.next_call()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = body.get("inputs", "")
+        if self.server.verbose:
+            print(f"#{n} {self.path} auth={self.headers.get('Authorization', '-')!r} prompt={prompt[:60]!r}...")
+
+        time.sleep(self.server.delay)
+        if self.server.fail_every and n % self.server.fail_every == 0:
+            self._reply(503, {"error": "Model is currently loading"})
+            return
+
+        if "JSON list" in prompt:
+            text = json.dumps([f"Fake report tip {i} (call {n})" for i in range(1, 4)])
+        else:
+            text = f"TIP: Fake live tip number {n}, ask the room a quick question."
+        self._reply(200, [{"generated_text": text}])
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (read timeout)
+
+    def log_message(self, *a):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.delay, args.fail_every)
+    print(f"Fake LLM API on {server.url}")
+    server.serve_forever()
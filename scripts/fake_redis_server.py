@@ -0,0 +1,214 @@
+"""Minimal in-memory Redis stand-in, for exercising the Redis-backed proctoring state locally.
+
+    python scripts/fake_redis_server.py --port 6390
+    PROCTORING_REDIS_URL=redis://127.0.0.1:6390/0 python manage.py runserver
+
+Speaks RESP2 and implements just the commands Django's ``RedisCache`` sends
+for the proctoring cache (GET/SET with NX/XX/EX/PX, MGET/MSET, DEL, EXISTS,
+INCRBY/DECRBY, EXPIRE, TTL, FLUSHDB and MULTI/EXEC pipelines). Every command is
+applied under one lock, so it is as atomic as the real thing for these tests.
+``make_server`` is used by users.tests to run it in-process.
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class Error(Exception):
+    pass
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.lock = threading.Lock()
+        self.data = {}  # key -> (value, expires_at monotonic or None)
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def cmd_ping(self, *args):
+        return "PONG"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_get(self, key):
+        entry = self._get(key)
+        return None if entry is None else entry[0]
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [o.upper() if isinstance(o, bytes) else o for o in options]
+        expires_at = None
+        if b"EX" in options:
+            expires_at = time.monotonic() + int(options[options.index(b"EX") + 1])
+        if b"PX" in options:
+            expires_at = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+        exists = self._get(key) is not None
+        if (b"NX" in options and exists) or (b"XX" in options and not exists):
+            return None
+        self.data[key] = (value, expires_at)
+        return "OK"
+
+    def cmd_mset(self, *pairs):
+        for key, value in zip(pairs[::2], pairs[1::2]):
+            self.data[key] = (value, None)
+        return "OK"
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self.data[key]
+                removed += 1
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._get(key) is not None)
+
+    def cmd_incrby(self, key, delta):
+        entry = self._get(key)
+        try:
+            value = int(entry[0] if entry else 0) + int(delta)
+        except ValueError:
+            raise Error("ERR value is not an integer or out of range")
+        self.data[key] = (str(value).encode(), entry[1] if entry else None)
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def cmd_decrby(self, key, delta):
+        return self.cmd_incrby(key, -int(delta))
+
+    def cmd_expire(self, key, seconds):
+        entry = self._get(key)
+        if entry is None:
+            return 0
+        self.data[key] = (entry[0], time.monotonic() + int(seconds))
+        return 1
+
+    def cmd_persist(self, key):
+        entry = self._get(key)
+        if entry is None or entry[1] is None:
+            return 0
+        self.data[key] = (entry[0], None)
+        return 1
+
+    def cmd_ttl(self, key):
+        entry = self._get(key)
+        if entry is None:
+            return -2
+        if entry[1] is None:
+            return -1
+        return int(round(entry[1] - time.monotonic()))
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        return "OK"
+
+
+def make_server(port=0):
+    """A FakeRedisServer bound to ``port`` (0 = any free one); call ``serve_forever`` to run it."""
+    return FakeRedisServer(port)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        queued = None  # commands between MULTI and EXEC
+        while True:
+            try:
+                command = self._read()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            name = command[0].decode().lower()
+            args = command[1:]
+
+            if name == "multi":
+                queued = []
+                self._write("OK")
+            elif name == "exec":
+                if queued is None:
+                    self._write(Error("ERR EXEC without MULTI"))
+                    continue
+                # the whole transaction under one lock, like Redis runs it
+                with self.server.lock:
+                    results = [self._run(n, a) for n, a in queued]
+                queued = None
+                self._write(results)
+            elif name == "discard":
+                queued = None
+                self._write("OK")
+            elif queued is not None:
+                queued.append((name, args))
+                self._write("QUEUED")
+            else:
+                with self.server.lock:
+                    self._write(self._run(name, args))
+
+    def _run(self, name, args):
+        method = getattr(self.server, f"cmd_{name}", None)
+        if method is None:
+            return Error(f"ERR unknown command '{name}'")
+        try:
+            return method(*args)
+        except Error as e:
+            return e
+        except TypeError:
+            return Error(f"ERR wrong number of arguments for '{name}' command")
+
+    def _read(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command, e.g. from telnet
+        items = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            items.append(self.rfile.read(size + 2)[:-2])
+        return items
+
+    def _encode(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, Error):
+            return f"-{value}\r\n".encode()
+        if isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+
+    def _write(self, value):
+        self.wfile.write(self._encode(value))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = make_server(args.port)
+    print(f"Fake Redis on {server.url}")
+    server.serve_forever()
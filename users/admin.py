@@ -13,7 +13,8 @@ from .models.core import User, UserInvitation, Faculty, Specialization, Course,
 from .forms import CustomUserChangeForm, CustomUserCreationForm
 
 from .models.questions import Question, AnswerOption, QuestionAttachment
-from .models.tests import Test,TestQuestion,TestAssignment,StudentAnswer,StudentActivityLog, StudentActivityAnalysis, AudioAnalysis
+from .models.tests import Test,TestQuestion,TestAssignment,StudentAnswer,StudentActivityLog, StudentActivityAnalysis, AudioAnalysis, EvidenceFrame
+from .models.jobs import BackgroundJob
 
 
 
@@ -212,7 +213,7 @@ class TestQuestionAdmin(admin.ModelAdmin):
 
 @admin.register(TestAssignment)
 class TestAssignmentAdmin(admin.ModelAdmin):
-    list_display = ("test", "student", "started_at", "finished_at", "attempt_no")
+    list_display = ("test", "student", "started_at", "finished_at", "attempt_no", "ai_status")
     search_fields = ("student__email",)
     list_filter = ("test", "student")
     readonly_fields = [
@@ -303,6 +304,8 @@ class AudioAnalysisAdmin(admin.ModelAdmin):
         "attempt_no",
         "voiced_ratio",
         "voiced_seconds",
+        "total_seconds",
+        "speech_segments",
         "mouth_open_no_voice_count",
         "created_at"
     )
@@ -314,4 +317,33 @@ class AudioAnalysisAdmin(admin.ModelAdmin):
         return False
 
     def has_delete_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(EvidenceFrame)
+class EvidenceFrameAdmin(admin.ModelAdmin):
+    list_display = ("assignment", "attempt_no", "event_type", "captured_at")
+    list_filter = ("event_type",)
+    search_fields = ("assignment__id",)
+    readonly_fields = [f.name for f in EvidenceFrame._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "priority", "attempts", "run_after", "locked_by", "finished_at")
+    list_filter = ("status", "task")
+    search_fields = ("task", "dedup_key")
+    readonly_fields = [f.name for f in BackgroundJob._meta.fields]
+    actions = ["retry_jobs"]
+
+    def retry_jobs(self, request, queryset):
+        count = queryset.filter(status=BackgroundJob.FAILED).update(
+            status=BackgroundJob.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"{count} failed jobs were queued again.", level=messages.SUCCESS)
+
+    retry_jobs.short_description = "Retry failed jobs"
+
+    def has_add_permission(self, request):
+        return False
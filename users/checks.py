@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+@register()
+def proctoring_state_shared(app_configs, **kwargs):
+    """Per-process proctoring state breaks once requests of one attempt land in different workers."""
+    if settings.WEB_CONCURRENCY > 1 and isinstance(caches["proctoring"], LocMemCache):
+        return [
+            Warning(
+                f"The proctoring state cache is per-process LocMem but WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}.",
+                hint=(
+                    "Mouth state, debounce windows and audio counters are not shared between workers; "
+                    "set PROCTORING_REDIS_URL."
+                ),
+                id="users.W001",
+            )
+        ]
+    return []
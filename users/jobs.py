@@ -0,0 +1,231 @@
+"""Database-backed background jobs.
+
+Slow work (PDF reports, model retraining, lecture reports) is queued as a
+``BackgroundJob`` row and executed by ``manage.py run_jobs``, so a request only
+pays for one INSERT and nothing is lost when a web worker restarts.
+
+* ``enqueue(func, **kwargs)`` stores the function's dotted path and its
+  JSON-serialisable kwargs. Pass ids, not model instances.
+* ``dedup_key`` collapses repeated requests: while a job with that key is
+  still queued, enqueueing another one returns the existing row.
+* Workers claim the queued job with the lowest ``priority`` using
+  ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of them can run side
+  by side.
+* A failing job is retried with exponential backoff up to ``max_attempts``;
+  ``final_attempt()`` tells a running job whether a failure is the last word.
+  A job whose worker died is re-queued once its lease (``lease_seconds``,
+  default ``JOB_LEASE_SECONDS``) runs out; a worker that is stopped with
+  SIGTERM / Ctrl-C puts its current job back right away.
+* ``@on_failure(hook)`` on a task calls ``hook(**kwargs)`` once its job has
+  failed for good, also when the last attempt's worker died and the job had
+  no chance to clean up after itself.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from users.models.jobs import BackgroundJob
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 50
+PRIORITY_LOW = 100
+
+_running = threading.local()
+
+
+def enqueue(
+    func: Callable,
+    *,
+    priority: int = PRIORITY_NORMAL,
+    dedup_key: str | None = None,
+    max_attempts: int = 3,
+    delay: float = 0,
+    lease_seconds: int | None = None,
+    **kwargs,
+) -> BackgroundJob:
+    """Queue ``func(**kwargs)``; returns the new job, or the queued one with the same ``dedup_key``."""
+    task = f"{func.__module__}.{func.__qualname__}"
+    try:
+        # savepoint, so a duplicate does not break the caller's transaction
+        with transaction.atomic():
+            return BackgroundJob.objects.create(
+                task=task,
+                kwargs=kwargs,
+                priority=priority,
+                dedup_key=dedup_key,
+                max_attempts=max_attempts,
+                run_after=timezone.now() + timedelta(seconds=delay),
+                lease_seconds=lease_seconds,
+            )
+    except IntegrityError:
+        existing = BackgroundJob.objects.filter(dedup_key=dedup_key, status=BackgroundJob.QUEUED).first()
+        if existing is None:  # it started in the meantime; queue a fresh one behind it
+            return enqueue(
+                func, priority=priority, dedup_key=dedup_key, max_attempts=max_attempts,
+                delay=delay, lease_seconds=lease_seconds, **kwargs,
+            )
+        if priority < existing.priority:
+            BackgroundJob.objects.filter(pk=existing.pk, status=BackgroundJob.QUEUED).update(priority=priority)
+        return existing
+
+
+def on_failure(hook: Callable) -> Callable:
+    """Decorator for task functions: ``hook(**job.kwargs)`` runs when the job ends up FAILED."""
+    def decorate(func):
+        func.job_failed = hook
+        return func
+    return decorate
+
+
+def _job_failed(job: BackgroundJob) -> None:
+    try:
+        hook = getattr(import_string(job.task), "job_failed", None)
+        if hook is not None:
+            hook(**job.kwargs)
+    except Exception as e:
+        print(f"[WARN] Failure hook of job {job.pk} ({job.task}) raised: {e}")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker_id: str) -> BackgroundJob | None:
+    with transaction.atomic():
+        job = (
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status=BackgroundJob.QUEUED, run_after__lte=timezone.now())
+            .order_by("priority", "run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = BackgroundJob.RUNNING
+        job.locked_by = worker_id
+        job.locked_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=["status", "locked_by", "locked_at", "attempts"])
+    return job
+
+
+def final_attempt() -> bool:
+    """True unless called from a job that will be retried if it fails now."""
+    job = getattr(_running, "job", None)
+    return job is None or job.attempts >= job.max_attempts
+
+
+def run(job: BackgroundJob) -> bool:
+    """Execute a claimed job and record the outcome; returns True on success."""
+    _running.job = job
+    try:
+        import_string(job.task)(**job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()[-4000:]
+        if job.attempts < job.max_attempts:
+            job.status = BackgroundJob.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = BackgroundJob.FAILED
+            job.finished_at = timezone.now()
+        _finish(job)
+        if job.status == BackgroundJob.FAILED:
+            _job_failed(job)
+        return False
+    finally:
+        _running.job = None
+
+    job.status = BackgroundJob.DONE
+    job.finished_at = timezone.now()
+    job.last_error = ""
+    _finish(job)
+    return True
+
+
+def _finish(job: BackgroundJob, extra_fields: tuple[str, ...] = ()) -> None:
+    job.locked_by = ""
+    job.locked_at = None
+    try:
+        job.save(update_fields=["status", "run_after", "finished_at", "last_error", "locked_by", "locked_at", *extra_fields])
+    except IntegrityError:
+        # going back to the queue collided with a newer queued job for the same key; that one covers it
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.DONE, finished_at=timezone.now(), locked_by="", locked_at=None
+        )
+
+
+def release(job: BackgroundJob) -> None:
+    """Hand a claimed job back without counting the attempt (the worker is shutting down)."""
+    job.status = BackgroundJob.QUEUED
+    job.attempts = max(job.attempts - 1, 0)
+    job.last_error = f"Released by stopping worker {job.locked_by}"
+    _finish(job, extra_fields=("attempts",))
+
+
+def requeue_expired() -> int:
+    """Put running jobs whose worker stopped reporting back into the queue."""
+    now = timezone.now()
+    running = BackgroundJob.objects.filter(status=BackgroundJob.RUNNING, locked_at__isnull=False)
+    requeued = 0
+    for job in running:
+        lease = job.lease_seconds or settings.JOB_LEASE_SECONDS
+        if job.locked_at >= now - timedelta(seconds=lease):
+            continue
+        job.last_error = f"Lease expired on worker {job.locked_by}"
+        if job.attempts < job.max_attempts:
+            job.status = BackgroundJob.QUEUED
+        else:
+            job.status = BackgroundJob.FAILED
+            job.finished_at = timezone.now()
+        _finish(job)
+        if job.status == BackgroundJob.FAILED:
+            _job_failed(job)
+        requeued += 1
+    return requeued
+
+
+def purge_finished() -> int:
+    cutoff = timezone.now() - timedelta(days=settings.JOB_KEEP_FINISHED_DAYS)
+    deleted, _ = BackgroundJob.objects.filter(
+        status__in=[BackgroundJob.DONE, BackgroundJob.FAILED], finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def work(worker_id: str | None = None, *, once: bool = False, poll_interval: float | None = None) -> int:
+    """Process jobs until interrupted (or until the queue is empty with ``once``); returns the number run."""
+    worker_id = worker_id or default_worker_id()
+    poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    processed = 0
+    last_maintenance = None
+    while True:
+        close_old_connections()
+        if last_maintenance is None or time.monotonic() - last_maintenance >= 60:
+            requeue_expired()
+            purge_finished()
+            last_maintenance = time.monotonic()
+
+        job = claim(worker_id)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        try:
+            run(job)
+        except BaseException:
+            # KeyboardInterrupt / SystemExit from the signal handler in run_jobs
+            release(job)
+            raise
+        processed += 1
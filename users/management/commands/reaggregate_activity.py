@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from users.models.tests import TestAssignment
+from users.proctoring.activity import recompute_analyses
+
+class Command(BaseCommand):
+    help = "Rebuild StudentActivityAnalysis rows from the raw activity logs in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--test", type=int, help="Only assignments of this test id")
+        parser.add_argument("--assignment", type=int, nargs="*", help="Only these assignment ids")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        qs = TestAssignment.objects.select_related("test").order_by("id")
+        if options["test"]:
+            qs = qs.filter(test_id=options["test"])
+        if options["assignment"]:
+            qs = qs.filter(id__in=options["assignment"])
+
+        chunk_size = options["chunk_size"]
+        chunk, total = [], 0
+        for assignment in qs.iterator(chunk_size=chunk_size):
+            chunk.append(assignment)
+            if len(chunk) == chunk_size:
+                total += len(recompute_analyses(chunk))
+                chunk = []
+        if chunk:
+            total += len(recompute_analyses(chunk))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Re-aggregated activity for {total} assignments."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.models.tests import Test, TestAssignment
+from ai_models.evaluation_engine import evaluate_assignments
+
+class Command(BaseCommand):
+    help = "Re-run the AI verdict for every finished assignment of a test (or all tests) in batches"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--test", type=int, help="Test id to re-score")
+        target.add_argument("--all", action="store_true", help="Every test with the AI assistant, e.g. after retraining")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--no-reports", action="store_true", help="Only update verdicts, do not queue PDF rebuilds")
+
+    def handle(self, *args, **options):
+        qs = (
+            TestAssignment.objects
+            .filter(finished_at__isnull=False, test__has_ai_assistent=True)
+            .select_related("test", "student")
+            .order_by("id")
+        )
+        if options["test"]:
+            if not Test.objects.filter(id=options["test"]).exists():
+                raise CommandError(f"Test {options['test']} does not exist.")
+            qs = qs.filter(test_id=options["test"])
+
+        chunk_size = options["chunk_size"]
+        build_reports = not options["no_reports"]
+        chunk, total = [], 0
+        for assignment in qs.iterator(chunk_size=chunk_size):
+            chunk.append(assignment)
+            if len(chunk) == chunk_size:
+                total += evaluate_assignments(chunk, build_reports=build_reports)
+                chunk = []
+        if chunk:
+            total += evaluate_assignments(chunk, build_reports=build_reports)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Re-scored {total} assignments."))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.proctoring.model_registry import serve
+
+class Command(BaseCommand):
+    help = "Serve the proctoring vision models over a local socket shared by all web workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=None, help="Unix socket path (defaults to PROCTORING_INFERENCE_SOCKET)")
+
+    def handle(self, *args, **options):
+        address = options["socket"] or settings.PROCTORING_INFERENCE_SOCKET
+        if not address:
+            raise CommandError("Set PROCTORING_INFERENCE_SOCKET or pass --socket.")
+        try:
+            serve(address)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Inference server stopped."))
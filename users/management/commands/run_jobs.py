@@ -0,0 +1,24 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from users.jobs import default_worker_id, work
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (PDF reports, model retraining, lecture reports)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+        parser.add_argument("--poll", type=float, default=None, help="Seconds between polls of an empty queue (defaults to JOB_POLL_INTERVAL)")
+        parser.add_argument("--worker-id", default=None)
+
+    def handle(self, *args, **options):
+        # treat SIGTERM (deploys, process managers) like Ctrl-C: the current job is handed back
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        worker_id = options["worker_id"] or default_worker_id()
+        self.stdout.write(f"Job worker {worker_id} started.")
+        try:
+            processed = work(worker_id, once=options["once"], poll_interval=options["poll"])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Job worker stopped."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"✅ Ran {processed} jobs."))
@@ -1,3 +1,4 @@
 from .core import *
 from .tests import *
 from .questions import *
+from .jobs import *
@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+
+
+class BackgroundJob(models.Model):
+    """A unit of work for ``manage.py run_jobs`` (see users.jobs)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    task = models.CharField(max_length=200)  # dotted path of the function to call
+    kwargs = models.JSONField(default=dict, blank=True)
+    # lower runs first
+    priority = models.IntegerField(default=50)
+    # at most one queued job per key; a running one does not block a fresh one
+    dedup_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # how long a worker may hold the job before it counts as dead; blank = JOB_LEASE_SECONDS
+    lease_seconds = models.IntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "priority", "run_after"], name="job_claim_order"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status="queued"),
+                name="job_queued_dedup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.status}]"
@@ -3,6 +3,7 @@ from django.conf import settings
 from users.models.core import User, Course, StudentProfile, Series, Group
 from users.models.questions import Question, AnswerOption
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from datetime import timedelta
 
 class Test(models.Model):
@@ -23,6 +24,13 @@ class Test(models.Model):
     allow_sound_analysis = models.BooleanField(default=False)
     use_proctoring = models.BooleanField(default=False)
     has_ai_assistent = models.BooleanField(default=False)
+    # live face check sampling profile (settings.PROCTORING_SAMPLING); blank = derived from the flags above
+    proctoring_sampling = models.CharField(
+        max_length=10,
+        blank=True,
+        default="",
+        choices=[("strict", "Strict"), ("standard", "Standard"), ("light", "Light")],
+    )
     show_result = models.BooleanField(default=False)
     maxim_points = models.IntegerField(default=90, null=False)
     extra_points = models.IntegerField(default=10, null=False)
@@ -107,6 +115,16 @@ class TestQuestion(models.Model):
         return f"{self.test.name} - Q{self.order}"
 
 class TestAssignment(models.Model):
+    # progress of the background AI evaluation (ai_models.evaluation_engine)
+    AI_STATUSES = [
+        ('none', 'Not requested'),
+        ('queued', 'Queued'),
+        ('evaluating', 'Evaluating'),
+        ('report', 'Building report'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name="assignments")
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assigned_tests", limit_choices_to={"role": "student"})
 
@@ -128,6 +146,7 @@ class TestAssignment(models.Model):
     ai_details_json = models.JSONField(null=True, blank=True)
     ai_evaluated_at = models.DateTimeField(null=True, blank=True)
     rule_triggered = models.BooleanField(default=False)
+    ai_status = models.CharField(max_length=12, choices=AI_STATUSES, default='none')
 
     def __str__(self):
         return f"{self.student.email} - {self.test.name} (Attempt {self.attempt_no})"
@@ -147,7 +166,7 @@ class StudentAnswer(models.Model):
 class StudentActivityLog(models.Model):
     assignment = models.ForeignKey(TestAssignment, on_delete=models.CASCADE, related_name="activity_logs")
     attempt_no = models.IntegerField(default=1)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     focus_lost_count = models.IntegerField(default=0)
     anomaly_score = models.FloatField(null=True, blank=True)
     event_type = models.CharField(max_length=100, null=True, blank=True)
@@ -155,6 +174,20 @@ class StudentActivityLog(models.Model):
     pressed_key = models.CharField(max_length=10, null=True, blank=True)
     chars_written = models.PositiveIntegerField(default=0)
     key_delay = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        # shaped after the hot queries' filters; not benchmarked yet (scripts/bench_activity_indexes.py)
+        indexes = [
+            # per-attempt event counts, recompute aggregates, verdict-engine scans
+            models.Index(fields=["assignment", "attempt_no", "event_type", "timestamp"], name="activity_attempt_event_ts"),
+            # offscreen-time gaps: only the gaze rows, already in timestamp order
+            models.Index(
+                fields=["assignment", "attempt_no", "timestamp"],
+                condition=models.Q(event_type__in=["gaze_offscreen", "head_pose_suspicious"]),
+                name="activity_attempt_gaze_ts",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.assignment} - Activity at {self.timestamp}"
     
@@ -172,6 +205,10 @@ class StudentActivityAnalysis(models.Model):
     is_suspicious = models.BooleanField(default=False)
     analyzed_at = models.DateTimeField(auto_now=True)
     total_chars = models.PositiveIntegerField(default=0)
+    # running totals kept up to date by users.proctoring.activity.record_activity
+    key_delay_sum = models.FloatField(default=0)
+    key_delay_count = models.IntegerField(default=0)
+    clipboard_events = models.IntegerField(default=0)
 
     class Meta:
         unique_together = ("assignment", "attempt_no")
@@ -188,13 +225,36 @@ class TempFaceEventState(models.Model):
     last_seen = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # the unique constraint already indexes (user, assignment, attempt_no, event_type)
         unique_together = ("user", "assignment", "attempt_no", "event_type")
+        indexes = [
+            models.Index(fields=["last_seen"], name="tempface_last_seen"),
+        ]
+
+class EvidenceFrame(models.Model):
+    assignment = models.ForeignKey(TestAssignment, on_delete=models.CASCADE, related_name="evidence_frames")
+    attempt_no = models.IntegerField(default=1)
+    activity_log = models.ForeignKey(StudentActivityLog, on_delete=models.SET_NULL, null=True, blank=True, related_name="evidence_frames")
+    event_type = models.CharField(max_length=50)
+    image_path = models.CharField(max_length=255)  # relative to PROCTORING_EVIDENCE_DIR
+    captured_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["assignment", "attempt_no", "-captured_at"]),
+        ]
+
+    def __str__(self):
+        return f"Evidence {self.event_type} for assignment {self.assignment_id}"
 
 class AudioAnalysis(models.Model):
     assignment = models.ForeignKey(TestAssignment, on_delete=models.CASCADE, related_name="audio_analysis")
     attempt_no = models.IntegerField(default=1)
     voiced_ratio = models.FloatField()
     voiced_seconds = models.FloatField()
+    total_seconds = models.FloatField(default=0)
+    speech_segments = models.IntegerField(default=0)
+    longest_segment_seconds = models.FloatField(default=0)
     mouth_open_no_voice_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -0,0 +1,205 @@
+"""Running ``StudentActivityAnalysis`` counters for keyboard / mouse events.
+
+Every ingested batch bumps the per-attempt counters with F-expressions, so the
+row is always current and submitting a test no longer re-scans the whole
+activity log. ``recompute_analyses`` rebuilds rows from the raw log when
+needed, with one conditional-aggregation query per chunk of assignments.
+"""
+
+from __future__ import annotations
+
+import operator
+from collections import Counter
+from functools import reduce
+from typing import Dict, Iterable, List, Sequence
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, IntegerField, Q, Sum
+from django.utils import timezone
+
+from users.models.tests import StudentActivityAnalysis, StudentActivityLog, TestAssignment
+
+# event_type -> StudentActivityAnalysis counter
+COUNTER_FIELDS: Dict[str, str] = {
+    "esc_pressed": "esc_pressed",
+    "second_screen": "second_screen_events",
+    "tab_hidden": "tab_switches",
+    "window_blur": "window_blurs",
+    "key_press": "total_key_presses",
+}
+CLIPBOARD_EVENTS = {"copy_event", "paste_event", "cut_event"}
+FOCUS_LOSS_EVENTS = {"window_blur", "tab_hidden", "second_screen"}
+
+
+def is_suspicious(test, esc, second_screen, tab_switches, window_blurs, avg_delay) -> bool:
+    if not test.use_proctoring:
+        return False
+    return (
+        esc > 2 or
+        second_screen > 2 or
+        tab_switches > 2 or
+        window_blurs > 2 or
+        (avg_delay is not None and avg_delay < 50)
+    )
+
+
+def _deltas(logs: Iterable[StudentActivityLog]) -> Counter:
+    d: Counter = Counter()
+    for log in logs:
+        field = COUNTER_FIELDS.get(log.event_type)
+        if field:
+            d[field] += 1
+        if log.event_type in CLIPBOARD_EVENTS:
+            d["clipboard_events"] += 1
+        if log.event_type in FOCUS_LOSS_EVENTS:
+            d["total_focus_lost"] += 1
+        d["total_chars"] += log.chars_written or 0
+        if log.event_type == "key_press" and log.key_delay is not None:
+            d["key_delay_sum"] += float(log.key_delay)
+            d["key_delay_count"] += 1
+    return +d  # drop zero counters
+
+
+def record_activity(assignment: TestAssignment, logs: Iterable[StudentActivityLog]) -> None:
+    """Fold freshly ingested ``logs`` into the assignment's current analysis row."""
+    deltas = _deltas(logs)
+    if not deltas:
+        return
+
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if "key_delay_count" in deltas:
+        # SQL evaluates every right-hand side against the old row
+        updates["average_key_delay"] = ExpressionWrapper(
+            (F("key_delay_sum") + deltas.get("key_delay_sum", 0.0)) / (F("key_delay_count") + deltas["key_delay_count"]),
+            output_field=FloatField(),
+        )
+    if "clipboard_events" in deltas:
+        # a copy/paste usually fires both a keyboard and a clipboard event. Integer division
+        # on purpose: an unpaired event is not counted, as with the old count() / 2 stored
+        # into this IntegerField (and like the // 2 below)
+        updates["copy_paste_events"] = ExpressionWrapper(
+            (F("clipboard_events") + deltas["clipboard_events"]) / 2,
+            output_field=IntegerField(),
+        )
+
+    rows = StudentActivityAnalysis.objects.filter(assignment=assignment, attempt_no=assignment.attempt_no)
+    if rows.update(**updates):
+        return
+
+    initial = dict(deltas)
+    if "key_delay_count" in deltas:
+        initial["average_key_delay"] = deltas.get("key_delay_sum", 0.0) / deltas["key_delay_count"]
+    initial["copy_paste_events"] = deltas.get("clipboard_events", 0) // 2
+    try:
+        with transaction.atomic():
+            StudentActivityAnalysis.objects.create(
+                assignment=assignment,
+                attempt_no=assignment.attempt_no,
+                **initial,
+            )
+    except IntegrityError:
+        # another request created the row first
+        rows.update(**updates)
+
+
+# ----------------------------------------------------------------------
+# Recompute from the raw log
+# ----------------------------------------------------------------------
+
+def _aggregates() -> dict:
+    key_press = Q(event_type="key_press")
+    counts = {field: Count("id", filter=Q(event_type=event)) for event, field in COUNTER_FIELDS.items()}
+    return {
+        **counts,
+        "clipboard_events": Count("id", filter=Q(event_type__in=CLIPBOARD_EVENTS)),
+        "total_chars": Sum("chars_written"),
+        # Count/Sum/Avg over a column skip NULL delays, like the old Python loop did
+        "key_delay_sum": Sum("key_delay", filter=key_press),
+        "key_delay_count": Count("key_delay", filter=key_press),
+        "average_key_delay": Avg("key_delay", filter=key_press),
+    }
+
+
+def _analysis_values(agg: dict | None, test) -> dict:
+    agg = agg or {}
+    values = {field: agg.get(field) or 0 for field in COUNTER_FIELDS.values()}
+    clipboard = agg.get("clipboard_events") or 0
+    values.update(
+        clipboard_events=clipboard,
+        copy_paste_events=clipboard // 2,
+        total_chars=agg.get("total_chars") or 0,
+        key_delay_sum=agg.get("key_delay_sum") or 0.0,
+        key_delay_count=agg.get("key_delay_count") or 0,
+        average_key_delay=agg.get("average_key_delay"),
+    )
+    values["total_focus_lost"] = values["second_screen_events"] + values["window_blurs"] + values["tab_switches"]
+    values["is_suspicious"] = is_suspicious(
+        test,
+        values["esc_pressed"],
+        values["second_screen_events"],
+        values["tab_switches"],
+        values["window_blurs"],
+        values["average_key_delay"],
+    )
+    return values
+
+
+_RECOMPUTED_FIELDS = [
+    *COUNTER_FIELDS.values(),
+    "clipboard_events",
+    "copy_paste_events",
+    "total_chars",
+    "key_delay_sum",
+    "key_delay_count",
+    "average_key_delay",
+    "total_focus_lost",
+    "is_suspicious",
+]
+
+
+def recompute_analyses(assignments: Sequence[TestAssignment]) -> List[StudentActivityAnalysis]:
+    """Rebuild the current-attempt analysis rows of ``assignments`` from their logs.
+
+    A constant number of queries regardless of how many assignments are passed:
+    one grouped aggregate, one lookup of existing rows, then bulk update/create.
+    ``assignment.test`` should be select_related by the caller.
+    """
+    if not assignments:
+        return []
+    # only the current attempt of each assignment; older attempts' logs are never read
+    current = reduce(operator.or_, (Q(assignment_id=a.id, attempt_no=a.attempt_no) for a in assignments))
+
+    grouped = (
+        StudentActivityLog.objects.filter(current)
+        .values("assignment_id", "attempt_no")
+        .annotate(**_aggregates())
+    )
+    aggregates = {(row["assignment_id"], row["attempt_no"]): row for row in grouped}
+
+    existing = {
+        (a.assignment_id, a.attempt_no): a
+        for a in StudentActivityAnalysis.objects.filter(current)
+    }
+
+    now = timezone.now()
+    to_create, to_update, result = [], [], []
+    for assignment in assignments:
+        key = (assignment.id, assignment.attempt_no)
+        values = _analysis_values(aggregates.get(key), assignment.test)
+        analysis = existing.get(key)
+        if analysis is None:
+            analysis = StudentActivityAnalysis(assignment=assignment, attempt_no=assignment.attempt_no, **values)
+            to_create.append(analysis)
+        else:
+            for field, value in values.items():
+                setattr(analysis, field, value)
+            analysis.analyzed_at = now  # bulk_update skips auto_now
+            to_update.append(analysis)
+        result.append(analysis)
+
+    if to_update:
+        StudentActivityAnalysis.objects.bulk_update(to_update, [*_RECOMPUTED_FIELDS, "analyzed_at"])
+    if to_create:
+        StudentActivityAnalysis.objects.bulk_create(to_create)
+    return result
+
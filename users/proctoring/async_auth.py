@@ -0,0 +1,44 @@
+"""JWT authentication for the plain-Django async proctoring views.
+
+DRF's ``@api_view`` cannot wrap ``async def`` views, so the async endpoints
+authenticate with the same simplejwt backend as the rest of the API here.
+"""
+
+from __future__ import annotations
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+_jwt = JWTAuthentication()
+
+
+def _authenticate(request):
+    try:
+        result = _jwt.authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def async_jwt_post(view):
+    """``@api_view(["POST"])`` + ``IsAuthenticated`` for an async view.
+
+    Sets ``request.user``, or answers 401 like DRF does.
+    """
+    @csrf_exempt
+    @require_POST
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(_authenticate)(request)
+        if user is None or not user.is_active:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,174 @@
+"""Streaming per-attempt audio analysis across uploaded chunks.
+
+``live_audio_check`` receives a 3 s WebM chunk at a time. The running state of
+the attempt (frame and voiced-frame counts, talk time towards
+``too_much_talking``, deltas not yet written to ``AudioAnalysis``) is kept as
+separate counters in the proctoring cache and only ever changed with atomic
+``incr``/``decr``, so overlapping chunks of one attempt cannot drop each
+other's counts. ``persist`` takes the pending deltas with an atomic
+read-and-subtract and adds them to ``AudioAnalysis`` with F-expressions, so
+each delta lands in the table exactly once.
+
+With a shared cache (``PROCTORING_REDIS_URL``) the flush happens at most every
+``AUDIO_PERSIST_INTERVAL`` seconds per attempt and once more on submit. The
+per-process LocMem default cannot see other workers' counters, so there every
+chunk is persisted right away and nothing is left behind in a worker that
+never gets the submit request.
+
+Speech segments are stitched across chunk boundaries from the last segment's
+frame range; two chunks of the same attempt that overlap in time can at worst
+split or merge one segment.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Greatest
+
+from users.models.tests import AudioAnalysis
+from users.proctoring import state_store
+
+FRAME_SECONDS = 0.03
+# voiced runs separated by less than this are one speech segment
+MIN_GAP_FRAMES = 10
+PENDING = ("pending_frames", "pending_voiced", "pending_segments", "pending_mouth_no_voice")
+
+
+@dataclass
+class AudioChunk:
+    """The attempt's totals right after one chunk was counted."""
+
+    total_frames: int
+    voiced_frames: int
+    talk_frames: int  # voiced frames since the last too_much_talking event
+
+    @property
+    def voiced_seconds(self) -> float:
+        return self.voiced_frames * FRAME_SECONDS
+
+    @property
+    def talk_seconds(self) -> float:
+        return self.talk_frames * FRAME_SECONDS
+
+
+def _ids(assignment):
+    return assignment.student_id, assignment.id, assignment.attempt_no
+
+
+def _voiced_runs(flags: np.ndarray, offset: int) -> List[List[int]]:
+    """[start, end) frame ranges of the chunk's speech, runs closer than MIN_GAP_FRAMES merged."""
+    padded = np.concatenate(([False], flags.astype(bool), [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8))) + offset
+    runs: List[List[int]] = []
+    for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        if runs and start - runs[-1][1] <= MIN_GAP_FRAMES:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+    return runs
+
+
+def record_chunk(assignment, flags: np.ndarray) -> AudioChunk:
+    """Count one chunk's per-frame voiced flags towards the attempt."""
+    ids = _ids(assignment)
+    n, voiced = len(flags), int(flags.sum())
+    counters = state_store.incr_audio_counters(
+        *ids, total_frames=n, voiced_frames=voiced, talk_frames=voiced, pending_frames=n, pending_voiced=voiced
+    )
+
+    # the incr hands every chunk its own frame range, even when chunks overlap
+    runs = _voiced_runs(flags, counters["total_frames"] - n)
+    if runs:
+        last = state_store.get_audio_fields(*ids, "segment_start", "segment_end", "longest_segment")
+        new_segments = len(runs)
+        if last["segment_end"] is not None and runs[0][0] - last["segment_end"] <= MIN_GAP_FRAMES:
+            runs[0][0] = last["segment_start"]
+            new_segments -= 1
+        longest = max(last["longest_segment"] or 0, *(end - start for start, end in runs))
+        state_store.set_audio_fields(
+            *ids, segment_start=runs[-1][0], segment_end=runs[-1][1], longest_segment=longest
+        )
+        if new_segments:
+            state_store.incr_audio_counters(*ids, pending_segments=new_segments)
+
+    return AudioChunk(counters["total_frames"], counters["voiced_frames"], counters["talk_frames"])
+
+
+def count_mouth_no_voice(assignment) -> None:
+    state_store.incr_audio_counters(*_ids(assignment), pending_mouth_no_voice=1)
+
+
+def reset_talk_time(assignment) -> None:
+    state_store.take_audio_counters(*_ids(assignment), "talk_frames", wait=1.0)
+
+
+def save(assignment) -> None:
+    """Persist the pending deltas if the attempt is due for it."""
+    if not state_store.is_shared() or state_store.claim_interval(
+        *_ids(assignment), "audio-persist", settings.AUDIO_PERSIST_INTERVAL
+    ):
+        persist(assignment)
+
+
+def flush(assignment) -> None:
+    """Write whatever is still pending, e.g. when the attempt is submitted."""
+    persist(assignment, wait=5.0)
+
+
+def _flush_values(pending: dict, longest: int):
+    """(F-expression updates, values for a new row) for the pending deltas."""
+    d_total = pending["pending_frames"] * FRAME_SECONDS
+    d_voiced = pending["pending_voiced"] * FRAME_SECONDS
+    d_longest = longest * FRAME_SECONDS
+    updates = {
+        "total_seconds": F("total_seconds") + d_total,
+        "voiced_seconds": F("voiced_seconds") + d_voiced,
+        # SQL evaluates every right-hand side against the old row
+        "voiced_ratio": ExpressionWrapper(
+            (F("voiced_seconds") + d_voiced) / Greatest(F("total_seconds") + d_total, 0.001),
+            output_field=FloatField(),
+        ),
+        "speech_segments": F("speech_segments") + pending["pending_segments"],
+        # the attempt-wide maximum, so writing it again is harmless
+        "longest_segment_seconds": Greatest(F("longest_segment_seconds"), d_longest),
+        "mouth_open_no_voice_count": F("mouth_open_no_voice_count") + pending["pending_mouth_no_voice"],
+    }
+    initial = {
+        "total_seconds": d_total,
+        "voiced_seconds": d_voiced,
+        "voiced_ratio": d_voiced / d_total if d_total else 0.0,
+        "speech_segments": pending["pending_segments"],
+        "longest_segment_seconds": d_longest,
+        "mouth_open_no_voice_count": pending["pending_mouth_no_voice"],
+    }
+    return updates, initial
+
+
+def persist(assignment, wait: float = 0.0) -> None:
+    """Add the pending deltas to the attempt's AudioAnalysis row."""
+    ids = _ids(assignment)
+    pending = state_store.take_audio_counters(*ids, *PENDING, wait=wait)
+    if pending is None or not (pending["pending_frames"] or pending["pending_mouth_no_voice"]):
+        return  # another request is persisting right now, or nothing to do
+
+    longest = state_store.get_audio_fields(*ids, "longest_segment")["longest_segment"] or 0
+    updates, initial = _flush_values(pending, longest)
+    rows = AudioAnalysis.objects.filter(assignment=assignment, attempt_no=assignment.attempt_no)
+    try:
+        if not rows.update(**updates):
+            try:
+                with transaction.atomic():
+                    AudioAnalysis.objects.create(assignment=assignment, attempt_no=assignment.attempt_no, **initial)
+            except IntegrityError:
+                # another request created the row first
+                rows.update(**updates)
+    except Exception:
+        # hand the deltas back for the next flush
+        state_store.incr_audio_counters(*ids, **pending)
+        raise
@@ -0,0 +1,73 @@
+"""Micro-batching for detectors that are cheaper per frame in batches (YOLO).
+
+Request threads call ``submit(frame)`` and block on the result; each of the
+``workers`` background threads gathers frames from all concurrent requests for
+at most ``max_wait_ms`` (or until ``max_batch_size`` frames are waiting) and
+runs the batch function once over the whole list.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10,
+        workers: int = 1,
+    ):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max_wait_ms / 1000
+        self._workers = max(1, workers)
+        self._pending: queue.Queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def _ensure_workers(self) -> None:
+        if len(self._threads) == self._workers:
+            return
+        with self._lock:
+            while len(self._threads) < self._workers:
+                t = threading.Thread(target=self._run, name="proctoring-batcher", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, item: Any, timeout: float | None = None) -> Any:
+        future: Future = Future()
+        self._ensure_workers()
+        self._pending.put((item, future))
+        return future.result(timeout=timeout)
+
+    def _collect(self) -> list:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self._batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
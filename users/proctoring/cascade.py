@@ -0,0 +1,92 @@
+"""Adaptive sampling for the live face check.
+
+Webcam frames 3 s apart are usually near-identical, so the full detector stack
+(FaceMesh + HOG/encodings, YOLO) does not run on every frame:
+
+* a 1/8-scale grayscale decode of the JPEG is compared with the thumbnail of
+  the last fully analyzed frame; without motion the previous face/gaze result
+  is reused, up to ``full_every`` frames;
+* the phone detector has its own schedule, every ``phone_every`` frames unless
+  there is motion.
+
+The per-attempt state is a few hundred bytes in the proctoring cache. Rates
+come from ``PROCTORING_SAMPLING`` profiles, chosen per test (``Test.proctoring_sampling``,
+or derived from ``use_proctoring`` / ``has_ai_assistent``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+from users.proctoring import state_store
+
+THUMB_SIZE = (40, 30)
+
+
+@dataclass(frozen=True)
+class SamplingPolicy:
+    phone_every: int
+    full_every: int
+    motion_threshold: float  # mean absolute gray-level difference of the thumbnails
+
+
+def sampling_profile(test) -> str:
+    if test.proctoring_sampling:
+        return test.proctoring_sampling
+    if test.use_proctoring and test.has_ai_assistent:
+        return "strict"
+    if test.use_proctoring:
+        return "standard"
+    return "light"
+
+
+def policy_for(test) -> SamplingPolicy:
+    return SamplingPolicy(**settings.PROCTORING_SAMPLING[sampling_profile(test)])
+
+
+@dataclass
+class CascadeState:
+    frame_no: int = 0
+    last_full_frame: int = 0
+    last_phone_frame: int = 0
+    thumb: np.ndarray | None = None  # of the last fully analyzed frame
+    result: Dict[str, Any] | None = None  # last face/gaze result, without encodings
+    face_mismatch: bool = False
+    phone: bool = False
+
+
+def thumbnail(image_bytes: bytes) -> np.ndarray | None:
+    """Tiny grayscale version of an encoded frame; JPEG decodes it at 1/8 scale directly."""
+    small = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None:
+        return None
+    return cv2.resize(small, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def has_motion(state: CascadeState, thumb: np.ndarray | None, policy: SamplingPolicy) -> bool:
+    if state.thumb is None or thumb is None:
+        return True
+    diff = np.abs(thumb.astype(np.int16) - state.thumb.astype(np.int16)).mean()
+    return diff > policy.motion_threshold
+
+
+def plan(state: CascadeState, thumb: np.ndarray | None, policy: SamplingPolicy) -> Tuple[bool, bool]:
+    """Advance the frame counter and decide ``(run_faces, run_phone)`` for this frame."""
+    state.frame_no += 1
+    motion = has_motion(state, thumb, policy)
+    run_faces = motion or state.result is None or state.frame_no - state.last_full_frame >= policy.full_every
+    run_phone = motion or state.frame_no - state.last_phone_frame >= policy.phone_every
+    return run_faces, run_phone
+
+
+def load(assignment) -> CascadeState:
+    return state_store.get_cascade_state(assignment.student_id, assignment.id, assignment.attempt_no) or CascadeState()
+
+
+def save(assignment, state: CascadeState) -> None:
+    state_store.set_cascade_state(assignment.student_id, assignment.id, assignment.attempt_no, state)
@@ -0,0 +1,58 @@
+"""Per-process cache of decoded reference face embeddings.
+
+``User.face_encoding`` holds a pickled float64 array; unpickling it on every
+proctoring frame is wasteful, so the decoded embedding is kept here as a
+contiguous float32 vector keyed by user id. Each entry also remembers the raw
+bytes it was decoded from, so a face re-registered through another worker is
+picked up on the next frame even without an explicit ``invalidate()``.
+"""
+
+from __future__ import annotations
+
+import pickle
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+_cache: Dict[int, Tuple[bytes, np.ndarray]] = {}
+_lock = threading.Lock()
+
+
+def _raw_encoding(user) -> bytes | None:
+    raw = user.face_encoding
+    return bytes(raw) if raw is not None else None
+
+
+def get_reference_embedding(user) -> np.ndarray | None:
+    raw = _raw_encoding(user)
+    if raw is None:
+        return None
+
+    entry = _cache.get(user.id)
+    if entry is not None and entry[0] == raw:
+        return entry[1]
+
+    embedding = np.ascontiguousarray(pickle.loads(raw), dtype=np.float32).reshape(-1)
+    with _lock:
+        _cache[user.id] = (raw, embedding)
+    return embedding
+
+
+def invalidate(user_id: int) -> None:
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def face_distances(reference: np.ndarray, encodings) -> np.ndarray:
+    """Euclidean distance from ``reference`` to every row of ``encodings``."""
+    candidates = np.asarray(encodings, dtype=np.float32).reshape(-1, reference.shape[0])
+    return np.linalg.norm(candidates - reference, axis=1)
+
+
+def matches_user(user, encoding: np.ndarray, tolerance: float) -> bool | None:
+    """True/False if ``encoding`` is/isn't the user's face, None if no face is registered."""
+    reference = get_reference_embedding(user)
+    if reference is None:
+        return None
+    return bool(face_distances(reference, encoding)[0] <= tolerance)
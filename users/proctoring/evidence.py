@@ -0,0 +1,109 @@
+"""Background writer for proctoring evidence frames.
+
+``live_face_check`` only enqueues the decoded frame; a worker thread does the
+JPEG encoding, writes it under
+``PROCTORING_EVIDENCE_DIR/<assignment_id>/<attempt_no>/`` and indexes it with
+an ``EvidenceFrame`` row, so the PDF report never has to scan the directory.
+The queue is bounded: when it is full the frame is dropped rather than
+stalling the request.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+_queue: queue.Queue = queue.Queue(maxsize=settings.PROCTORING_EVIDENCE_QUEUE_SIZE)
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+
+
+def evidence_root() -> Path:
+    return Path(settings.PROCTORING_EVIDENCE_DIR)
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="evidence-writer", daemon=True)
+            _worker.start()
+
+
+def submit(
+    assignment_id: int,
+    attempt_no: int,
+    event_type: str,
+    frame: np.ndarray,
+    activity_log_id: int | None = None,
+) -> bool:
+    """Queue ``frame`` for writing; returns False if it had to be dropped."""
+    _ensure_worker()
+    try:
+        _queue.put_nowait((assignment_id, attempt_no, event_type, frame, activity_log_id, timezone.now()))
+    except queue.Full:
+        print(f"[WARN] Evidence queue full, dropping {event_type} frame for assignment {assignment_id}")
+        return False
+    return True
+
+
+def _write(
+    assignment_id: int,
+    attempt_no: int,
+    event_type: str,
+    frame: np.ndarray,
+    activity_log_id: int | None,
+    captured_at: datetime,
+) -> None:
+    from users.models.tests import EvidenceFrame
+
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, settings.PROCTORING_EVIDENCE_JPEG_QUALITY])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+
+    rel_path = Path(str(assignment_id)) / str(attempt_no) / f"{event_type}_{captured_at:%Y%m%d_%H%M%S_%f}.jpg"
+    abs_path = evidence_root() / rel_path
+    abs_path.parent.mkdir(parents=True, exist_ok=True)
+    abs_path.write_bytes(buf.tobytes())
+
+    EvidenceFrame.objects.create(
+        assignment_id=assignment_id,
+        attempt_no=attempt_no,
+        activity_log_id=activity_log_id,
+        event_type=event_type,
+        image_path=rel_path.as_posix(),
+        captured_at=captured_at,
+    )
+
+
+def _run() -> None:
+    while True:
+        item = _queue.get()
+        try:
+            _write(*item)
+        except Exception as e:
+            print(f"[ERROR] Failed to store evidence frame: {e}")
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def latest_evidence_paths(assignment, limit: int = 4) -> list[Path]:
+    from users.models.tests import EvidenceFrame
+
+    frames = EvidenceFrame.objects.filter(
+        assignment=assignment,
+        attempt_no=assignment.attempt_no,
+    ).order_by("-captured_at").values_list("image_path", flat=True)[:limit]
+    root = evidence_root()
+    return [root / p for p in frames if (root / p).exists()]
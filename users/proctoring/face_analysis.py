@@ -0,0 +1,67 @@
+"""Single face-analysis stage for a proctoring frame.
+
+The dlib HOG detector is the expensive part of ``face_recognition``; it runs
+exactly once here and the encodings are computed at the locations it found.
+When HOG misses the face but FaceMesh (already run for gaze) found one, the
+landmark bounding box is used as the face location instead of the full frame.
+HOG runs on the frame's downscaled copy; encodings use the full resolution.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import face_recognition
+import numpy as np
+
+from users.proctoring.frames import Frame
+
+# Landmarks hug the face tightly; dlib's encoder expects a slightly looser box.
+_PRIOR_MARGIN = 0.15
+
+
+def location_from_landmarks(landmarks: np.ndarray, shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+    """(top, right, bottom, left) pixel box around normalized FaceMesh landmarks."""
+    h, w = shape[:2]
+    x1, y1 = landmarks[:, 0].min() * w, landmarks[:, 1].min() * h
+    x2, y2 = landmarks[:, 0].max() * w, landmarks[:, 1].max() * h
+    pad_x, pad_y = (x2 - x1) * _PRIOR_MARGIN, (y2 - y1) * _PRIOR_MARGIN
+    top = int(max(y1 - pad_y, 0))
+    right = int(min(x2 + pad_x, w - 1))
+    bottom = int(min(y2 + pad_y, h - 1))
+    left = int(max(x1 - pad_x, 0))
+    return top, right, bottom, left
+
+
+def face_locations(frame: Frame) -> List[Tuple[int, int, int, int]]:
+    """HOG face boxes in full-resolution pixels, detected on the frame's ``"hog"`` downscale."""
+    def detect():
+        image, scale = frame.for_detector("hog")
+        boxes = face_recognition.face_locations(image)
+        if scale == 1.0:
+            return boxes
+        h, w = frame.shape[:2]
+        return [
+            (int(top * scale), min(int(right * scale), w - 1), min(int(bottom * scale), h - 1), int(left * scale))
+            for top, right, bottom, left in boxes
+        ]
+
+    return frame.memo("hog_locations", detect)
+
+
+def analyze_faces(
+    frame: Frame,
+    landmarks: np.ndarray | None = None,
+) -> Tuple[List[Tuple[int, int, int, int]], List[np.ndarray]]:
+    """Return ``(face_locations, encodings)`` with one detector pass."""
+    locations = face_locations(frame)
+
+    if not locations and landmarks is not None:
+        locations = [location_from_landmarks(landmarks, frame.shape)]
+
+    if not locations:
+        return [], []
+
+    # encodings come from the full-resolution frame
+    encodings = face_recognition.face_encodings(frame.rgb, known_face_locations=locations)
+    return locations, encodings
@@ -0,0 +1,73 @@
+"""Shared preprocessing for camera frames.
+
+A ``Frame`` is decoded once and handed to every detector. Colour conversions
+(RGB, gray, HSV) and the downscaled copy each detector runs on are computed
+lazily and cached on the frame, so no detector repeats a ``cvtColor`` or
+resize another one already did. Per-detector resolutions come from
+``PROCTORING_DETECTOR_MAX_SIDE``; frames are only ever scaled down.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+from typing import Any, Callable, Dict, Tuple
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+_CONVERSIONS = {
+    "rgb": cv2.COLOR_BGR2RGB,
+    "gray": cv2.COLOR_BGR2GRAY,
+    "hsv": cv2.COLOR_BGR2HSV,
+}
+
+
+class Frame:
+    def __init__(self, bgr: np.ndarray):
+        self.bgr = bgr
+        self._memo: Dict[Any, Any] = {}
+
+    @classmethod
+    def decode(cls, image_bytes: bytes) -> "Frame | None":
+        bgr = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        return None if bgr is None else cls(bgr)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.bgr.shape
+
+    @cached_property
+    def rgb(self) -> np.ndarray:
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def hsv(self) -> np.ndarray:
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV)
+
+    def memo(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Cache any derived value (detector output, enhanced image, ...) on the frame."""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def for_detector(self, detector: str, color: str = "rgb") -> Tuple[np.ndarray, float]:
+        """``(image, scale)`` at the detector's resolution; multiply coordinates by ``scale`` to map back."""
+        max_side = settings.PROCTORING_DETECTOR_MAX_SIDE[detector]
+        h, w = self.shape[:2]
+        scale = max(h, w) / max_side
+        if scale <= 1.0:
+            return getattr(self, color), 1.0
+
+        def resize():
+            # downscale the BGR original once per size, then convert the small copy
+            small_bgr = self.memo(("bgr", max_side), lambda: cv2.resize(
+                self.bgr, (round(w / scale), round(h / scale)), interpolation=cv2.INTER_AREA
+            ))
+            return small_bgr if color == "bgr" else cv2.cvtColor(small_bgr, _CONVERSIONS[color])
+
+        return self.memo((color, max_side), resize), scale
@@ -0,0 +1,284 @@
+"""Process-wide registry for the proctoring vision models.
+
+Models are loaded lazily on first use, warmed up with a blank frame and kept in
+a small pool, so concurrent requests never share one detector instance.
+When ``PROCTORING_INFERENCE_SOCKET`` is set, detection is delegated to the
+shared inference server instead (``manage.py run_inference_server``) and the
+worker process never loads the models at all.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict
+
+import numpy as np
+from django.conf import settings
+
+from users.proctoring.batching import MicroBatcher
+
+PHONE_CLASS_ID = 67  # COCO "cell phone"
+_WARMUP_FRAME = np.zeros((480, 640, 3), dtype=np.uint8)
+
+
+class ModelPool:
+    """Fixed-size pool of detector instances with thread-safe checkout.
+
+    Instances are created on demand up to ``size``; once the pool is full a
+    checkout blocks until another request returns its instance.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int, warmup: Callable[[Any], None] | None = None):
+        self._factory = factory
+        self._warmup = warmup
+        self._size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _reserve_slot(self) -> bool:
+        with self._lock:
+            if self._created >= self._size:
+                return False
+            self._created += 1
+            return True
+
+    def _create(self):
+        try:
+            instance = self._factory()
+            if self._warmup is not None:
+                self._warmup(instance)
+            return instance
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            if self._reserve_slot():
+                instance = self._create()
+            else:
+                instance = self._idle.get(timeout=timeout)
+        try:
+            yield instance
+        finally:
+            self._idle.put(instance)
+
+    def preload(self) -> None:
+        """Create and warm every instance up front (used by the inference server)."""
+        while self._reserve_slot():
+            self._idle.put(self._create())
+
+
+# ----------------------------------------------------------------------
+# Model factories
+# ----------------------------------------------------------------------
+
+def _load_yolo():
+    from ultralytics import YOLO
+    return YOLO(settings.PROCTORING_YOLO_WEIGHTS)
+
+
+def _warm_yolo(model) -> None:
+    model.predict(source=_WARMUP_FRAME, verbose=False)
+
+
+def _load_face_mesh():
+    import mediapipe as mp
+    # static_image_mode: pooled instances see frames from many students, so
+    # tracking state from the previous frame would belong to someone else.
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True,
+        max_num_faces=1,
+        refine_landmarks=True,
+    )
+
+
+def _warm_face_mesh(mesh) -> None:
+    mesh.process(_WARMUP_FRAME)
+
+
+def _load_face_detection():
+    import mediapipe as mp
+    # detection only, no tracking state, so one graph can serve any frame or tile
+    return mp.solutions.face_detection.FaceDetection(
+        model_selection=settings.ATTENTION_FACE_MODEL_SELECTION,
+        min_detection_confidence=settings.ATTENTION_FACE_MIN_CONF,
+    )
+
+
+def _warm_face_detection(detector) -> None:
+    detector.process(_WARMUP_FRAME)
+
+
+_FACTORIES: Dict[str, tuple] = {
+    "yolo": (_load_yolo, _warm_yolo),
+    "face_mesh": (_load_face_mesh, _warm_face_mesh),
+    # attention_check (lecture sessions); always run in-process
+    "face_detection": (_load_face_detection, _warm_face_detection),
+}
+# models behind the ops the inference server answers
+_SERVED_MODELS = ("yolo", "face_mesh")
+
+_pools: Dict[str, ModelPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> ModelPool:
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                factory, warmup = _FACTORIES[name]
+                pool = ModelPool(factory, settings.PROCTORING_MODEL_POOL_SIZE, warmup)
+                _pools[name] = pool
+    return pool
+
+
+# ----------------------------------------------------------------------
+# In-process inference
+# ----------------------------------------------------------------------
+
+def _yolo_batch(frames: list) -> list:
+    with get_pool("yolo").checkout() as model:
+        results = model.predict(source=frames, verbose=False)
+    return [r.boxes.data.cpu().numpy() for r in results]
+
+
+_phone_batcher: MicroBatcher | None = None
+# process-pool workers run one frame at a time, so there is nothing to batch
+_batching_enabled = True
+
+
+def _get_phone_batcher() -> MicroBatcher:
+    global _phone_batcher
+    if _phone_batcher is None:
+        with _pools_lock:
+            if _phone_batcher is None:
+                _phone_batcher = MicroBatcher(
+                    _yolo_batch,
+                    max_batch_size=settings.PROCTORING_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.PROCTORING_BATCH_MAX_WAIT_MS,
+                    workers=settings.PROCTORING_MODEL_POOL_SIZE,
+                )
+    return _phone_batcher
+
+
+def _local_phone_boxes(frame_rgb: np.ndarray) -> np.ndarray:
+    if _batching_enabled and settings.PROCTORING_BATCH_MAX_SIZE > 1:
+        return _get_phone_batcher().submit(frame_rgb)
+    return _yolo_batch([frame_rgb])[0]
+
+
+def _local_face_mesh(frame_rgb: np.ndarray) -> np.ndarray | None:
+    with get_pool("face_mesh").checkout() as mesh:
+        results = mesh.process(frame_rgb)
+    if not results.multi_face_landmarks:
+        return None
+    lm = results.multi_face_landmarks[0].landmark
+    return np.array([(p.x, p.y, p.z) for p in lm], dtype=np.float32)
+
+
+_LOCAL_OPS: Dict[str, Callable[[np.ndarray], Any]] = {
+    "phone": _local_phone_boxes,
+    "face_mesh": _local_face_mesh,
+}
+
+
+# ----------------------------------------------------------------------
+# Shared inference server (one model copy for many gunicorn workers)
+# ----------------------------------------------------------------------
+
+_client_state = threading.local()
+
+
+def _authkey() -> bytes:
+    return settings.PROCTORING_INFERENCE_AUTHKEY.encode()
+
+
+def _remote_call(op: str, frame_rgb: np.ndarray):
+    for attempt in range(2):
+        conn = getattr(_client_state, "conn", None)
+        if conn is None:
+            conn = Client(settings.PROCTORING_INFERENCE_SOCKET, family="AF_UNIX", authkey=_authkey())
+            _client_state.conn = conn
+        try:
+            conn.send((op, frame_rgb))
+            status, payload = conn.recv()
+            break
+        except (EOFError, OSError):
+            # server restarted – drop the stale connection and retry once
+            conn.close()
+            _client_state.conn = None
+            if attempt:
+                raise
+    if status != "ok":
+        raise RuntimeError(f"Inference server error: {payload}")
+    return payload
+
+
+def _handle_connection(conn) -> None:
+    with conn:
+        while True:
+            try:
+                op, frame_rgb = conn.recv()
+            except EOFError:
+                return
+            try:
+                conn.send(("ok", _LOCAL_OPS[op](frame_rgb)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+
+
+def serve(address: str | None = None) -> None:
+    """Run the inference server until interrupted; one thread per client worker."""
+    address = address or settings.PROCTORING_INFERENCE_SOCKET
+    for name in _SERVED_MODELS:
+        get_pool(name).preload()
+    with Listener(address, family="AF_UNIX", authkey=_authkey()) as listener:
+        print(f"[INFO] Inference server listening on {address}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle_connection, args=(conn,), daemon=True).start()
+
+
+def init_worker_process() -> None:
+    """Prepare a single-task worker process (users.proctoring.process_pool).
+
+    Disables micro-batching and loads and warms one instance of every model up
+    front (only the local ones when detection is delegated to the inference server).
+    """
+    global _batching_enabled
+    _batching_enabled = False
+    local = ("face_detection",) if settings.PROCTORING_INFERENCE_SOCKET else tuple(_FACTORIES)
+    for name in local:
+        with get_pool(name).checkout():
+            pass
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+
+def _run(op: str, frame_rgb: np.ndarray):
+    if settings.PROCTORING_INFERENCE_SOCKET:
+        return _remote_call(op, frame_rgb)
+    return _LOCAL_OPS[op](frame_rgb)
+
+
+def detect_phone_boxes(frame_rgb: np.ndarray) -> np.ndarray:
+    """YOLO boxes as an ``(N, 6)`` array: x1, y1, x2, y2, confidence, class id."""
+    return _run("phone", frame_rgb)
+
+
+def face_mesh_landmarks(frame_rgb: np.ndarray) -> np.ndarray | None:
+    """FaceMesh landmarks of the first face as an ``(478, 3)`` array, or None."""
+    return _run("face_mesh", frame_rgb)
@@ -0,0 +1,97 @@
+"""Process pool for the CPU-bound work of the async proctoring views.
+
+YOLO, FaceMesh, dlib and the VAD hold the GIL for most of a frame, so the async
+views hand the raw upload to a ``ProcessPoolExecutor`` instead of a thread and
+keep the event loop free for other requests. Workers are spawned (not forked
+from a threaded server), set up Django and warm their models once in the
+initializer. At most ``PROCTORING_PROCESS_MAX_PENDING`` jobs per web process
+are queued on the pool at a time; further requests wait for a slot, not in
+the executor. The limit is a process-wide semaphore, so it also holds when
+WSGI runs every async view on its own event loop. If a worker dies (OOM,
+a crash in dlib / MediaPipe) the broken pool is replaced and the call retried
+once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from django.conf import settings
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_slots: threading.BoundedSemaphore | None = None
+
+
+def _init_worker() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    import django
+    django.setup()
+
+    from users.proctoring.model_registry import init_worker_process
+    init_worker_process()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PROCTORING_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+    return _executor
+
+
+def _discard_executor(broken: ProcessPoolExecutor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _pending_slots() -> threading.BoundedSemaphore:
+    # threading, not asyncio: asyncio primitives belong to one loop and WSGI runs each async view in its own
+    global _slots
+    if _slots is None:
+        with _executor_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(settings.PROCTORING_PROCESS_MAX_PENDING)
+    return _slots
+
+
+async def _acquire(slots: threading.BoundedSemaphore) -> None:
+    if slots.acquire(blocking=False):
+        return
+    waiter = asyncio.get_running_loop().run_in_executor(None, slots.acquire)
+    try:
+        await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        # the thread still gets the slot eventually; hand it straight back
+        waiter.add_done_callback(lambda _: slots.release())
+        raise
+
+
+async def run(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run the module-level ``fn(*args)`` on the pool and await its result."""
+    slots = _pending_slots()
+    await _acquire(slots)
+    try:
+        loop = asyncio.get_running_loop()
+        executor = get_executor()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            return await loop.run_in_executor(get_executor(), fn, *args)
+    finally:
+        slots.release()
@@ -0,0 +1,164 @@
+"""Short-lived proctoring state (debounce windows, mouth open/closed, audio session, frame cascade).
+
+This used to live in ``TempFaceEventState`` rows, which meant several ORM
+round trips per frame. It is now kept in the ``"proctoring"`` cache alias:
+an in-process LocMem LRU by default, or Redis when ``PROCTORING_REDIS_URL``
+is set so that every worker sees the same state. Every key carries a TTL, so
+abandoned attempts clean themselves up.
+
+The LocMem default is only correct with a single web worker. With several,
+the mouth state written by ``live_face_check`` in one worker is invisible to
+``live_audio_check`` in another (the DB rows used to be shared), and debounce
+windows are opened once per worker. ``users.checks`` warns when LocMem is
+combined with ``WEB_CONCURRENCY`` > 1. ``scripts/fake_redis_server.py`` is a
+stand-in for trying the Redis path locally.
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+# debounce windows are at most a few seconds; this only reaps abandoned attempts
+STATE_TTL_SECONDS = 3 * 60 * 60
+MOUTH_STATE_TTL_SECONDS = 15
+# a request that dies while taking audio counters blocks the attempt at most this long
+TAKE_LOCK_SECONDS = 30
+
+
+def _store():
+    return caches["proctoring"]
+
+
+def _key(kind: str, user_id: int, assignment_id: int, attempt_no: int, suffix: str = "") -> str:
+    return f"proctoring:{kind}:{user_id}:{assignment_id}:{attempt_no}:{suffix}"
+
+
+def debounce(
+    user_id: int,
+    assignment_id: int,
+    attempt_no: int,
+    event_type: str,
+    seconds: float,
+    *,
+    reset_on_fire: bool = True,
+) -> bool:
+    """Return **True** once ``event_type`` has been seen continuously for ``seconds``.
+
+    The first sighting only opens the window. With ``reset_on_fire`` the window is
+    closed when it fires, so the event has to persist another ``seconds`` to fire again;
+    otherwise it keeps firing until the key expires.
+    """
+    store = _store()
+    key = _key("debounce", user_id, assignment_id, attempt_no, event_type)
+    now = time.time()
+
+    # add() is atomic (SET NX on Redis): exactly one request opens the window
+    if store.add(key, now, STATE_TTL_SECONDS):
+        return False
+
+    first_seen = store.get(key)
+    if first_seen is None or now - first_seen <= seconds:
+        return False
+
+    if reset_on_fire:
+        # only the request that actually removes the key gets to fire
+        return bool(store.delete(key))
+    return True
+
+
+def set_mouth_state(user_id: int, assignment_id: int, attempt_no: int, mouth_open: bool) -> None:
+    _store().set(
+        _key("mouth", user_id, assignment_id, attempt_no),
+        (mouth_open, time.time()),
+        MOUTH_STATE_TTL_SECONDS,
+    )
+
+
+def get_mouth_state(user_id: int, assignment_id: int, attempt_no: int, max_age: float = MOUTH_STATE_TTL_SECONDS) -> bool | None:
+    """Last seen mouth state if it is fresher than ``max_age`` seconds, else None."""
+    entry = _store().get(_key("mouth", user_id, assignment_id, attempt_no))
+    if entry is None:
+        return None
+    mouth_open, seen_at = entry
+    if time.time() - seen_at >= max_age:
+        return None
+    return mouth_open
+
+
+def incr_audio_counters(user_id: int, assignment_id: int, attempt_no: int, **deltas: int) -> dict:
+    """Add ``deltas`` to the attempt's audio counters and return their new values.
+
+    Each counter is its own key changed with ``incr`` (INCRBY on Redis), so
+    overlapping chunks of one attempt never overwrite each other's counts.
+    """
+    store = _store()
+    values = {}
+    for name, delta in deltas.items():
+        key = _key("audio", user_id, assignment_id, attempt_no, name)
+        try:
+            values[name] = store.incr(key, delta)
+        except ValueError:
+            store.add(key, 0, STATE_TTL_SECONDS)
+            values[name] = store.incr(key, delta)
+    return values
+
+
+def take_audio_counters(user_id: int, assignment_id: int, attempt_no: int, *names: str, wait: float = 0.0) -> dict | None:
+    """Read ``names`` and subtract what was read, so every delta is handed out once.
+
+    Only one caller per attempt takes at a time; counts added meanwhile stay for
+    the next one. Returns None if another caller still holds the attempt after
+    ``wait`` seconds.
+    """
+    store = _store()
+    lock = _key("audio", user_id, assignment_id, attempt_no, "taking")
+    deadline = time.monotonic() + wait
+    while not store.add(lock, 1, TAKE_LOCK_SECONDS):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)
+    try:
+        keys = {name: _key("audio", user_id, assignment_id, attempt_no, name) for name in names}
+        current = store.get_many(keys.values())
+        taken = {}
+        for name, key in keys.items():
+            taken[name] = current.get(key) or 0
+            if taken[name]:
+                store.decr(key, taken[name])
+        return taken
+    finally:
+        store.delete(lock)
+
+
+def get_audio_fields(user_id: int, assignment_id: int, attempt_no: int, *names: str) -> dict:
+    keys = {name: _key("audio", user_id, assignment_id, attempt_no, name) for name in names}
+    current = _store().get_many(keys.values())
+    return {name: current.get(key) for name, key in keys.items()}
+
+
+def set_audio_fields(user_id: int, assignment_id: int, attempt_no: int, **values) -> None:
+    _store().set_many(
+        {_key("audio", user_id, assignment_id, attempt_no, name): value for name, value in values.items()},
+        STATE_TTL_SECONDS,
+    )
+
+
+def claim_interval(user_id: int, assignment_id: int, attempt_no: int, name: str, seconds: float) -> bool:
+    """True for the first caller in every ``seconds`` window (per attempt and ``name``)."""
+    return _store().add(_key("interval", user_id, assignment_id, attempt_no, name), 1, seconds)
+
+
+def is_shared() -> bool:
+    """Whether every worker sees the same state (False for the per-process LocMem default)."""
+    return not isinstance(_store(), LocMemCache)
+
+
+def get_cascade_state(user_id: int, assignment_id: int, attempt_no: int):
+    return _store().get(_key("cascade", user_id, assignment_id, attempt_no))
+
+
+def set_cascade_state(user_id: int, assignment_id: int, attempt_no: int, state) -> None:
+    _store().set(_key("cascade", user_id, assignment_id, attempt_no), state, STATE_TTL_SECONDS)
@@ -0,0 +1,164 @@
+"""Binary WebSocket channel for webcam frames.
+
+Instead of one base64 JSON POST per frame, the browser keeps one socket open per
+exam attempt (or lecture session) and sends raw JPEG bytes. The connection
+authenticates once with the first text message ``{"type": "auth", "token": <JWT>}``
+and keeps the assignment context in the handler, so every frame skips auth,
+the assignment lookup and the base64 round trip. Verdicts are pushed back on
+the same socket as JSON text messages.
+
+Served by ``backend.asgi`` (plain ASGI, no Channels); the routes are in
+``WEBSOCKET_ROUTES`` there.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from users.models.tests import TestAssignment
+from users.views.webcamera_proctoring_view import check_exam_frame, looking_down_allowed
+
+AUTH_TIMEOUT_SECONDS = 10
+MAX_FRAME_BYTES = 2 * 1024 * 1024
+
+# application close codes (4000-4999)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_TOO_LARGE = 4413
+
+_jwt = JWTAuthentication()
+
+
+def _user_from_token(raw_token: str):
+    try:
+        user = _jwt.get_user(_jwt.get_validated_token(raw_token.encode()))
+    except AuthenticationFailed:
+        return None
+    return user if user.is_active else None
+
+
+class FrameSocket:
+    """One WebSocket connection: auth handshake, then a frame / verdict loop.
+
+    Subclasses implement ``setup`` (load the connection context, False rejects
+    the connection) and ``on_frame`` (return the verdict for one JPEG), and may
+    handle JSON control messages in ``on_message``.
+    """
+
+    def __init__(self, scope, receive, send, **route_kwargs):
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self.route_kwargs = route_kwargs
+        self.user = None
+
+    # -- ASGI plumbing ---------------------------------------------------
+
+    async def send_json(self, payload: Dict[str, Any]) -> None:
+        await self._send({"type": "websocket.send", "text": json.dumps(payload)})
+
+    async def close(self, code: int = 1000) -> None:
+        await self._send({"type": "websocket.close", "code": code})
+
+    async def __call__(self) -> None:
+        message = await self._receive()
+        if message["type"] != "websocket.connect":
+            return
+        await self._send({"type": "websocket.accept"})
+        try:
+            if await self._handshake():
+                await self._loop()
+        finally:
+            await sync_to_async(close_old_connections)()
+
+    async def _handshake(self) -> bool:
+        try:
+            message = await asyncio.wait_for(self._receive(), AUTH_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            await self.close(CLOSE_UNAUTHORIZED)
+            return False
+        if message["type"] == "websocket.disconnect":
+            return False
+
+        try:
+            auth = json.loads(message.get("text") or "")
+        except ValueError:
+            auth = {}
+        if auth.get("type") != "auth" or not auth.get("token"):
+            await self.close(CLOSE_UNAUTHORIZED)
+            return False
+
+        self.user = await sync_to_async(_user_from_token)(auth["token"])
+        if self.user is None:
+            await self.close(CLOSE_UNAUTHORIZED)
+            return False
+        if not await self.setup(auth):
+            await self.close(CLOSE_FORBIDDEN)
+            return False
+        await self.send_json({"type": "ready"})
+        return True
+
+    async def _loop(self) -> None:
+        while True:
+            message = await self._receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            frame = message.get("bytes")
+            if frame is not None:
+                if len(frame) > MAX_FRAME_BYTES:
+                    await self.close(CLOSE_TOO_LARGE)
+                    return
+                try:
+                    verdict = await self.on_frame(frame)
+                except Exception as e:
+                    print(f"[ERROR] WebSocket frame analysis failed: {e}")
+                    verdict = {"error": "analysis_failed"}
+                await self.send_json({"type": "verdict", **verdict})
+                continue
+
+            try:
+                payload = json.loads(message.get("text") or "")
+            except ValueError:
+                continue
+            await self.on_message(payload)
+
+    # -- hooks -------------------------------------------------------------
+
+    async def setup(self, auth: Dict[str, Any]) -> bool:
+        return True
+
+    async def on_frame(self, frame: bytes) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def on_message(self, payload: Dict[str, Any]) -> None:
+        pass
+
+
+class ExamFrameSocket(FrameSocket):
+    """``/ws/proctoring/exam/<assignment_id>/`` – live face check for one attempt.
+
+    ``{"type": "question", "question_id": ...}`` updates the question context.
+    """
+
+    async def setup(self, auth: Dict[str, Any]) -> bool:
+        self.assignment = await TestAssignment.objects.select_related("test").filter(
+            id=self.route_kwargs["assignment_id"], student=self.user
+        ).afirst()
+        self.looking_down_allowed = await looking_down_allowed(auth.get("question_id"))
+        return self.assignment is not None
+
+    async def on_message(self, payload: Dict[str, Any]) -> None:
+        if payload.get("type") == "question":
+            self.looking_down_allowed = await looking_down_allowed(payload.get("question_id"))
+
+    async def on_frame(self, frame: bytes) -> Dict[str, Any]:
+        verdict = await check_exam_frame(self.user, self.assignment, frame, self.looking_down_allowed)
+        return verdict if verdict is not None else {"error": "Invalid image"}
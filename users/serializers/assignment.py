@@ -26,6 +26,7 @@ class ProfessorAssignmentSerializer(serializers.ModelSerializer):
             "auto_score",
             "ai_cheating",
             "ai_probability",
+            "ai_status",
             "report_url",
             "answers",
         ]
@@ -23,7 +23,8 @@ class AssignmentListSerializer(serializers.ModelSerializer):
             "started_at", "finished_at",
             "auto_score", "manual_score",
             "student_email", "student_full_name",
-            "status"
+            "status",
+            "ai_status", "ai_cheating", "ai_probability",
         ]
 
     def get_student_full_name(self, obj):
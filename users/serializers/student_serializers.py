@@ -4,7 +4,9 @@ from users.models.questions import Question, AnswerOption
 from users.models.tests import TestAssignment, StudentAnswer, StudentActivityLog
 from django.utils.dateparse import parse_duration
 from django.utils import timezone
-from ai_models.evaluation_engine import evaluate_assignment
+from ai_models.evaluation_engine import evaluate_assignment_job
+from users.jobs import enqueue
+from users.proctoring import audio_session
 
 class StudentCourseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -100,10 +102,21 @@ class SubmitAnswersSerializer(serializers.Serializer):
                         else:
                             pass
                 assignment.auto_score = round(total_score,2)
+        if test.has_ai_assistent:
+            assignment.ai_status = "queued"
         assignment.save()
-        
+
+        # the last chunks' deltas are only in the cache until the next timed flush
+        if test.allow_sound_analysis:
+            audio_session.flush(assignment)
+
+        # verdict, SHAP plot and PDF are built by the job worker; professors poll ai_status
         if test.has_ai_assistent:
-            evaluate_assignment(assignment)
+            enqueue(
+                evaluate_assignment_job,
+                dedup_key=f"evaluate:{assignment.id}:{assignment.attempt_no}",
+                assignment_id=assignment.id,
+            )
 
         return {
             "status": "submitted",
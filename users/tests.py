@@ -1,3 +1,152 @@
-from django.test import TestCase
+import importlib.util
+import threading
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from scripts.fake_redis_server import make_server
+from users.proctoring import state_store
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+IDS = (7, 42, 1)  # user, assignment, attempt
+
+
+class StateStoreTests:
+    """users.proctoring.state_store against one kind of "proctoring" cache."""
+
+    def proctoring_cache(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        override = self.settings(CACHES={"default": LOCMEM, "proctoring": self.proctoring_cache()})
+        override.enable()
+        self.addCleanup(override.disable)
+        caches["proctoring"].clear()
+
+        patcher = mock.patch("users.proctoring.state_store.time", wraps=state_store.time)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.at(1000.0)
+
+    def at(self, now):
+        self.clock.time.return_value = now
+
+    def test_debounce_fires_once_the_event_persisted(self):
+        self.assertFalse(state_store.debounce(*IDS, "gaze_left", 5))
+        self.at(1004.0)
+        self.assertFalse(state_store.debounce(*IDS, "gaze_left", 5))
+        self.at(1006.0)
+        self.assertTrue(state_store.debounce(*IDS, "gaze_left", 5))
+
+    def test_debounce_reset_on_fire_starts_a_new_window(self):
+        state_store.debounce(*IDS, "gaze_left", 5)
+        self.at(1006.0)
+        self.assertTrue(state_store.debounce(*IDS, "gaze_left", 5))
+        self.at(1007.0)
+        self.assertFalse(state_store.debounce(*IDS, "gaze_left", 5))
+        self.at(1013.0)
+        self.assertTrue(state_store.debounce(*IDS, "gaze_left", 5))
+
+    def test_debounce_without_reset_keeps_firing(self):
+        state_store.debounce(*IDS, "voice_detected", 5, reset_on_fire=False)
+        for now in (1006.0, 1007.0, 1100.0):
+            self.at(now)
+            self.assertTrue(state_store.debounce(*IDS, "voice_detected", 5, reset_on_fire=False))
+
+    def test_debounce_windows_are_per_event_and_attempt(self):
+        state_store.debounce(*IDS, "gaze_left", 5)
+        self.at(1006.0)
+        self.assertFalse(state_store.debounce(*IDS, "gaze_right", 5))
+        self.assertFalse(state_store.debounce(7, 42, 2, "gaze_left", 5))
+        self.assertTrue(state_store.debounce(*IDS, "gaze_left", 5))
+
+    def test_mouth_state_expires(self):
+        self.assertIsNone(state_store.get_mouth_state(*IDS))
+        state_store.set_mouth_state(*IDS, True)
+
+        self.at(1004.0)
+        self.assertTrue(state_store.get_mouth_state(*IDS, max_age=5))
+        self.at(1006.0)
+        self.assertIsNone(state_store.get_mouth_state(*IDS, max_age=5))
+        self.assertTrue(state_store.get_mouth_state(*IDS))
+        self.at(1000.0 + state_store.MOUTH_STATE_TTL_SECONDS)
+        self.assertIsNone(state_store.get_mouth_state(*IDS))
+
+    def test_mouth_state_latest_write_wins(self):
+        state_store.set_mouth_state(*IDS, True)
+        self.at(1001.0)
+        state_store.set_mouth_state(*IDS, False)
+        self.assertIs(state_store.get_mouth_state(*IDS), False)
+
+    def test_audio_counters_take_hands_out_each_delta_once(self):
+        self.assertEqual(state_store.incr_audio_counters(*IDS, frames=100, voiced=30), {"frames": 100, "voiced": 30})
+        state_store.incr_audio_counters(*IDS, frames=100)
+
+        self.assertEqual(state_store.take_audio_counters(*IDS, "frames", "voiced"), {"frames": 200, "voiced": 30})
+        self.assertEqual(state_store.take_audio_counters(*IDS, "frames", "voiced"), {"frames": 0, "voiced": 0})
+        self.assertEqual(state_store.incr_audio_counters(*IDS, frames=5), {"frames": 5})
+
+    def test_audio_counters_do_not_lose_concurrent_increments(self):
+        def add():
+            for _ in range(50):
+                state_store.incr_audio_counters(*IDS, frames=1)
+
+        threads = [threading.Thread(target=add) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(state_store.take_audio_counters(*IDS, "frames"), {"frames": 400})
+
+    def test_take_waits_for_the_other_taker(self):
+        lock = state_store._key("audio", *IDS, "taking")
+        caches["proctoring"].add(lock, 1, 30)
+        state_store.incr_audio_counters(*IDS, frames=3)
+
+        self.assertIsNone(state_store.take_audio_counters(*IDS, "frames"))
+        caches["proctoring"].delete(lock)
+        self.assertEqual(state_store.take_audio_counters(*IDS, "frames"), {"frames": 3})
+
+
+class LocMemStateStoreTests(StateStoreTests, SimpleTestCase):
+    def proctoring_cache(self):
+        return {**LOCMEM, "LOCATION": "proctoring-tests"}
+
+    def test_locmem_is_not_shared(self):
+        self.assertFalse(state_store.is_shared())
+
+
+@skipUnless(importlib.util.find_spec("redis"), "redis-py is not installed")
+class RedisStateStoreTests(StateStoreTests, SimpleTestCase):
+    """The Redis path, against scripts/fake_redis_server.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = make_server()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def proctoring_cache(self):
+        return {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": self.server.url}
+
+    def test_redis_is_shared(self):
+        self.assertTrue(state_store.is_shared())
+
+    def test_keys_carry_a_ttl(self):
+        state_store.set_mouth_state(*IDS, True)
+        state_store.debounce(*IDS, "gaze_left", 5)
+
+        ttls = {key: self.server.cmd_ttl(key) for key in self.server.data}
+        mouth = [ttl for key, ttl in ttls.items() if b"proctoring:mouth" in key]
+        debounce = [ttl for key, ttl in ttls.items() if b"proctoring:debounce" in key]
+        self.assertEqual(len(mouth), 1)
+        self.assertTrue(0 < mouth[0] <= state_store.MOUTH_STATE_TTL_SECONDS)
+        self.assertEqual(len(debounce), 1)
+        self.assertTrue(0 < debounce[0] <= state_store.STATE_TTL_SECONDS)
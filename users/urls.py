@@ -21,14 +21,14 @@ from .views.attachments_view import QuestionAttachmentAPIView
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views.test_assignment_view import TestAssignmentDetailView
 from .views.face_login_admin import face_login_react
-from .views.webcamera_proctoring_view import live_face_check
+from .views.webcamera_proctoring_view import live_face_check, live_face_check_async
 from .views.student_view import StudentCoursesAPIView, StudentActiveTestsGroupedByCourseAPIView
 from .views.submit_view import SubmitAnswersView
-from .views.mouse_keyboard_view import mouse_keyboard_check
-from .views.audio_analysis import live_audio_check
+from .views.mouse_keyboard_view import mouse_keyboard_check, mouse_keyboard_batch
+from .views.audio_analysis import live_audio_check, live_audio_check_async
 from .views.professor_marks_view import ProfessorMarksViewSet
-from .views.marks import MarksListAPIView, MarksAssignmentsAPIView
-
+from .views.marks import MarksListAPIView, MarksAssignmentsAPIView, MarksAIStatusAPIView
+from django.conf import settings
 
 router = DefaultRouter()
 router.register(r'questions', QuestionViewApi, basename='questions')
@@ -48,9 +48,10 @@ urlpatterns = [
     path("questions/<int:question_id>/attachments/", QuestionAttachmentAPIView.as_view(), name="upload-question-attachment"),
     path('tests/<int:test_id>/questions/', TestQuestionsByTestIdAPIView.as_view(), name='test-questions-by-test'),
     path("face-login/", face_login_react, name="face-login-react"),
-    path("proctoring/live-face-check/", live_face_check, name = "live_face_check"),
+    path("proctoring/live-face-check/", live_face_check_async if settings.PROCTORING_ASYNC_VIEWS else live_face_check, name = "live_face_check"),
     path("proctoring/mouse_keyboard_check/", mouse_keyboard_check, name = "mouse_keyboard_check"),
-    path("proctoring/live-audio-check/", live_audio_check, name="live_audio_check"),
+    path("proctoring/mouse_keyboard_batch/", mouse_keyboard_batch, name = "mouse_keyboard_batch"),
+    path("proctoring/live-audio-check/", live_audio_check_async if settings.PROCTORING_ASYNC_VIEWS else live_audio_check, name="live_audio_check"),
     path("dashboard/student-courses/", StudentCoursesAPIView.as_view(), name="student-dashboard-courses"),
     path("student/tests-by-course/", StudentActiveTestsGroupedByCourseAPIView.as_view(), name="student-tests-by-course"),
     path("test-assignments/<int:assignment_id>/questions/", AssignedTestQuestionsAPIView.as_view(), name="assigned-test-questions"),
@@ -58,6 +59,7 @@ urlpatterns = [
     path("submit-answers/", SubmitAnswersView.as_view(), name="submit-answers"),
     path("marks/", MarksListAPIView.as_view(), name="marks-list"),
     path("marks/<int:test_id>/", MarksAssignmentsAPIView.as_view(), name="marks-detail"),
+    path("marks/<int:test_id>/ai-status/", MarksAIStatusAPIView.as_view(), name="marks-ai-status"),
     path("assignments/<int:pk>/review/",AssignmentReviewAPIView.as_view(), name = "assignment-review"),
     path("assignments/progress/", AssignmentProgressAPIView.as_view(), name="assignment-progress"),
     path("assignments/overall-progress/", OverallProgressAPIView.as_view()),
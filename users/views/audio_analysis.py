@@ -1,148 +1,184 @@
-import os
 import io
 import webrtcvad
 import numpy as np
-import tempfile
 import subprocess
-from datetime import timedelta
-from django.utils import timezone
+from math import gcd
+from pathlib import Path
+from django.conf import settings
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from users.models.tests import TestAssignment, StudentActivityLog, TempFaceEventState, AudioAnalysis
-from scipy.signal import resample
-import soundfile as sf
-from django.db.models import Q
-from django.db import IntegrityError
+from asgiref.sync import sync_to_async
+from users.models.tests import TestAssignment, StudentActivityLog
+from users.proctoring import audio_session, process_pool, state_store
+from users.proctoring.async_auth import async_jwt_post
+from scipy.signal import resample_poly
+
+try:
+    import av  # PyAV: decodes in-process, no ffmpeg subprocess
+    HAVE_PYAV = True
+except ImportError:
+    HAVE_PYAV = False
+
+TARGET_RATE = 16000
+FRAME_MS = 30
+FRAME_LEN = TARGET_RATE * FRAME_MS // 1000
+FRAME_BYTES = FRAME_LEN * 2  # int16
+# RMS below this (about -60 dBFS) is treated as silence without asking the VAD
+SILENCE_RMS = 30.0
+EBML_MAGIC = b'\x1a\x45\xdf\xa3'
+
+
+def _decode_pyav(audio_bytes):
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=TARGET_RATE)
+    chunks = []
+    with av.open(io.BytesIO(audio_bytes), mode="r") as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+    for out in resampler.resample(None):  # flush
+        chunks.append(out.to_ndarray().reshape(-1))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+
+
+def _decode_ffmpeg_pipe(audio_bytes):
+    result = subprocess.run(
+        [
+            settings.FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(TARGET_RATE), "-ac", "1",
+            "pipe:1",
+        ],
+        input=audio_bytes,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        print("[ERROR] ffmpeg stderr:", result.stderr.decode(errors="replace"))
+        raise RuntimeError("ffmpeg conversion failed")
+    return np.frombuffer(result.stdout, dtype=np.int16)
 
-FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
 
-def convert_webm_to_wav(audio_bytes):
-    if len(audio_bytes) < 5000 or not audio_bytes.startswith(b'\x1a\x45\xdf\xa3'):
+def decode_webm_to_pcm(audio_bytes):
+    """Decode a WebM/Opus chunk straight to 16 kHz mono int16 PCM, without temp files."""
+    if len(audio_bytes) < 5000 or not audio_bytes.startswith(EBML_MAGIC):
         print("[WARN] Audio file too short or malformed")
         raise RuntimeError("Audio too short")
 
-    if not audio_bytes.startswith(b'\x1a\x45\xdf\xa3'):
-        print("[ERROR] Not a valid EBML header - likely not a proper WebM file")
-        raise RuntimeError("Invalid WebM header")
+    if HAVE_PYAV and settings.AUDIO_DECODER != "ffmpeg":
+        return _decode_pyav(audio_bytes)
+    return _decode_ffmpeg_pipe(audio_bytes)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as in_file:
-        in_file.write(audio_bytes)
-        in_file.flush()
-        webm_path = in_file.name
+def log_event(user, assignment, attempt_no, event_type, debounce_seconds=10):
+    # keeps firing once the window has passed (the old row was never deleted)
+    return state_store.debounce(
+        user.id, assignment.id, attempt_no, event_type, debounce_seconds, reset_on_fire=False
+    )
 
-    # DEBUG: keep file for inspection
-    print(f"[DEBUG] Saved WebM file at: {webm_path}")
 
-    wav_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    wav_file.close()
+def get_mouth_state(user, assignment, max_age=15):
+    return state_store.get_mouth_state(user.id, assignment.id, assignment.attempt_no, max_age=max_age)
 
-    print(f"[DEBUG] Running ffmpeg on: {webm_path}")
-    result = subprocess.run(
-        [FFMPEG_PATH, "-y", "-i", webm_path, "-ar", "16000", "-ac", "1", "-f", "wav", wav_file.name],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
+def to_pcm16(waveform, sample_rate):
+    """Contiguous mono int16 at TARGET_RATE; other rates go through polyphase resampling."""
+    waveform = np.asarray(waveform)
+    scale = 1.0 if np.issubdtype(waveform.dtype, np.integer) else 32767.0
+    if waveform.ndim > 1:
+        waveform = waveform.mean(axis=1)
+    if sample_rate != TARGET_RATE:
+        g = gcd(int(sample_rate), TARGET_RATE)
+        waveform = resample_poly(waveform.astype(np.float32), TARGET_RATE // g, int(sample_rate) // g)
+    if waveform.dtype != np.int16:
+        waveform = np.clip(waveform * scale, -32768, 32767).astype(np.int16)
+    return np.ascontiguousarray(waveform)
 
-    if result.returncode != 0:
-        print("[ERROR] ffmpeg stderr:", result.stderr.decode())
-        print("[ERROR] ffmpeg failed with WebM file at:", webm_path)
-        raise RuntimeError("ffmpeg conversion failed")
 
-    try:
-        os.remove(webm_path)
-    except Exception as e:
-        print(f"[WARN] Couldn't delete temp .webm file: {e}")
+def vad_frames(pcm, aggressiveness=2):
+    """Per-frame voiced flags (one per FRAME_MS) for 16 kHz int16 PCM.
 
-    with open(wav_file.name, "rb") as f:
-        wav_bytes = f.read()
+    Frames are memoryview slices of the one PCM buffer, so nothing is copied per frame;
+    near-silent frames are ruled out with a vectorized energy check before the VAD.
+    """
+    n_frames = len(pcm) // FRAME_LEN
+    flags = np.zeros(n_frames, dtype=bool)
+    if n_frames == 0:
+        return flags
 
-    try:
-        os.remove(wav_file.name)
-    except Exception as e:
-        print(f"[WARN] Couldn't delete temp .wav file: {e}")
-
-    return wav_bytes
+    frames = pcm[:n_frames * FRAME_LEN].reshape(n_frames, FRAME_LEN)  # view, no copy
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    candidates = np.flatnonzero(rms >= SILENCE_RMS)
 
-from django.db import transaction
+    vad = webrtcvad.Vad(aggressiveness)
+    buf = memoryview(pcm).cast("B")
+    for i in candidates:
+        start = i * FRAME_BYTES
+        flags[i] = vad.is_speech(buf[start:start + FRAME_BYTES], TARGET_RATE)
+    return flags
 
-def log_event(user, assignment, attempt_no, event_type, debounce_seconds=10):
-    now = timezone.now()
-
-    with transaction.atomic():  
-        try:
-            event = TempFaceEventState.objects.select_for_update().get(
-                user=user,
-                assignment=assignment,
-                attempt_no=attempt_no,
-                event_type=event_type,
-            )
-            if now - event.first_seen > timedelta(seconds=debounce_seconds):
-                #event.delete()
-                return True
-            else:
-                event.last_seen = now
-                event.save(update_fields=["last_seen"])
-                return False
-        except TempFaceEventState.DoesNotExist:
-            TempFaceEventState.objects.create(
-                user=user,
-                assignment=assignment,
-                attempt_no=attempt_no,
-                event_type=event_type,
-            )
-            return False
-
-
-def get_mouth_state(user, assignment):
-    now = timezone.now()
-    mouth_event = TempFaceEventState.objects.filter(
-        Q(user=user) & 
-        Q(assignment=assignment) & 
-        Q(event_type__in=["mouth_open", "mouth_closed"])
-    ).order_by('-last_seen').first()
-
-    if mouth_event and now - mouth_event.last_seen < timedelta(seconds=15):
-        return mouth_event.event_type == "mouth_open"
-    return None
 
 def analyze_voice(audio_bytes):
-    vad = webrtcvad.Vad(2)
-    wav_bytes = convert_webm_to_wav(audio_bytes)
-
-    waveform, sample_rate = sf.read(io.BytesIO(wav_bytes))
-    print(f"[DEBUG] Sample rate: {sample_rate}, Shape: {waveform.shape}")
+    pcm_waveform = to_pcm16(decode_webm_to_pcm(audio_bytes), TARGET_RATE)
+    print(f"[DEBUG] Decoded {len(pcm_waveform)} samples at {TARGET_RATE} Hz")
 
-    if waveform.ndim > 1:
-        waveform = waveform.mean(axis=1)
+    flags = vad_frames(pcm_waveform)
+    if len(flags) == 0:
+        raise RuntimeError("No usable audio frames")
 
-    if sample_rate != 16000:
-        print(f"[DEBUG] Resampling from {sample_rate} Hz to 16000 Hz")
-        num_samples = int(len(waveform) * 16000 / sample_rate)
-        waveform = resample(waveform, num_samples)
+    voiced_frames = int(flags.sum())
+    voiced_ratio = voiced_frames / len(flags)
+    voiced_seconds = voiced_frames * FRAME_MS / 1000
 
-    waveform = np.clip(waveform, -1, 1)
-    pcm_waveform = (waveform * 32768).astype(np.int16)
+    print(f"[DEBUG] Voiced ratio: {voiced_ratio:.2f}, Voiced secs: {voiced_seconds:.2f}")
+    return voiced_ratio, voiced_seconds, flags
+
+AUDIO_EVENTS = {
+    "voice_no_mouth": {
+        "anomaly_score": 0.85,
+        "event_type": "voice_no_mouth",
+        "event_message": "Voice detected but student's mouth appears closed.",
+    },
+    "too_much_talking": {
+        "anomaly_score": 0.6,
+        "event_type": "too_much_talking",
+        "event_message": "Student talked excessively during test (audio-only).",
+    },
+    "voice_detected": {
+        "anomaly_score": 0.4,
+        "event_type": "voice_detected",
+        "event_message": "Voice activity detected (single speaker assumed).",
+    },
+}
+
+
+def audio_events(user, assignment, chunk, voiced_ratio, voiced_secs):
+    """Events to log for one analyzed chunk (debounced); ``chunk`` is the attempt's running audio totals."""
+    events = []
+    mouth_open_recent = get_mouth_state(user, assignment, max_age=5)
+
+    if mouth_open_recent is None:
+        print("[WARN] No mouth state available for current user – skipping mouth detection check.")
+    elif voiced_ratio > 0.2 and voiced_secs > 1.0 and not mouth_open_recent:
+        audio_session.count_mouth_no_voice(assignment)
+        if log_event(user, assignment, assignment.attempt_no, "voice_no_mouth", debounce_seconds=10):
+            events.append("voice_no_mouth")
 
-    frame_ms = 30
-    frame_len = int(16000 * frame_ms / 1000)
-    voiced_frames = 0
-    total_frames = 0
+    if chunk.talk_seconds >= 45:
+        if log_event(user, assignment, assignment.attempt_no, "too_much_talking", debounce_seconds=20):
+            events.append("too_much_talking")
+            audio_session.reset_talk_time(assignment)
 
-    for i in range(0, len(pcm_waveform) - frame_len, frame_len):
-        frame = pcm_waveform[i:i + frame_len]
-        if vad.is_speech(frame.tobytes(), 16000):
-            voiced_frames += 1
-        total_frames += 1
+    if "voice_no_mouth" not in events and voiced_ratio > 0.05 and voiced_secs > 0.5:
+        if log_event(user, assignment, assignment.attempt_no, "voice_detected", debounce_seconds=20):
+            events.append("voice_detected")
+    return events
 
-    if total_frames == 0:
-        raise RuntimeError("No usable audio frames")
 
-    voiced_ratio = voiced_frames / total_frames
-    voiced_seconds = voiced_frames * frame_ms / 1000
+def dump_audio(audio_bytes):
+    dump_path = Path(settings.BASE_DIR) / "debug_logs" / "received_audio.webm"
+    dump_path.parent.mkdir(exist_ok=True)
+    dump_path.write_bytes(audio_bytes)
+    print(f"[DEBUG] Saved audio input to {dump_path}")
 
-    print(f"[DEBUG] Voiced ratio: {voiced_ratio:.2f}, Voiced secs: {voiced_seconds:.2f}")
-    return voiced_ratio, voiced_seconds
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -157,13 +193,8 @@ def live_audio_check(request):
         return JsonResponse({"error": "Missing data"}, status=400)
 
     audio_bytes = audio_file.read()
-
-    # SALVARE TEMPORARA PENTRU DEBUG
-    import os
-    os.makedirs("debug_logs", exist_ok=True)
-    with open("debug_logs/received_audio.webm", "wb") as f:
-        f.write(audio_bytes)
-    print("[DEBUG] Saved audio input to debug_logs/received_audio.webm")
+    if settings.AUDIO_DEBUG_DUMP:
+        dump_audio(audio_bytes)
 
     if len(audio_bytes) < 5000:
         print(f"[WARN] Skipped: file too short ({len(audio_bytes)} bytes)")
@@ -174,86 +205,64 @@ def live_audio_check(request):
     except TestAssignment.DoesNotExist:
         return JsonResponse({"error": "Invalid assignment"}, status=404)
 
-    last_assignment_id = request.session.get("last_assignment_id")
-    if str(last_assignment_id) != str(assignment.id):
-        request.session["talk_time"] = 0
-        request.session["last_assignment_id"] = str(assignment.id)
-
     try:
-        voiced_ratio, voiced_secs = analyze_voice(audio_bytes)
-        audio_entry, created = AudioAnalysis.objects.get_or_create(
+        voiced_ratio, voiced_secs, flags = analyze_voice(audio_bytes)
+    except Exception as e:
+        print(f"[ERROR] Failed to analyze voice: {e}")
+        return JsonResponse({"error": "Audio analysis failed"}, status=200)
+
+    chunk = audio_session.record_chunk(assignment, flags)
+
+    for event_type in audio_events(user, assignment, chunk, voiced_ratio, voiced_secs):
+        StudentActivityLog.objects.create(
             assignment=assignment,
-            attempt_no = assignment.attempt_no,
-            defaults={
-                "voiced_ratio": voiced_ratio,
-                "voiced_seconds": voiced_secs
-            }    
+            attempt_no=assignment.attempt_no,
+            focus_lost_count=1,
+            **AUDIO_EVENTS[event_type],
         )
 
-        if not created:
-            audio_entry.voiced_ratio=voiced_ratio
-            audio_entry.voiced_seconds = voiced_secs
-            audio_entry.save(update_fields=["voiced_ratio","voiced_seconds"])
+    audio_session.save(assignment)
+    return JsonResponse({"success": True})
+
+
+@async_jwt_post
+async def live_audio_check_async(request):
+    """``live_audio_check`` with decoding + VAD awaited on the inference process pool."""
+    user = request.user
+    assignment_id = request.POST.get("assignment_id")
+    audio_file = request.FILES.get("audio_file")
+
+    if not assignment_id or not audio_file:
+        return JsonResponse({"error": "Missing data"}, status=400)
+
+    audio_bytes = audio_file.read()
+    if settings.AUDIO_DEBUG_DUMP:
+        await sync_to_async(dump_audio)(audio_bytes)
+
+    if len(audio_bytes) < 5000:
+        print(f"[WARN] Skipped: file too short ({len(audio_bytes)} bytes)")
+        return JsonResponse({"error": "Audio too short"}, status=200)
+
+    assignment = await TestAssignment.objects.filter(id=assignment_id, student=user).afirst()
+    if assignment is None:
+        return JsonResponse({"error": "Invalid assignment"}, status=404)
+
+    try:
+        voiced_ratio, voiced_secs, flags = await process_pool.run(analyze_voice, audio_bytes)
     except Exception as e:
         print(f"[ERROR] Failed to analyze voice: {e}")
         return JsonResponse({"error": "Audio analysis failed"}, status=200)
 
-    total_talk_time = request.session.get("talk_time", 0)
-    total_talk_time += voiced_secs
-    request.session["talk_time"] = total_talk_time
-
-    mouth_open_recent = TempFaceEventState.objects.filter(
-    user=user,
-    assignment=assignment,
-    attempt_no=assignment.attempt_no,
-    event_type__in=["mouth_open", "mouth_closed"],
-    last_seen__gte=timezone.now() - timedelta(seconds=5)
-    ).order_by('-last_seen').first()
+    chunk = await sync_to_async(audio_session.record_chunk)(assignment, flags)
 
-    voice_no_mouth_logged = False
-
-    if not mouth_open_recent:
-        print("[WARN] No mouth state available for current user – skipping mouth detection check.")
-    elif voiced_ratio > 0.2 and voiced_secs > 1.0 and mouth_open_recent.event_type != "mouth_open":
-        try:
-            analysis = AudioAnalysis.objects.get(assignment=assignment, attempt_no=assignment.attempt_no)
-            analysis.mouth_open_no_voice_count += 1
-            analysis.save(update_fields=["mouth_open_no_voice_count"])
-        except AudioAnalysis.DoesNotExist:
-            pass
-        if log_event(user, assignment, assignment.attempt_no, "voice_no_mouth", debounce_seconds=10):
-            StudentActivityLog.objects.create(
-                assignment=assignment,
-                attempt_no=assignment.attempt_no,
-                focus_lost_count=1,
-                anomaly_score=0.85,
-                event_type="voice_no_mouth",
-                event_message="Voice detected but student's mouth appears closed."
-            )
-            voice_no_mouth_logged = True
-
-    if total_talk_time >= 45:
-        if log_event(user, assignment, assignment.attempt_no, "too_much_talking", debounce_seconds=20):
-            StudentActivityLog.objects.create(
-                assignment=assignment,
-                attempt_no=assignment.attempt_no,
-                focus_lost_count=1,
-                anomaly_score=0.6,
-                event_type="too_much_talking",
-                event_message="Student talked excessively during test (audio-only)."
-            )
-            request.session["talk_time"] = 0 
-
-    if not voice_no_mouth_logged and voiced_ratio > 0.05 and voiced_secs > 0.5:
-        if log_event(user, assignment, assignment.attempt_no, "voice_detected", debounce_seconds=20):
-            StudentActivityLog.objects.create(
-                assignment=assignment,
-                attempt_no=assignment.attempt_no,
-                focus_lost_count=1,
-                anomaly_score=0.4,
-                event_type="voice_detected",
-                event_message="Voice activity detected (single speaker assumed)."
-            )
+    events = await sync_to_async(audio_events)(user, assignment, chunk, voiced_ratio, voiced_secs)
+    for event_type in events:
+        await StudentActivityLog.objects.acreate(
+            assignment=assignment,
+            attempt_no=assignment.attempt_no,
+            focus_lost_count=1,
+            **AUDIO_EVENTS[event_type],
+        )
 
+    await sync_to_async(audio_session.save)(assignment)
     return JsonResponse({"success": True})
-
@@ -13,7 +13,8 @@ from rest_framework.decorators import api_view, throttle_classes, permission_cla
 from users.throttles import SafeLoginThrottle
 from rest_framework.permissions import IsAuthenticated
 from .face_validators import validate_face_image
-import cv2
+from users.proctoring import embeddings
+from users.proctoring.face_analysis import face_locations
 
 @api_view(['GET','POST'])
 @throttle_classes([SafeLoginThrottle])
@@ -51,10 +52,9 @@ def face_login_admin(request):
             if not is_valid:
                 return JsonResponse({"error": result}, status=400)
             
-            img_cv2 = result
-            img_rgb = cv2.cvtColor(img_cv2, cv2.COLOR_BGR2RGB)
-
-            uploaded_encodings = face_recognition.face_encodings(img_rgb)
+            frame = result
+            # validation already located the face; reuse its RGB copy and box
+            uploaded_encodings = face_recognition.face_encodings(frame.rgb, known_face_locations=face_locations(frame))
 
             if len(uploaded_encodings) != 1:
                 return JsonResponse({"error": "Image must contain exactly one face."}, status=400)
@@ -66,6 +66,7 @@ def face_login_admin(request):
                 user.face_encoding = pickle.dumps(uploaded_encoding)
                 user.failed_face_attempts = 0
                 user.save()
+                embeddings.invalidate(user.id)
                 user.backend = 'users.backends.FaceAuthBackend'
                 login(request, user)
                 SafeLoginThrottle.reset(request)
@@ -111,9 +112,8 @@ def face_login_react(request):
             return JsonResponse({"error": result}, status=400)
 
         
-        img_cv2 = result
-        img_rgb = cv2.cvtColor(img_cv2, cv2.COLOR_BGR2RGB)
-        uploaded_encodings = face_recognition.face_encodings(img_rgb)
+        frame = result
+        uploaded_encodings = face_recognition.face_encodings(frame.rgb, known_face_locations=face_locations(frame))
 
         if len(uploaded_encodings) != 1:
             return JsonResponse({"error": "Exactly one face must be present."}, status=400)
@@ -124,6 +124,7 @@ def face_login_react(request):
             user.face_encoding = pickle.dumps(uploaded_encoding)
             user.failed_face_attempts = 0
             user.save()
+            embeddings.invalidate(user.id)
             SafeLoginThrottle.reset(request)
             return JsonResponse({"success": True, "first_time": True})
 
@@ -1,32 +1,30 @@
 import cv2
-import numpy as np
-import face_recognition
+from users.proctoring.face_analysis import face_locations
+from users.proctoring.frames import Frame
 
 def validate_face_image(img_bytes):
-    nparr = np.frombuffer(img_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    """Return ``(True, frame)`` for a usable registration / login photo, else ``(False, message)``."""
+    frame = Frame.decode(img_bytes)
+    if frame is None:
+        return False, "Invalid image."
 
     #blur detection
-    blur_score = cv2.Laplacian(gray,cv2.CV_64F).var()
-    if blur_score < 100:
+    sharpness = frame.memo("laplacian_var", lambda: cv2.Laplacian(frame.gray, cv2.CV_64F).var())
+    if sharpness < 100:
         return False, "Face is too blurry. Please try again."
     
     #saturation
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    saturation= hsv[:,:,1].mean()
+    saturation = frame.hsv[:,:,1].mean()
     if saturation < 30:
         return False, "Image looks washed out. Possible screen replay. Please try again."
     
     #noise check (low->image spoof)
-    noise = cv2.Laplacian(gray, cv2.CV_64F).var()
-    if noise < 50:
+    if sharpness < 50:
         return False, "Low noise level detected. Suspected spoof."
     
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    face_locations = face_recognition.face_locations(img_rgb)
+    found = face_locations(frame)
 
-    if len(face_locations) != 1:
-        return False, f"Exactly one face required. Found: {len(face_locations)}"
+    if len(found) != 1:
+        return False, f"Exactly one face required. Found: {len(found)}"
 
-    return True, img
\ No newline at end of file
+    return True, frame
@@ -68,3 +68,23 @@ class MarksAssignmentsAPIView(APIView):
 
         data = AssignmentListSerializer(assignments, many=True).data
         return Response(data)
+
+
+class MarksAIStatusAPIView(APIView):
+    """Light payload the marks page polls while AI evaluations are still running."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, test_id):
+        user = request.user
+        if user.role != "professor":
+            return Response({"detail": "Forbidden"}, status=403)
+
+        if not Test.objects.filter(id=test_id, professor=user).exists():
+            return Response({"detail": "Not found."}, status=404)
+
+        rows = (
+            TestAssignment.objects
+            .filter(test_id=test_id)
+            .values("id", "ai_status", "ai_cheating", "ai_probability")
+        )
+        return Response(list(rows))
@@ -3,75 +3,57 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
 from users.models.tests import TestAssignment, StudentActivityLog
-from users.models.tests import StudentActivityAnalysis 
+from users.models.tests import StudentActivityAnalysis
+from users.proctoring.activity import FOCUS_LOSS_EVENTS, is_suspicious, record_activity, recompute_analyses
 import json
-from django.db.models import Sum
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 def analyze_assignment_logs(assignment):
-    logs = StudentActivityLog.objects.filter(assignment=assignment,  attempt_no__lte=assignment.attempt_no)
-    esc = logs.filter(event_type="esc_pressed").count()
-    second_screen = logs.filter(event_type="second_screen").count()
-    tab_switches = logs.filter(event_type="tab_hidden").count()
-    window_blurs = logs.filter(event_type="window_blur").count()
-    copy_paste = logs.filter(event_type__in=["copy_event", "paste_event", "cut_event"]).count()/2
-    key_presses = logs.filter(event_type="key_press").count()
-    total_chars = logs.aggregate(Sum("chars_written"))["chars_written__sum"] or 0
-
-    delays = logs.filter(event_type="key_press").values_list("key_delay", flat=True)
-    delays = [d for d in delays if d is not None]
-    avg_delay = sum(delays) / len(delays) if delays else None
-
-    if assignment.test.use_proctoring:
-        is_sus = (
-            esc > 2 or
-            second_screen > 2 or
-            tab_switches > 2 or
-            window_blurs > 2 or
-            (avg_delay is not None and avg_delay < 50)
-        )
-    else:
-        is_sus = False
-
-    analysis, _ = StudentActivityAnalysis.objects.update_or_create(
+    """Recount the analysis row from scratch (ingestion keeps it current incrementally)."""
+    return recompute_analyses([assignment])[0]
+
+
+def finalize_activity_analysis(assignment):
+    """Settle the verdict on the incrementally maintained row at submit time."""
+    analysis = StudentActivityAnalysis.objects.filter(
         assignment=assignment,
         attempt_no=assignment.attempt_no,
-        defaults={
-            "esc_pressed": esc,
-            "second_screen_events": second_screen,
-            "tab_switches": tab_switches,
-            "window_blurs": window_blurs,
-            "total_key_presses": key_presses,
-            "average_key_delay": avg_delay,
-            "copy_paste_events": copy_paste,
-            "total_chars": total_chars,
-            "total_focus_lost": second_screen + window_blurs + tab_switches,
-            "is_suspicious": is_sus
-        }
-    )
+    ).first()
+    if analysis is None:
+        # no events were ingested (or they predate incremental counters)
+        return analyze_assignment_logs(assignment)
 
+    analysis.is_suspicious = is_suspicious(
+        assignment.test,
+        analysis.esc_pressed,
+        analysis.second_screen_events,
+        analysis.tab_switches,
+        analysis.window_blurs,
+        analysis.average_key_delay,
+    )
+    analysis.save(update_fields=["is_suspicious", "analyzed_at"])
     return analysis
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def mouse_keyboard_check(request):
-    user = request.user
-    data = request.data
 
-    assignment_id = data.get("assignment_id")
-    event_type = data.get("event_type")
-    event_message = data.get("event_message", "")
-    anomaly_score = data.get("anomaly_score", 0.1)
+MAX_BATCH_EVENTS = 500
+# client clocks drift; timestamps outside this window fall back to server time
+MAX_CLIENT_TS_SKEW = timedelta(minutes=5)
 
-    if not assignment_id or not event_type:
-        return Response({"error": "Missing required fields."}, status=400)
 
+def _client_timestamp(client_ts, now):
+    """Convert a JS epoch-millis timestamp, rejecting implausible values."""
     try:
-        assignment = TestAssignment.objects.get(id=assignment_id, student=user)
-    except TestAssignment.DoesNotExist:
-        return Response({"error": "Invalid assignment ID or unauthorized."}, status=403)
+        ts = datetime.fromtimestamp(float(client_ts) / 1000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+    if ts > now or now - ts > MAX_CLIENT_TS_SKEW:
+        return now
+    return ts
 
-    key = None      
-    delay = None       
+
+def _build_activity_log(assignment, event_type, event_message, anomaly_score, timestamp):
+    key = None
+    delay = None
 
     char_typed = 0
     if event_type == "key_press":
@@ -82,20 +64,80 @@ def mouse_keyboard_check(request):
             if len(key) == 1 and key.isprintable():
                 char_typed = 1
         except Exception:
-            pass                     
+            pass
 
-    StudentActivityLog.objects.create(
+    return StudentActivityLog(
         assignment=assignment,
         attempt_no=assignment.attempt_no,
-        timestamp=timezone.now(),
+        timestamp=timestamp,
         event_type=event_type,
         event_message=event_message,
         anomaly_score=anomaly_score,
         pressed_key=key,
         key_delay=delay,
-        focus_lost_count=1 if event_type in ["window_blur", "tab_hidden", "second_screen"] else 0,
+        focus_lost_count=1 if event_type in FOCUS_LOSS_EVENTS else 0,
         chars_written=char_typed,
     )
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def mouse_keyboard_check(request):
+    user = request.user
+    data = request.data
+
+    assignment_id = data.get("assignment_id")
+    event_type = data.get("event_type")
+    event_message = data.get("event_message", "")
+    anomaly_score = data.get("anomaly_score", 0.1)
+
+    if not assignment_id or not event_type:
+        return Response({"error": "Missing required fields."}, status=400)
+
+    try:
+        assignment = TestAssignment.objects.get(id=assignment_id, student=user)
+    except TestAssignment.DoesNotExist:
+        return Response({"error": "Invalid assignment ID or unauthorized."}, status=403)
+
+    log = _build_activity_log(assignment, event_type, event_message, anomaly_score, timezone.now())
+    log.save()
+    record_activity(assignment, [log])
+
     return Response({"success": True})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def mouse_keyboard_batch(request):
+    """Ingest a buffered list of keyboard / mouse events in one request."""
+    user = request.user
+    assignment_id = request.data.get("assignment_id")
+    events = request.data.get("events")
+
+    if not assignment_id or not isinstance(events, list):
+        return Response({"error": "Missing required fields."}, status=400)
+    if len(events) > MAX_BATCH_EVENTS:
+        return Response({"error": f"At most {MAX_BATCH_EVENTS} events per batch."}, status=400)
+
+    try:
+        assignment = TestAssignment.objects.get(id=assignment_id, student=user)
+    except TestAssignment.DoesNotExist:
+        return Response({"error": "Invalid assignment ID or unauthorized."}, status=403)
+
+    now = timezone.now()
+    logs = []
+    for event in events:
+        if not isinstance(event, dict) or not event.get("event_type"):
+            continue
+        logs.append(_build_activity_log(
+            assignment,
+            event["event_type"],
+            event.get("event_message", ""),
+            event.get("anomaly_score", 0.1),
+            _client_timestamp(event.get("client_ts"), now),
+        ))
+
+    StudentActivityLog.objects.bulk_create(logs)
+    record_activity(assignment, logs)
+
+    return Response({"success": True, "accepted": len(logs), "rejected": len(events) - len(logs)})
@@ -3,7 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from users.serializers.student_serializers import SubmitAnswersSerializer
 from users.models.tests import TestAssignment
-from users.views.mouse_keyboard_view import analyze_assignment_logs  
+from users.views.mouse_keyboard_view import finalize_activity_analysis  
 
 class SubmitAnswersView(APIView):
     permission_classes = [IsAuthenticated]
@@ -16,7 +16,7 @@ class SubmitAnswersView(APIView):
         try:
             assignment = TestAssignment.objects.select_related("test").get(id=assignment_id, student=request.user)
             if assignment.test.has_ai_assistent:
-                analyze_assignment_logs(assignment)
+                finalize_activity_analysis(assignment)
         except TestAssignment.DoesNotExist:
             pass 
         return Response(result)
@@ -3,9 +3,11 @@
 * One **decision** (\"issue\") per frame – picked by priority
 * Clear helper functions for each detection block
 * Central `add_issue()` collects candidate issues while avoiding duplicates
-* Debounce relies on the existing `log_event()` util you already wrote
+* Debounce / mouth state live in `users.proctoring.state_store` (cache, not DB rows)
 * Keeps existing mouth‑open state tracking (doesn’t trigger an early return)
 * Responds with the highest‑priority issue or `{"success": True}`
+* `live_face_check_async` runs the same detectors on the inference process pool
+* Detector stages are scheduled per frame by `users.proctoring.cascade` (skipped on static frames)
 
 Note – adjust the `PRIORITY` list or `DEBOUNCE_SECONDS` dictionary to taste.
 """
@@ -13,36 +15,30 @@ Note – adjust the `PRIORITY` list or `DEBOUNCE_SECONDS` dictionary to taste.
 from __future__ import annotations
 
 import base64
-import os
-from datetime import timedelta
+import binascii
+import json
 from typing import List, Tuple, Dict, Any
 
-import cv2
-import face_recognition
 import numpy as np
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
-from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from ultralytics import YOLO
-import mediapipe as mp
 
-from users.models.tests import TestAssignment, StudentActivityLog, TempFaceEventState
+from users.models.tests import TestAssignment, StudentActivityLog
 from users.models.questions import Question
+from users.proctoring import cascade, evidence, process_pool, state_store
+from users.proctoring.async_auth import async_jwt_post
+from users.proctoring.embeddings import matches_user
+from users.proctoring.face_analysis import analyze_faces
+from users.proctoring.frames import Frame
+from users.proctoring.model_registry import PHONE_CLASS_ID, detect_phone_boxes, face_mesh_landmarks
 
 # --------------------------------------------------------------------------------------
 # Globals & helpers
 # --------------------------------------------------------------------------------------
 
-os.makedirs("frame_logs", exist_ok=True)
-yolo_model = YOLO("yolov8m.pt")
-
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh_detector = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    refine_landmarks=True,
-)
+# YOLO / FaceMesh live in users.proctoring.model_registry (lazy, pooled per process)
 
 # Issue priority – first match == response sent -------------------------------------------------
 PRIORITY: List[str] = [
@@ -55,6 +51,9 @@ PRIORITY: List[str] = [
     "head_pose_suspicious",
 ]
 
+# Max embedding distance still accepted as the registered student
+FACE_MATCH_TOLERANCE = 0.70
+
 # Custom debounce per issue (seconds)
 DEBOUNCE_SECONDS: Dict[str, int] = {
     "mobile_detected": 5,
@@ -79,12 +78,8 @@ def log_student_event(
     focus_lost_count: int = 1,
     frame: np.ndarray | None = None,
 ) -> None:
-    """Persist an event + optional frame capture to disk."""
-    if frame is not None:
-        ts = timezone.now().strftime("%Y-%m-%d_%H-%M-%S")
-        cv2.imwrite(f"frame_logs/frame_{event_type}_{ts}.jpg", frame)
-
-    StudentActivityLog.objects.create(
+    """Persist an event; the optional frame is written by the background evidence writer."""
+    log = StudentActivityLog.objects.create(
         assignment=assignment,
         attempt_no=attempt_no,
         focus_lost_count=focus_lost_count,
@@ -92,6 +87,8 @@ def log_student_event(
         event_type=event_type,
         event_message=message,
     )
+    if frame is not None:
+        evidence.submit(assignment.id, attempt_no, event_type, frame, activity_log_id=log.id)
 
 
 def debounce_event(
@@ -102,67 +99,45 @@ def debounce_event(
     seconds: int,
 ) -> bool:
     """Return **True** if we're allowed to fire the event now (after debounce)."""
-    now = timezone.now()
-    try:
-        record = TempFaceEventState.objects.get(
-            user=user,
-            assignment=assignment,
-            attempt_no=attempt_no,
-            event_type=event_type,
-        )
-        if now - record.first_seen > timedelta(seconds=seconds):
-            record.delete()
-            return True
-        # update TTL
-        record.last_seen = now
-        record.save(update_fields=["last_seen"])
-        return False
-    except TempFaceEventState.DoesNotExist:
-        TempFaceEventState.objects.create(
-            user=user,
-            assignment=assignment,
-            attempt_no=attempt_no,
-            event_type=event_type,
-        )
-        return False
+    return state_store.debounce(user.id, assignment.id, attempt_no, event_type, seconds)
 
 
 # ----------------------------------------------------------------------
 # Face / gaze / phone detectors (mostly copied from original logic)
 # ----------------------------------------------------------------------
 
-def detect_phone(frame_rgb: np.ndarray) -> bool:
-    result = yolo_model.predict(source=frame_rgb, verbose=False)
-    boxes = result[0].boxes.data.cpu().numpy()
-    # COCO class 67 == cell phone
-    return any(int(b[5]) == 67 for b in boxes)
+def detect_phone(frame: Frame) -> bool:
+    image, _ = frame.for_detector("yolo")
+    boxes = detect_phone_boxes(image)
+    return any(int(b[5]) == PHONE_CLASS_ID for b in boxes)
 
 
-def detect_gaze_direction(img: np.ndarray) -> Tuple[str, str, Any, bool]:
-    """Unchanged gaze + head‑pose logic."""
-    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = face_mesh_detector.process(rgb)
+def detect_gaze_direction(frame: Frame) -> Tuple[str, str, Any, bool]:
+    """Unchanged gaze + head‑pose logic; also returns the FaceMesh landmarks."""
+    # landmarks are normalized, so the downscaled copy gives the same coordinates
+    image, _ = frame.for_detector("face_mesh")
+    landmarks = face_mesh_landmarks(image)
 
-    if not results.multi_face_landmarks:
+    if landmarks is None:
         return "inconclusive", "neutral", None, False
 
-    lm = results.multi_face_landmarks[0].landmark
+    x, y = landmarks[:, 0], landmarks[:, 1]
 
     # helper
     def _norm(a, b) -> float:
         return (a - b) if b != 0 else 0.5
 
     # left eye
-    l_w = lm[133].x - lm[33].x
-    l_x = _norm(lm[468].x - lm[33].x, l_w)
-    l_h = lm[145].y - lm[159].y
-    l_y = _norm(lm[468].y - lm[159].y, l_h)
+    l_w = x[133] - x[33]
+    l_x = _norm(x[468] - x[33], l_w)
+    l_h = y[145] - y[159]
+    l_y = _norm(y[468] - y[159], l_h)
 
     # right eye
-    r_w = lm[263].x - lm[362].x
-    r_x = _norm(lm[473].x - lm[362].x, r_w)
-    r_h = lm[374].y - lm[386].y
-    r_y = _norm(lm[473].y - lm[386].y, r_h)
+    r_w = x[263] - x[362]
+    r_x = _norm(x[473] - x[362], r_w)
+    r_h = y[374] - y[386]
+    r_y = _norm(y[473] - y[386], r_h)
 
     iris_x = l_x if not (0 <= l_x <= 1) else (l_x + r_x) / 2
     iris_y = l_y if not (0 <= l_y <= 1) else (l_y + r_y) / 2
@@ -179,8 +154,8 @@ def detect_gaze_direction(img: np.ndarray) -> Tuple[str, str, Any, bool]:
         gaze = "center"
 
     # head pose rough estimate
-    pitch = lm[152].y - lm[1].y
-    roll = lm[454].y - lm[234].y
+    pitch = y[152] - y[1]
+    roll = y[454] - y[234]
     if abs(roll) > 0.1:
         head_pose = "tilted"
     elif pitch > 0.22:
@@ -191,51 +166,58 @@ def detect_gaze_direction(img: np.ndarray) -> Tuple[str, str, Any, bool]:
         head_pose = "neutral"
 
     # mouth open?
-    mouth_open = (lm[14].y - lm[13].y) > 0.03
-    return gaze, head_pose, results, mouth_open
+    mouth_open = (y[14] - y[13]) > 0.03
+    return gaze, head_pose, landmarks, mouth_open
 
 
 # ----------------------------------------------------------------------
-# The main view — now tidy!
+# Frame analysis (CPU-bound) and issue selection
 # ----------------------------------------------------------------------
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def live_face_check(request):  # noqa: C901  — it *is* complex, sorry pylint
-    """Analyze a single base64 frame and return **at most one** error."""
-    user = request.user
-    data = request.data
+def decode_data_url(data_url: str) -> bytes:
+    _, imgstr = data_url.split(";base64,")
+    return base64.b64decode(imgstr)
+
+
+def analyze_frame(frame: Frame, run_faces: bool = True, run_phone: bool = True) -> Dict[str, Any]:
+    """Run the scheduled detector stages on one frame; the result is plain data (picklable).
+
+    Face/gaze keys are only present when ``run_faces``; ``"phone"`` is None when
+    YOLO did not run.
+    """
+    result: Dict[str, Any] = {"phone": None}
+
+    if run_faces:
+        gaze, head_pose, landmarks, mouth_open = detect_gaze_direction(frame)
+        # one HOG pass, FaceMesh box as fallback
+        face_locations, encodings = analyze_faces(frame, landmarks)
+        result.update(
+            gaze=gaze,
+            head_pose=head_pose,
+            mouth_open=mouth_open,
+            face_count=len(face_locations),
+            encoding_count=len(encodings),
+            encodings=encodings,
+        )
+        # early exit: YOLO cannot change the verdict once a face issue outranks it
+        if outranks(pick_issue(collect_issues(result, True)), "mobile_detected"):
+            run_phone = False
 
-    face_image_data: str | None = data.get("face_image")
-    assignment_id: int | None = data.get("assignment_id")
-    question_id: int | None = data.get("question_id")
+    if run_phone:
+        result["phone"] = detect_phone(frame)
+    return result
 
-    if not face_image_data or not assignment_id:
-        return JsonResponse({"error": "Missing data"}, status=400)
 
-    try:
-        assignment = TestAssignment.objects.get(id=assignment_id, student=user)
-    except TestAssignment.DoesNotExist:
-        return JsonResponse({"error": "Invalid assignment"}, status=404)
+def analyze_frame_bytes(image_bytes: bytes, run_faces: bool = True, run_phone: bool = True) -> Dict[str, Any] | None:
+    """``analyze_frame`` on an encoded image – the process-pool entry point."""
+    frame = Frame.decode(image_bytes)
+    if frame is None:
+        return None
+    return analyze_frame(frame, run_faces, run_phone)
 
-    # question context (is looking‑down allowed?)
-    question_type = None
-    if question_id:
-        question = Question.objects.filter(id=question_id).first()
-        question_type = getattr(question, "type", None)
-    is_looking_down_allowed = question_type in {"code", "open"}
 
-    # ------------------------------------------------------------------
-    # Decode image
-    # ------------------------------------------------------------------
-    _, imgstr = face_image_data.split(";base64,")
-    img_np = np.frombuffer(base64.b64decode(imgstr), np.uint8)
-    frame_bgr = cv2.imdecode(img_np, cv2.IMREAD_COLOR)
-    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-    # ------------------------------------------------------------------
-    # Candidate issue collection
-    # ------------------------------------------------------------------
+def collect_issues(result: Dict[str, Any], is_looking_down_allowed: bool) -> List[str]:
+    """Candidate issues of an analyzed frame, except ``face_mismatch`` (needs the DB)."""
     issues: List[str] = []
 
     def add_issue(issue: str):
@@ -243,12 +225,11 @@ def live_face_check(request):  # noqa: C901  — it *is* complex, sorry pylint
             issues.append(issue)
 
     # 1) Phone detection ------------------------------------------------
-    if detect_phone(frame_rgb):
+    if result["phone"]:
         add_issue("mobile_detected")
 
     # 2) Gaze / head pose ---------------------------------------------
-    gaze, head_pose, mp_results, mouth_open = detect_gaze_direction(frame_bgr)
-
+    gaze = result["gaze"]
     if gaze in {"left", "right"}:
         add_issue("gaze_offscreen")
     elif gaze == "inconclusive":
@@ -256,59 +237,149 @@ def live_face_check(request):  # noqa: C901  — it *is* complex, sorry pylint
     elif gaze == "down" and not is_looking_down_allowed:
         add_issue("gaze_offscreen")
 
-    if head_pose in {"up", "down", "tilted"}:
+    if result["head_pose"] in {"up", "down", "tilted"}:
         add_issue("head_pose_suspicious")
 
-    # 3) Face detection / encoding -------------------------------------
-    face_locations = face_recognition.face_locations(frame_rgb)
-    encodings = face_recognition.face_encodings(frame_rgb)
-
-    if not face_locations and mp_results and mp_results.multi_face_landmarks:
-        h, w, _ = frame_bgr.shape
-        face_locations = [(0, w, h, 0)]  # full frame fallback
-        encodings = face_recognition.face_encodings(frame_rgb, known_face_locations=face_locations)
-
-    if len(encodings) == 0:
+    # 3) Face count -----------------------------------------------------
+    if result["encoding_count"] == 0:
         add_issue("no_face_found")
-    elif len(face_locations) > 1:
+    elif result["face_count"] > 1:
         add_issue("multiple_faces")
-    else:
-        uploaded_encoding = encodings[0]
-        stored_encoding = face_recognition.face_encodings(frame_rgb, [face_locations[0]])[0] if False else None  # placeholder
-        # In prod: stored_encoding = pickle.loads(user.face_encoding)
-        if stored_encoding is not None:
-            match = face_recognition.compare_faces([stored_encoding], uploaded_encoding, tolerance=0.70)[0]
-            if not match:
-                add_issue("face_mismatch")
-
-    # ------------------------------------------------------------------
-    # Decide which issue to act on
-    # ------------------------------------------------------------------
-    chosen_issue: str | None = None
+    return issues
+
+
+def single_face_encoding(result: Dict[str, Any]) -> np.ndarray | None:
+    """The encoding to match against the student, when exactly one face was found."""
+    if result["encoding_count"] == 0 or result["face_count"] > 1:
+        return None
+    return result["encodings"][0]
+
+
+def outranks(issue: str | None, other: str) -> bool:
+    return issue is not None and PRIORITY.index(issue) < PRIORITY.index(other)
+
+
+def pick_issue(issues: List[str]) -> str | None:
     for pr in PRIORITY:
         if pr in issues:
-            chosen_issue = pr
-            break
+            return pr
+    return None
+
+
+ISSUE_MESSAGES: Dict[str, str] = {
+    "multiple_faces": "Detected more than one face in frame.",
+    "mobile_detected": "Mobile phone detected in camera frame.",
+    "no_face_found": "No face detected.",
+    "face_mismatch": "Face does not match the authenticated student.",
+    "gaze_offscreen": "Student appears to be looking away from the screen.",
+    "gaze_unclear": "Unable to determine gaze direction (lighting / glasses).",
+    "head_pose_suspicious": "Student head pose is suspicious.",
+}
+ISSUE_ANOMALY_SCORES: Dict[str, float] = {
+    "multiple_faces": 0.5,
+    "mobile_detected": 1.0,
+    "no_face_found": 0.3,
+    "face_mismatch": 0.5,
+    "gaze_offscreen": 0.4,
+    "gaze_unclear": 0.1,
+    "head_pose_suspicious": 0.2,
+}
+FACE_MATCH_EVENT = {
+    "focus_lost_count": 0,
+    "anomaly_score": 0.0,
+    "event_type": "face_match",
+    "event_message": "Face matches and gaze is on the screen.",
+}
+
+
+# ----------------------------------------------------------------------
+# Adaptive sampling (users.proctoring.cascade)
+# ----------------------------------------------------------------------
+
+def plan_frame(assignment: TestAssignment, thumb: np.ndarray) -> Tuple[cascade.CascadeState, bool, bool]:
+    """Load the attempt's cascade state and decide which detector stages run on this frame."""
+    state = cascade.load(assignment)
+    run_faces, run_phone = cascade.plan(state, thumb, cascade.policy_for(assignment.test))
+    return state, run_faces, run_phone
+
+
+def finish_frame(
+    user,
+    assignment: TestAssignment,
+    state: cascade.CascadeState,
+    result: Dict[str, Any],
+    thumb: np.ndarray,
+    is_looking_down_allowed: bool,
+) -> List[str]:
+    """Fold the stages that ran into the cascade state and return the frame's issues.
+
+    Stages that were skipped keep their last result.
+    """
+    if "gaze" in result:
+        encoding = single_face_encoding(result)
+        # None == no registered face yet, nothing to compare against
+        state.face_mismatch = encoding is not None and matches_user(user, encoding, FACE_MATCH_TOLERANCE) is False
+        state.result = {k: v for k, v in result.items() if k not in ("phone", "encodings")}
+        state.thumb = thumb
+        state.last_full_frame = state.frame_no
+    if result["phone"] is not None:
+        state.phone = result["phone"]
+        state.last_phone_frame = state.frame_no
+    cascade.save(assignment, state)
 
     # Mouth‑open state gets updated regardless of chosen issue ---------
-    mouth_event_type = "mouth_open" if mouth_open else "mouth_closed"
-    TempFaceEventState.objects.update_or_create(
-        user=user,
-        assignment=assignment,
-        attempt_no=assignment.attempt_no,
-        event_type=mouth_event_type,
-        defaults={"last_seen": timezone.now()},
-    )
-    TempFaceEventState.objects.filter(
-        user=user,
-        assignment=assignment,
-        attempt_no=assignment.attempt_no,
-        event_type="mouth_closed" if mouth_open else "mouth_open",
-    ).delete()
+    state_store.set_mouth_state(user.id, assignment.id, assignment.attempt_no, state.result["mouth_open"])
+
+    issues = collect_issues({**state.result, "phone": state.phone}, is_looking_down_allowed)
+    if state.face_mismatch:
+        issues.append("face_mismatch")
+    return issues
+
+
+# ----------------------------------------------------------------------
+# The main view — now tidy!
+# ----------------------------------------------------------------------
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def live_face_check(request):
+    """Analyze a single base64 frame and return **at most one** error."""
+    user = request.user
+    data = request.data
+
+    face_image_data: str | None = data.get("face_image")
+    assignment_id: int | None = data.get("assignment_id")
+    question_id: int | None = data.get("question_id")
+
+    if not face_image_data or not assignment_id:
+        return JsonResponse({"error": "Missing data"}, status=400)
+
+    try:
+        assignment = TestAssignment.objects.select_related("test").get(id=assignment_id, student=user)
+    except TestAssignment.DoesNotExist:
+        return JsonResponse({"error": "Invalid assignment"}, status=404)
+
+    # question context (is looking‑down allowed?)
+    question_type = None
+    if question_id:
+        question = Question.objects.filter(id=question_id).first()
+        question_type = getattr(question, "type", None)
+    is_looking_down_allowed = question_type in {"code", "open"}
+
+    image_bytes = decode_data_url(face_image_data)
+    thumb = cascade.thumbnail(image_bytes)
+    if thumb is None:
+        return JsonResponse({"error": "Invalid image"}, status=400)
+
+    state, run_faces, run_phone = plan_frame(assignment, thumb)
+    frame = None
+    result: Dict[str, Any] = {"phone": None}
+    if run_faces or run_phone:
+        frame = Frame.decode(image_bytes)
+        result = analyze_frame(frame, run_faces, run_phone)
+
+    chosen_issue = pick_issue(finish_frame(user, assignment, state, result, thumb, is_looking_down_allowed))
 
-    # ------------------------------------------------------------------
-    # If we have an issue → debounce, log, respond; else success
-    # ------------------------------------------------------------------
     if chosen_issue:
         if debounce_event(
             user,
@@ -317,44 +388,107 @@ def live_face_check(request):  # noqa: C901  — it *is* complex, sorry pylint
             chosen_issue,
             DEBOUNCE_SECONDS.get(chosen_issue, 5),
         ):
-            # cleared debounce, actually log
-            messages = {
-                "multiple_faces": "Detected more than one face in frame.",
-                "mobile_detected": "Mobile phone detected in camera frame.",
-                "no_face_found": "No face detected.",
-                "face_mismatch": "Face does not match the authenticated student.",
-                "gaze_offscreen": "Student appears to be looking away from the screen.",
-                "gaze_unclear": "Unable to determine gaze direction (lighting / glasses).",
-                "head_pose_suspicious": "Student head pose is suspicious.",
-            }
-            anomaly_scores = {
-                "multiple_faces": 0.5,
-                "mobile_detected": 1.0,
-                "no_face_found": 0.3,
-                "face_mismatch": 0.5,
-                "gaze_offscreen": 0.4,
-                "gaze_unclear": 0.1,
-                "head_pose_suspicious": 0.2,
-            }
             log_student_event(
                 assignment,
                 assignment.attempt_no,
                 chosen_issue,
-                messages[chosen_issue],
-                anomaly_scores[chosen_issue],
-                frame=frame_bgr,
+                ISSUE_MESSAGES[chosen_issue],
+                ISSUE_ANOMALY_SCORES[chosen_issue],
+                frame=(frame or Frame.decode(image_bytes)).bgr,
             )
 
         # Always return the error even if debounced (frontend still needs to know)
         return JsonResponse({"error": chosen_issue}, status=200)
 
-    # ---------------- Success! ----------------------------------------
-    StudentActivityLog.objects.create(
-        assignment=assignment,
-        attempt_no=assignment.attempt_no,
-        focus_lost_count=0,
-        anomaly_score=0.0,
-        event_type="face_match",
-        event_message="Face matches and gaze is on the screen.",
-    )
+    StudentActivityLog.objects.create(assignment=assignment, attempt_no=assignment.attempt_no, **FACE_MATCH_EVENT)
     return JsonResponse({"success": True})
+
+
+async def looking_down_allowed(question_id) -> bool:
+    """Question context: looking down is allowed while answering code / open questions."""
+    if not question_id:
+        return False
+    question = await Question.objects.filter(id=question_id).afirst()
+    return getattr(question, "type", None) in {"code", "open"}
+
+
+@async_jwt_post
+async def live_face_check_async(request):
+    """``live_face_check`` with the detectors awaited on the inference process pool."""
+    user = request.user
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    face_image_data: str | None = data.get("face_image")
+    assignment_id: int | None = data.get("assignment_id")
+    question_id: int | None = data.get("question_id")
+
+    if not face_image_data or not assignment_id:
+        return JsonResponse({"error": "Missing data"}, status=400)
+
+    assignment = await TestAssignment.objects.select_related("test").filter(id=assignment_id, student=user).afirst()
+    if assignment is None:
+        return JsonResponse({"error": "Invalid assignment"}, status=404)
+
+    is_looking_down_allowed = await looking_down_allowed(question_id)
+
+    try:
+        image_bytes = decode_data_url(face_image_data)
+    except (ValueError, binascii.Error):
+        return JsonResponse({"error": "Bad image data"}, status=400)
+
+    try:
+        verdict = await check_exam_frame(user, assignment, image_bytes, is_looking_down_allowed)
+    except Exception as e:
+        print(f"[ERROR] Failed to analyze frame: {e}")
+        return JsonResponse({"error": "Face analysis failed"}, status=200)
+    if verdict is None:
+        return JsonResponse({"error": "Invalid image"}, status=400)
+    return JsonResponse(verdict, status=200)
+
+
+async def check_exam_frame(user, assignment: TestAssignment, image_bytes: bytes, is_looking_down_allowed: bool) -> Dict[str, Any] | None:
+    """Analyze one encoded frame on the process pool, log the outcome and return the verdict.
+
+    Shared by ``live_face_check_async`` and the exam WebSocket; ``None`` for an undecodable image.
+    """
+    thumb = cascade.thumbnail(image_bytes)
+    if thumb is None:
+        return None
+
+    state, run_faces, run_phone = await sync_to_async(plan_frame)(assignment, thumb)
+    result: Dict[str, Any] = {"phone": None}
+    if run_faces or run_phone:
+        # only the encoded JPEG crosses the process boundary
+        result = await process_pool.run(analyze_frame_bytes, image_bytes, run_faces, run_phone)
+        if result is None:
+            return None
+
+    issues = await sync_to_async(finish_frame)(user, assignment, state, result, thumb, is_looking_down_allowed)
+    chosen_issue = pick_issue(issues)
+
+    if chosen_issue:
+        fire = await sync_to_async(debounce_event)(
+            user,
+            assignment,
+            assignment.attempt_no,
+            chosen_issue,
+            DEBOUNCE_SECONDS.get(chosen_issue, 5),
+        )
+        if fire:
+            log = await StudentActivityLog.objects.acreate(
+                assignment=assignment,
+                attempt_no=assignment.attempt_no,
+                focus_lost_count=1,
+                anomaly_score=ISSUE_ANOMALY_SCORES[chosen_issue],
+                event_type=chosen_issue,
+                event_message=ISSUE_MESSAGES[chosen_issue],
+            )
+            # decoded again only for the (rare) frames that become evidence
+            evidence.submit(assignment.id, assignment.attempt_no, chosen_issue, Frame.decode(image_bytes).bgr, activity_log_id=log.id)
+        return {"error": chosen_issue}
+
+    await StudentActivityLog.objects.acreate(assignment=assignment, attempt_no=assignment.attempt_no, **FACE_MATCH_EVENT)
+    return {"success": True}